@@ -1,21 +1,186 @@
 from pathlib import Path
+from sqlalchemy import event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.selectable import CompoundSelect
 from sqlmodel import SQLModel, create_engine, Session
-from typing import Generator
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional, Tuple
 import os
+from .migrations import run_migrations
 
 # Project root
 BASE_DIR = Path(__file__).resolve().parents[1]  # backend/.. = project root
 DATABASE_FILE = BASE_DIR / "dev.db"
 
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATABASE_FILE}")
+# Optional read replica for read-only routes; defaults to the primary
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL") or DATABASE_URL
 
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+# Connection pools, per engine. The read engine has its own pool so GET
+# routes never queue behind sync writes for a connection.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", str(DB_POOL_SIZE)))
+DB_READ_MAX_OVERFLOW = int(os.getenv("DB_READ_MAX_OVERFLOW", str(DB_MAX_OVERFLOW)))
 
-engine = create_engine(DATABASE_URL, echo=False, connect_args=connect_args)
+# "default" keeps SQLite's rollback journal; "production" switches to WAL so
+# readers are not blocked by a writer, with the pragmas below
+SQLITE_MODES = ("default", "production")
+SQLITE_MODE = os.getenv("SQLITE_MODE", "default")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+
+def sqlite_pragmas(mode: str) -> List[str]:
+    """
+    PRAGMA statements run on every new connection in the given mode.
+    """
+    if mode not in SQLITE_MODES:
+        raise ValueError(f"SQLITE_MODE must be one of {', '.join(SQLITE_MODES)}, got {mode!r}")
+    if mode == "default":
+        return []
+    return [
+        "journal_mode=WAL",
+        "synchronous=NORMAL",  # durable across app crashes; WAL fsyncs at checkpoints
+        f"busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        f"mmap_size={SQLITE_MMAP_SIZE}",
+        f"cache_size=-{SQLITE_CACHE_SIZE_KB}",  # negative = KiB rather than pages
+        "temp_store=MEMORY",
+    ]
+
+def pool_options(pool_size: int = DB_POOL_SIZE, max_overflow: int = DB_MAX_OVERFLOW) -> Dict[str, Any]:
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+    }
+
+# asyncio drivers for the async engines, by database backend
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def async_url(url: str) -> URL:
+    """
+    The same database URL with the backend's asyncio driver.
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.get_backend_name()} databases")
+    return parsed.set(drivername=driver)
+
+def _engine_options(url: str, sqlite_mode: str, pool: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[str]]:
+    # create_engine keyword arguments and connection pragmas shared by the sync and async engines
+    pool = pool_options() if pool is None else pool
+    if not url.startswith("sqlite"):
+        return {"pool_pre_ping": True, **pool}, []
+
+    if make_url(url).database in (None, "", ":memory:"):
+        pool = {}  # in-memory databases are per connection; keep SQLAlchemy's default pool
+
+    connect_args = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+    return {"connect_args": connect_args, **pool}, sqlite_pragmas(sqlite_mode)
+
+def _run_pragmas_on_connect(sync_engine: Engine, pragmas: List[str]) -> None:
+    if not pragmas:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+def make_engine(
+    url: str = DATABASE_URL,
+    sqlite_mode: str = SQLITE_MODE,
+    pool: Optional[Dict[str, Any]] = None
+) -> Engine:
+    options, pragmas = _engine_options(url, sqlite_mode, pool)
+    new_engine = create_engine(url, echo=False, **options)
+    _run_pragmas_on_connect(new_engine, pragmas)
+    return new_engine
+
+def make_async_engine(
+    url: str = DATABASE_URL,
+    sqlite_mode: str = SQLITE_MODE,
+    pool: Optional[Dict[str, Any]] = None
+) -> AsyncEngine:
+    options, pragmas = _engine_options(url, sqlite_mode, pool)
+    new_engine = create_async_engine(async_url(url), echo=False, **options)
+    _run_pragmas_on_connect(new_engine.sync_engine, pragmas)
+    return new_engine
+
+engine = make_engine()
+read_engine = make_engine(DATABASE_READ_URL, pool=pool_options(DB_READ_POOL_SIZE, DB_READ_MAX_OVERFLOW))
+
+# The same databases for async routes, with pools of their own
+async_engine = make_async_engine()
+async_read_engine = make_async_engine(DATABASE_READ_URL, pool=pool_options(DB_READ_POOL_SIZE, DB_READ_MAX_OVERFLOW))
+
+class RoutingSession(Session):
+    """
+    Session for read-mostly requests: plain SELECTs go to the read engine
+    until the session writes (flush, DML or raw SQL), after which it stays
+    pinned to the primary so the request reads its own writes.
+    A replica may lag the primary by its replication delay.
+    """
+    read_bind: Engine = read_engine
+    write_bind: Engine = engine
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pinned_to_primary = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if not self.pinned_to_primary:
+            if not self._flushing and isinstance(clause, (Select, CompoundSelect)):
+                return self.read_bind
+            self.pinned_to_primary = True
+        return self.write_bind
+
+class AsyncRoutingSession(RoutingSession):
+    """
+    RoutingSession over the async engines, as the sync side of an AsyncSession.
+    """
+    read_bind = async_read_engine.sync_engine
+    write_bind = async_engine.sync_engine
 
 def create_db_and_tables() -> None:
     SQLModel.metadata.create_all(engine)
+    run_migrations(engine)
 
 def get_session() -> Generator[Session, None, None]:
+    """
+    Session on the primary, for routes that write.
+    """
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+def get_read_session() -> Generator[Session, None, None]:
+    """
+    Session for read-only routes; see RoutingSession.
+    """
+    with RoutingSession() as session:
+        yield session
+
+# Async sessions keep loaded attributes after commit: refreshing an expired
+# attribute would be implicit I/O, which AsyncSession can't do
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    AsyncSession on the primary, for async routes that write.
+    """
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+async def get_async_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    AsyncSession for async read-only routes; see RoutingSession.
+    """
+    async with AsyncSession(sync_session_class=AsyncRoutingSession, expire_on_commit=False) as session:
+        yield session
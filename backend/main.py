@@ -9,25 +9,53 @@ env_path = Path(__file__).resolve().parents[1] / ".env"
 load_dotenv(dotenv_path=env_path)
 
 # ───── Now import routes and database ─────
-from .routes import auth, users, challenges, activity_sync
+from .routes import auth, users, challenges, activity_sync, admin, webhooks, leaderboard, metrics
 from .db import create_db_and_tables
+from .services.leaderboard import leaderboard_reconciler
+from .services.strava_async import close_async_client
+from .services.strava_tokens import token_manager
+from .services.sync_jobs import sync_worker_pool
+from .utils.dependencies import ADMIN_API_KEY, is_admin_key
+from .utils.metrics import METRICS_ENABLED, MetricsMiddleware
+from .utils.profiling import ProfilingMiddleware
+from .utils.query_audit import QUERY_AUDIT, QueryAuditMiddleware
 
 # ───── Lifespan for startup/shutdown ─────
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup logic
     create_db_and_tables()
+    await sync_worker_pool.start()
+    token_manager.start()
+    leaderboard_reconciler.start()
     yield
-    # Shutdown logic (optional)
+    # Shutdown logic
+    await leaderboard_reconciler.stop()
+    await token_manager.stop()
+    await sync_worker_pool.stop()
+    await close_async_client()
 
 # ───── Create FastAPI app ─────
 app = FastAPI(title="Gamified Running App MVP", lifespan=lifespan)
 
+# ───── Middleware ─────
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+if QUERY_AUDIT != "off":
+    app.add_middleware(QueryAuditMiddleware)
+# Admin-triggered profiling (X-Profile: 1 + X-Admin-Key); absent when no admin key is set
+if ADMIN_API_KEY:
+    app.add_middleware(ProfilingMiddleware, is_admin_key=is_admin_key)
+
 # ───── Include routers ─────
 app.include_router(auth.router, prefix="/auth")
 app.include_router(users.router, prefix="/users")
 app.include_router(challenges.router, prefix="/challenges")
 app.include_router(activity_sync.router, prefix="/activities")
+app.include_router(admin.router, prefix="/admin")
+app.include_router(webhooks.router, prefix="/webhooks")
+app.include_router(leaderboard.router, prefix="/leaderboard")
+app.include_router(metrics.router, prefix="/metrics")
 
 # ───── Root endpoint ─────
 @app.get("/")
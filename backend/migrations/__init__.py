@@ -0,0 +1,65 @@
+"""
+Versioned schema migrations.
+
+`create_all` only creates missing tables, so changes to existing tables
+(new indexes, constraints, backfills) are applied here instead. Each
+migration runs once, in version order and in its own transaction, and is
+recorded in the `schema_version` table. Models declare the same indexes so
+fresh databases start out current; migrations must therefore be idempotent.
+"""
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select
+from sqlalchemy.engine import Connection, Engine
+
+from . import m0001_hot_path_indexes, m0002_keyset_pagination_indexes, m0003_unique_user_titles
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "hot_path_indexes", m0001_hot_path_indexes.upgrade),
+    Migration(2, "keyset_pagination_indexes", m0002_keyset_pagination_indexes.upgrade),
+    Migration(3, "unique_user_titles", m0003_unique_user_titles.upgrade),
+]
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def current_version(connection: Connection) -> int:
+    versions = connection.execute(select(schema_version.c.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def run_migrations(engine: Engine) -> List[Migration]:
+    """
+    Apply every migration newer than the recorded schema version.
+    Returns the migrations that were applied.
+    """
+    schema_version.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        version = current_version(connection)
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            connection.execute(schema_version.insert().values(
+                version=migration.version,
+                name=migration.name,
+                applied_at=datetime.utcnow()
+            ))
+        applied.append(migration)
+    return applied
@@ -0,0 +1,44 @@
+"""
+Indexes for the sync, join, dashboard and catalog access paths, plus unique
+(user_id, challenge_id) and (user_id, badge_id). Rows that would violate the
+unique indexes are removed first.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Keep the most progressed row of each duplicated (user, challenge) pair
+DEDUPLICATE_USER_CHALLENGES = """
+DELETE FROM userchallenge WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY user_id, challenge_id
+            ORDER BY distance_completed_km DESC, id
+        ) AS position
+        FROM userchallenge
+    ) AS ranked
+    WHERE position > 1
+)
+"""
+
+# Keep the earliest award of each duplicated (user, badge) pair
+DEDUPLICATE_USER_BADGES = """
+DELETE FROM userbadge WHERE id NOT IN (
+    SELECT MIN(id) FROM userbadge GROUP BY user_id, badge_id
+)
+"""
+
+INDEXES = [
+    'CREATE UNIQUE INDEX IF NOT EXISTS ix_user_challenge_user_challenge ON userchallenge (user_id, challenge_id)',
+    'CREATE INDEX IF NOT EXISTS ix_user_challenge_challenge_distance ON userchallenge (challenge_id, distance_completed_km)',
+    'CREATE UNIQUE INDEX IF NOT EXISTS ix_user_badge_user_badge ON userbadge (user_id, badge_id)',
+    'CREATE INDEX IF NOT EXISTS ix_user_title_user_active ON usertitle (user_id, is_active)',
+    'CREATE INDEX IF NOT EXISTS ix_challenge_active_tier ON challenge (active, tier)',
+    'CREATE INDEX IF NOT EXISTS ix_user_token_expires_at ON "user" (token_expires_at)',
+]
+
+
+def upgrade(connection: Connection) -> None:
+    connection.execute(text(DEDUPLICATE_USER_CHALLENGES))
+    connection.execute(text(DEDUPLICATE_USER_BADGES))
+    for statement in INDEXES:
+        connection.execute(text(statement))
@@ -0,0 +1,24 @@
+"""
+Indexes for the keyset-paginated challenge catalog and /challenges/my:
+(filters..., created_at, id) per catalog filter and (user_id, joined_at, id).
+The (active, tier) catalog index is a prefix of its replacement and is dropped.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_challenge_active_created ON challenge (active, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS ix_challenge_active_tier_created ON challenge (active, tier, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS ix_challenge_active_type_created ON challenge (active, type, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS ix_challenge_active_sport_created ON challenge (active, sport, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS ix_user_challenge_user_joined ON userchallenge (user_id, joined_at, id)',
+]
+
+SUPERSEDED_INDEXES = ["ix_challenge_active_tier"]
+
+
+def upgrade(connection: Connection) -> None:
+    for statement in INDEXES:
+        connection.execute(text(statement))
+    for name in SUPERSEDED_INDEXES:
+        connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
@@ -0,0 +1,30 @@
+"""
+Unique (user_id, title_id), so a title is held once even when a backfill
+and a per-user award insert it concurrently. Duplicate rows are removed first.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Keep the active row of each duplicated (user, title) pair, else the earliest
+DEDUPLICATE_USER_TITLES = """
+DELETE FROM usertitle WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY user_id, title_id
+            ORDER BY is_active DESC, id
+        ) AS position
+        FROM usertitle
+    ) AS ranked
+    WHERE position > 1
+)
+"""
+
+INDEXES = [
+    'CREATE UNIQUE INDEX IF NOT EXISTS ix_user_title_user_title ON usertitle (user_id, title_id)',
+]
+
+
+def upgrade(connection: Connection) -> None:
+    connection.execute(text(DEDUPLICATE_USER_TITLES))
+    for statement in INDEXES:
+        connection.execute(text(statement))
@@ -4,4 +4,7 @@ from .user_challenge import UserChallenge
 from .badge import Badge, BadgeCategory
 from .title import Title, TitleRarity
 from .user_badge import UserBadge
-from .user_title import UserTitle
\ No newline at end of file
+from .user_title import UserTitle
+from .sync_job import SyncJob, SyncJobStatus
+from .strava_event import StravaEvent, StravaEventStatus
+from .activity import Activity
\ No newline at end of file
@@ -0,0 +1,25 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import BigInteger, Column, DateTime, Index
+
+class Activity(SQLModel, table=True):
+    """
+    A Strava activity as it was applied to a user. Keyed by the Strava id so
+    re-fetched pages and webhook events are only ever counted once.
+    """
+    __tablename__ = "activity"
+    __table_args__ = (
+        # Cursor lookups and per-user history, newest first
+        Index("ix_activity_user_start_date", "user_id", "start_date"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    strava_activity_id: int = Field(sa_column=Column("strava_activity_id", BigInteger, unique=True, nullable=False))
+    user_id: int = Field(foreign_key="user.id")
+    name: Optional[str] = Field(default=None)
+    type: Optional[str] = Field(default=None)
+    distance_km: float = Field(default=0.0)
+    moving_time: Optional[int] = Field(default=None)
+    start_date: datetime = Field(sa_column=Column("start_date", DateTime, nullable=False))
+    created_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column("created_at", DateTime))
@@ -1,8 +1,18 @@
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, List
 from datetime import datetime
+from sqlalchemy import Index
 
 class Challenge(SQLModel, table=True):
+    __table_args__ = (
+        # Catalog pages, newest first: unfiltered and by each filter, so a
+        # filtered page is one index range read however deep it is
+        Index("ix_challenge_active_created", "active", "created_at", "id"),
+        Index("ix_challenge_active_tier_created", "active", "tier", "created_at", "id"),
+        Index("ix_challenge_active_type_created", "active", "type", "created_at", "id"),
+        Index("ix_challenge_active_sport_created", "active", "sport", "created_at", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     tier: str
@@ -14,10 +24,11 @@ class Challenge(SQLModel, table=True):
     active: bool = True
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
-    # Relationships
+    # Loaded on access only: eager-loading every participant made each
+    # Challenge load pull in the whole table; load explicitly when needed
     user_challenges: List["UserChallenge"] = Relationship(
         back_populates="challenge",
-        sa_relationship_kwargs={"lazy": "selectin"}
+        sa_relationship_kwargs={"lazy": "select"}
     )
 
 Challenge.update_forward_refs()
\ No newline at end of file
@@ -0,0 +1,38 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import BigInteger, Column, DateTime, Enum, Text
+import enum
+
+class StravaEventStatus(str, enum.Enum):
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    PROCESSED = "processed"
+    IGNORED = "ignored"
+    FAILED = "failed"
+
+class StravaEvent(SQLModel, table=True):
+    """
+    A push event received from a Strava webhook subscription, queued for processing.
+    """
+    __tablename__ = "strava_event"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    object_type: str  # "activity" or "athlete"
+    object_id: int = Field(sa_column=Column("object_id", BigInteger, nullable=False))
+    aspect_type: str  # "create", "update" or "delete"
+    owner_id: int = Field(index=True)  # Strava athlete id
+    subscription_id: Optional[int] = Field(default=None)
+    event_time: Optional[int] = Field(default=None)
+    updates: Optional[str] = Field(default=None, sa_column=Column(Text))  # JSON-encoded
+    status: StravaEventStatus = Field(
+        default=StravaEventStatus.QUEUED,
+        sa_column=Column(
+            Enum(StravaEventStatus, values_callable=lambda statuses: [status.value for status in statuses]),
+            nullable=False,
+            index=True
+        )
+    )
+    error: Optional[str] = Field(default=None, sa_column=Column(Text))
+    received_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column("received_at", DateTime))
+    processed_at: Optional[datetime] = Field(default=None, sa_column=Column("processed_at", DateTime))
@@ -0,0 +1,44 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Enum, Index, Text, text
+import enum
+
+class SyncJobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+# Statuses that count as "a sync is already pending" for coalescing
+PENDING_STATUSES = (SyncJobStatus.QUEUED, SyncJobStatus.RUNNING)
+
+class SyncJob(SQLModel, table=True):
+    __tablename__ = "sync_job"
+    __table_args__ = (
+        # At most one queued/running job per user, so concurrent enqueues coalesce
+        Index(
+            "ix_sync_job_pending_user",
+            "user_id",
+            unique=True,
+            sqlite_where=text("status IN ('queued', 'running')"),
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    status: SyncJobStatus = Field(
+        default=SyncJobStatus.QUEUED,
+        sa_column=Column(
+            Enum(SyncJobStatus, values_callable=lambda statuses: [status.value for status in statuses]),
+            nullable=False,
+            index=True
+        )
+    )
+    attempts: int = Field(default=0)
+    result: Optional[str] = Field(default=None, sa_column=Column(Text))  # JSON-encoded sync summary
+    error: Optional[str] = Field(default=None, sa_column=Column(Text))
+    created_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column("created_at", DateTime))
+    started_at: Optional[datetime] = Field(default=None, sa_column=Column("started_at", DateTime))
+    finished_at: Optional[datetime] = Field(default=None, sa_column=Column("finished_at", DateTime))
@@ -25,7 +25,7 @@ class User(SQLModel, table=True):
     profile_medium: Optional[str] = Field(default=None)
     access_token: Optional[str] = Field(default=None)
     refresh_token: Optional[str] = Field(default=None)
-    token_expires_at: Optional[datetime] = Field(default=None, sa_column=Column("token_expires_at", DateTime))
+    token_expires_at: Optional[datetime] = Field(default=None, sa_column=Column("token_expires_at", DateTime, index=True))
     xp: int = Field(default=0)
     level: int = Field(default=1)
     momentum: int = Field(default=0)
@@ -34,17 +34,18 @@ class User(SQLModel, table=True):
     updated_at: Optional[datetime] = Field(default=None, sa_column=Column("updated_at", DateTime))
     last_sync_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
 
+    # Loaded on access only; routes that need them eager-load explicitly
     user_challenges: List["UserChallenge"] = Relationship(
         back_populates="user",
-        sa_relationship_kwargs={"lazy": "selectin"}
+        sa_relationship_kwargs={"lazy": "select"}
     )
     user_badges: List["UserBadge"] = Relationship(
         back_populates="user",
-        sa_relationship_kwargs={"lazy": "selectin"}
+        sa_relationship_kwargs={"lazy": "select"}
     )
     user_titles: List["UserTitle"] = Relationship(
         back_populates="user",
-        sa_relationship_kwargs={"lazy": "selectin"}
+        sa_relationship_kwargs={"lazy": "select"}
     )
 
 User.update_forward_refs()
\ No newline at end of file
@@ -1,13 +1,18 @@
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, TYPE_CHECKING
 from datetime import datetime
-from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy import Column, Integer, DateTime, Index
 
 if TYPE_CHECKING:
     from .user import User
     from .badge import Badge
 
 class UserBadge(SQLModel, table=True):
+    __table_args__ = (
+        # A badge is earned once; also serves per-user lookups
+        Index("ix_user_badge_user_badge", "user_id", "badge_id", unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     badge_id: int = Field(foreign_key="badge.id")
@@ -1,8 +1,18 @@
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, TYPE_CHECKING
 from datetime import datetime
+from sqlalchemy import Index
 
 class UserChallenge(SQLModel, table=True):
+    __table_args__ = (
+        # One row per user and challenge; also serves per-user lookups
+        Index("ix_user_challenge_user_challenge", "user_id", "challenge_id", unique=True),
+        # Participant listings and leaderboard builds
+        Index("ix_user_challenge_challenge_distance", "challenge_id", "distance_completed_km"),
+        # /challenges/my pages, most recently joined first
+        Index("ix_user_challenge_user_joined", "user_id", "joined_at", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     challenge_id: int = Field(foreign_key="challenge.id")
@@ -13,13 +23,15 @@ class UserChallenge(SQLModel, table=True):
     joined_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
 
+    # Loaded on access only; callers eager-load with selectinload() as needed
+    # (async sessions must, since they can't lazy-load)
     user: "User" = Relationship(
         back_populates="user_challenges",
-        sa_relationship_kwargs={"lazy": "selectin"}
+        sa_relationship_kwargs={"lazy": "select"}
     )
     challenge: "Challenge" = Relationship(
         back_populates="user_challenges",
-        sa_relationship_kwargs={"lazy": "selectin"}
+        sa_relationship_kwargs={"lazy": "select"}
     )
 
 UserChallenge.update_forward_refs()
\ No newline at end of file
@@ -1,13 +1,20 @@
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, TYPE_CHECKING
 from datetime import datetime
-from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy import Column, Integer, DateTime, Index
 
 if TYPE_CHECKING:
     from .user import User
     from .title import Title
 
 class UserTitle(SQLModel, table=True):
+    __table_args__ = (
+        # Per-user lookups, including the active title
+        Index("ix_user_title_user_active", "user_id", "is_active"),
+        # A title is earned once
+        Index("ix_user_title_user_title", "user_id", "title_id", unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     title_id: int = Field(foreign_key="title.id")
@@ -1,108 +1,53 @@
-from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
-from datetime import datetime
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from ..utils.dependencies import get_current_user
-from ..services.strava_service import fetch_user_activities
-from ..services.progress import update_challenge_progress, calculate_base_xp, check_level_up
-from ..services.awards import award_badges_and_titles
-from ..db import get_session
-from ..models.user_challenge import UserChallenge
-from ..models.challenge import Challenge
-from ..models.user import User
+from ..utils.dependencies import get_current_user_id
+from ..utils.profiling import current_profile_id, profile_job
+from ..utils.serialization import serialize_sync_job
+from ..services.sync_jobs import async_enqueue_sync_job, sync_worker_pool
+from ..db import get_async_session
+from ..models.sync_job import SyncJob
 
 router = APIRouter()
 
-@router.post("/sync")
-def sync_activities(
-    current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+@router.post("/sync", status_code=status.HTTP_202_ACCEPTED)
+async def sync_activities(
+    user_id: int = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
-    Sync user activities from Strava and update:
+    Queue a sync of the user's Strava activities. A background worker updates:
     - Challenge progress
     - User XP and momentum
     - Badges and titles
-    """
-    # Determine timestamp cutoff for fetching activities
-    after_timestamp = int(current_user.last_sync_at.timestamp()) if current_user.last_sync_at else int(current_user.created_at.timestamp())
-
-    # Fetch Strava activities (auto refresh token inside)
-    activities = fetch_user_activities(current_user, after_timestamp=after_timestamp)
-
-    total_xp_added = 0
-    total_distance_added = 0.0
-    updated_challenges = []
-    base_xp_added = 0
-
-    # Calculate total distance and base XP from all running activities
-    for activity in activities:
-        if activity.get("type") == "Run":
-            distance_km = activity.get("distance", 0) / 1000  # meters → km
-            total_distance_added += distance_km
-            # Award base XP for all running activities
-            base_xp = calculate_base_xp(distance_km, in_challenge=False)
-            base_xp_added += base_xp
-
-    # Fetch all UserChallenge records for the user
-    user_challenges: List[UserChallenge] = session.exec(
-        select(UserChallenge).where(UserChallenge.user_id == current_user.id)
-    ).all()
-
-    for uc in user_challenges:
-        challenge = session.get(Challenge, uc.challenge_id)
-        if not challenge:
-            continue
-
-        challenge_xp = 0
-        for activity in activities:
-            if activity.get("type") != "Run":
-                continue
-
-            distance_km = activity.get("distance", 0) / 1000  # meters → km
-            activity_date = activity.get("start_date", datetime.utcnow())
-
-            xp = update_challenge_progress(uc, distance_km, challenge.tier, activity_date)
-            challenge_xp += xp
 
-        if challenge_xp > 0:
-            updated_challenges.append({
-                "user_challenge_id": uc.id,
-                "distance_completed_km": uc.distance_completed_km,
-                "xp_earned": uc.xp_earned,
-                "completed": uc.completed,
-                "streak": uc.streak
-            })
-
-        session.add(uc)
-        total_xp_added += challenge_xp
-
-    # Update user stats
-    total_xp_added += base_xp_added 
-    current_user.xp += total_xp_added
-    current_user.momentum += total_xp_added // 10
-    current_user.total_distance_km += total_distance_added
-    current_user.last_sync_at = datetime.utcnow()
-
-    # Check for level up
-    leveled_up = check_level_up(current_user)
-
-    # Award badges & titles
-    new_badges, new_titles = award_badges_and_titles(current_user, user_challenges, session)
-
-    session.add(current_user)
-    session.commit()
+    Repeated requests while a sync is queued or running return the same job.
+    Poll GET /activities/sync/{job_id} for the result.
+    """
+    job, queued = await async_enqueue_sync_job(user_id, session)
+    profile_id = current_profile_id()
+    # Only a job queued here is sure to be run (and unregistered) later; one
+    # already running would leave its entry behind
+    if profile_id and queued:
+        profile_job(job.id, profile_id)
+    sync_worker_pool.notify()
 
     return {
-        "message": "Activities synced successfully",
-        "activities_count": len(activities),
-        "xp_added": total_xp_added,
-        "base_xp_added": base_xp_added,
-        "challenge_xp_added": total_xp_added - base_xp_added,
-        "leveled_up": leveled_up,
-        "current_level": current_user.level,
-        "challenges_updated": updated_challenges,
-        "new_badges": new_badges,
-        "new_titles": new_titles
-    }
\ No newline at end of file
+        "message": "Activity sync queued",
+        **serialize_sync_job(job),
+        "status_url": f"/activities/sync/{job.id}"
+    }
+
+@router.get("/sync/{job_id}")
+async def get_sync_job(
+    job_id: int,
+    user_id: int = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Return the status of a sync job, including the sync summary once it has succeeded.
+    """
+    job = await session.get(SyncJob, job_id)
+    if not job or job.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return serialize_sync_job(job)
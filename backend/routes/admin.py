@@ -0,0 +1,52 @@
+from dataclasses import asdict
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+
+from ..db import get_session
+from ..models.badge import Badge
+from ..models.title import Title
+from ..services.backfill import backfill_award, DEFAULT_CHUNK_SIZE
+from ..services.exports import NDJSON_MEDIA_TYPE, ExportKind, stream_export
+from ..utils.dependencies import require_admin
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+# Retroactively award a badge to every eligible user
+@router.post("/backfill/badges/{badge_id}")
+def backfill_badge(
+    badge_id: int,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1),
+    session: Session = Depends(get_session)
+):
+    badge = session.get(Badge, badge_id)
+    if not badge:
+        raise HTTPException(status_code=404, detail="Badge not found")
+    try:
+        return asdict(backfill_award(badge, session, chunk_size=chunk_size))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+# Retroactively award a title to every eligible user
+@router.post("/backfill/titles/{title_id}")
+def backfill_title(
+    title_id: int,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1),
+    session: Session = Depends(get_session)
+):
+    title = session.get(Title, title_id)
+    if not title:
+        raise HTTPException(status_code=404, detail="Title not found")
+    try:
+        return asdict(backfill_award(title, session, chunk_size=chunk_size))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+# Stream one export for every user, for analytics
+@router.get("/export/{kind}")
+async def export_all_users(kind: ExportKind):
+    return StreamingResponse(
+        stream_export(kind),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="all-{kind.value}.ndjson"'}
+    )
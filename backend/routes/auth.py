@@ -1,12 +1,14 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import RedirectResponse
+from starlette.concurrency import run_in_threadpool
 import os
-import requests
 from datetime import datetime
 from sqlmodel import select, Session
 
 from ..db import engine
 from ..models.user import User
+from ..services.strava_async import async_exchange_code
+from ..services.strava_tokens import token_manager
 from ..utils.security import create_access_token
 from ..utils.serialization import serialize_user_basic
 
@@ -28,14 +30,8 @@ def strava_login():
     return RedirectResponse(url)
 
 @router.get("/strava/callback")
-def strava_callback(code: str):
-    token_url = "https://www.strava.com/oauth/token"
-    resp = requests.post(token_url, data={
-        "client_id": STRAVA_CLIENT_ID,
-        "client_secret": STRAVA_CLIENT_SECRET,
-        "code": code,
-        "grant_type": "authorization_code"
-    })
+async def strava_callback(code: str):
+    resp = await async_exchange_code(code)
     token_data = resp.json()
 
     if resp.status_code != 200:
@@ -46,6 +42,22 @@ def strava_callback(code: str):
     if not athlete:
         raise HTTPException(status_code=400, detail="No athlete in Strava response")
 
+    # DB work runs in the threadpool so the event loop stays free
+    user = await run_in_threadpool(_upsert_strava_user, athlete, token_data)
+    token_manager.forget(user.id)  # the fresh tokens replace any cached ones
+
+    # create a simple JWT for your frontend to use
+    jwt_token = create_access_token({"user_id": user.id, "strava_athlete_id": user.strava_athlete_id})
+
+    # Return only safe user fields using serialization utility
+    user_payload = serialize_user_basic(user)
+
+    return {"access_token": jwt_token, "token_type": "bearer", "user": user_payload}
+
+def _upsert_strava_user(athlete: dict, token_data: dict) -> User:
+    """
+    Create or update the user for a Strava athlete and store their tokens.
+    """
     expires_at = token_data.get("expires_at")
     token_expires_dt = datetime.utcfromtimestamp(expires_at) if expires_at else None
 
@@ -97,10 +109,4 @@ def strava_callback(code: str):
         session.commit()
         session.refresh(user)
 
-    # create a simple JWT for your frontend to use
-    jwt_token = create_access_token({"user_id": user.id, "strava_athlete_id": user.strava_athlete_id})
-
-    # Return only safe user fields using serialization utility
-    user_payload = serialize_user_basic(user)
-
-    return {"access_token": jwt_token, "token_type": "bearer", "user": user_payload}
\ No newline at end of file
+    return user
\ No newline at end of file
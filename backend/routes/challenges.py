@@ -1,59 +1,194 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from typing import List
-from ..db import get_session
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Callable, List, Literal, Optional
+import base64
+import json
+from ..db import get_async_read_session, get_async_session
 from ..models.challenge import Challenge
 from ..models.user_challenge import UserChallenge
 from ..models.user import User
 from ..models.schemas import UserChallengeRead, ChallengeRead
-from ..utils.dependencies import get_current_user
+from ..services.challenge_catalog import (
+    CHALLENGE_CATALOG_SNAPSHOT, CHALLENGES_MAX_PAGE_SIZE, CHALLENGES_PAGE_SIZE, async_get_catalog, catalog_query
+)
+from ..services.leaderboard import LEADERBOARD_MAX_LIMIT, async_serialize_entries, challenge_ranking_index
+from ..utils.dependencies import get_current_user_id
 
 router = APIRouter()
 
-# List challenges (filter optional)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def _encode_cursor(*values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def _decode_cursor(cursor: str, *parsers: Callable) -> tuple:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(parsers):
+            raise ValueError("wrong number of cursor values")
+        return tuple(parse(value) for parse, value in zip(parsers, values))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def _keyset_page(query, created_column, id_column, cursor: Optional[str], limit: int, response: Response, session: AsyncSession) -> list:
+    """
+    One page of `query`, newest first by (created_column, id_column).
+    Continues after `cursor` when given and sets X-Next-Cursor when more rows
+    follow; with a (filters..., created, id) index every page is one index
+    range read, however deep.
+    """
+    if cursor:
+        created, row_id = _decode_cursor(cursor, datetime.fromisoformat, int)
+        query = query.where(tuple_(created_column, id_column) < tuple_(created, row_id))
+    rows = (await session.exec(
+        query.order_by(created_column.desc(), id_column.desc()).limit(limit + 1)
+    )).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(
+            getattr(last, created_column.key).isoformat(), getattr(last, id_column.key)
+        )
+    return rows
+
+# List challenges (filter optional), newest first and keyset-paginated
 @router.get("/", response_model=List[ChallengeRead])
-def list_challenges(tier: str = None, type: str = None, sport: str = None, session: Session = Depends(get_session)):
-    query = select(Challenge).where(Challenge.active == True)
+async def list_challenges(
+    response: Response,
+    tier: str = None,
+    type: str = None,
+    sport: str = None,
+    limit: int = Query(default=CHALLENGES_PAGE_SIZE, ge=1, le=CHALLENGES_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_read_session)
+):
+    """
+    Active challenges that haven't ended yet. Pass the X-Next-Cursor
+    response header as `cursor` (with the same filters) for the next page;
+    it is absent on the last page.
+    Served from the in-process catalog snapshot unless it is disabled.
+    """
+    if CHALLENGE_CATALOG_SNAPSHOT:
+        catalog = await async_get_catalog()
+        after = _decode_cursor(cursor, datetime.fromisoformat, int) if cursor else None
+        body, last = catalog.page((tier or None, type or None, sport or None), after, limit)
+        headers = {NEXT_CURSOR_HEADER: _encode_cursor(last[0].isoformat(), last[1])} if last else None
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    query = catalog_query()
     if tier:
         query = query.where(Challenge.tier == tier)
     if type:
         query = query.where(Challenge.type == type)
     if sport:
         query = query.where(Challenge.sport == sport)
-    return session.exec(query).all()
+    return await _keyset_page(query, Challenge.created_at, Challenge.id, cursor, limit, response, session)
+
+async def _find_user_challenge(user_id: int, challenge_id: int, session: AsyncSession):
+    return (await session.exec(
+        select(UserChallenge).where(
+            UserChallenge.user_id == user_id,
+            UserChallenge.challenge_id == challenge_id
+        )
+    )).first()
 
 # Join challenge
 @router.post("/{challenge_id}/join")
-def join_challenge(challenge_id: int, current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    challenge = session.get(Challenge, challenge_id)
+async def join_challenge(challenge_id: int, user_id: int = Depends(get_current_user_id), session: AsyncSession = Depends(get_async_session)):
+    challenge = await session.get(Challenge, challenge_id)
     if not challenge or not challenge.active:
         raise HTTPException(status_code=404, detail="Challenge not found or inactive")
 
-    existing = session.exec(
-        select(UserChallenge).where(
-            UserChallenge.user_id == current_user.id,
-            UserChallenge.challenge_id == challenge_id
-        )
-    ).first()
-
+    existing = await _find_user_challenge(user_id, challenge_id, session)
     if existing:
         return {"message": "Already joined", "user_challenge_id": existing.id}
 
-    user_challenge = UserChallenge(user_id=current_user.id, challenge_id=challenge_id)
+    user_challenge = UserChallenge(user_id=user_id, challenge_id=challenge_id)
     session.add(user_challenge)
-    session.commit()
-    session.refresh(user_challenge)
+    try:
+        await session.commit()
+    except IntegrityError:
+        # A concurrent join won the unique (user_id, challenge_id) index
+        await session.rollback()
+        existing = await _find_user_challenge(user_id, challenge_id, session)
+        return {"message": "Already joined", "user_challenge_id": existing.id}
+    await session.refresh(user_challenge)
     return {"message": "Challenge joined", "user_challenge_id": user_challenge.id}
 
-# List user's joined challenges with full challenge info
+# List user's joined challenges with full challenge info, most recently joined first
 @router.get("/my", response_model=List[UserChallengeRead])
-def my_challenges(current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    user_challenges = session.exec(
-        select(UserChallenge).where(UserChallenge.user_id == current_user.id)
-    ).all()
+async def my_challenges(
+    response: Response,
+    limit: int = Query(default=CHALLENGES_PAGE_SIZE, ge=1, le=CHALLENGES_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    user_id: int = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_async_read_session)
+):
+    """
+    Keyset-paginated like the catalog: pass X-Next-Cursor back as `cursor`.
+    """
+    query = (
+        select(UserChallenge)
+        .where(UserChallenge.user_id == user_id)
+        .options(selectinload(UserChallenge.challenge))
+    )
+    user_challenges = await _keyset_page(query, UserChallenge.joined_at, UserChallenge.id, cursor, limit, response, session)
+
+    return [UserChallengeRead.from_orm(uc) for uc in user_challenges]
+
+async def _ensure_challenge_exists(challenge_id: int, session: AsyncSession) -> None:
+    # Id-only lookup: loading the Challenge would pull in every participant
+    if (await session.exec(select(Challenge.id).where(Challenge.id == challenge_id))).first() is None:
+        raise HTTPException(status_code=404, detail="Challenge not found")
+
+# Challenge standings, keyset-paginated
+@router.get("/{challenge_id}/leaderboard")
+async def challenge_leaderboard(
+    challenge_id: int,
+    by: Literal["distance", "xp"] = "distance",
+    limit: int = Query(default=20, ge=1, le=LEADERBOARD_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Participants ranked by distance completed (or XP earned), highest first.
+    Pass `next_cursor` from the previous page as `cursor` to continue.
+    """
+    await _ensure_challenge_exists(challenge_id, session)
+    index = await challenge_ranking_index(challenge_id, by)
+
+    if cursor:
+        entries = index.after(*_decode_cursor(cursor, float, int), limit)
+    else:
+        entries = index.top(limit)
 
-    for uc in user_challenges:
-        if not uc.challenge:
-            uc.challenge = session.get(Challenge, uc.challenge_id)
+    last = entries[-1] if entries else None
+    has_more = last is not None and last.rank < len(index)
+    return {
+        "challenge_id": challenge_id,
+        "by": by,
+        "total": len(index),
+        "entries": await async_serialize_entries(entries, session, score_field=by),
+        "next_cursor": _encode_cursor(last.score, last.member) if has_more else None
+    }
 
-    return [UserChallengeRead.from_orm(uc) for uc in user_challenges]
\ No newline at end of file
+# Current user's standing in a challenge
+@router.get("/{challenge_id}/leaderboard/me")
+async def my_challenge_rank(
+    challenge_id: int,
+    by: Literal["distance", "xp"] = "distance",
+    user_id: int = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_async_session)
+):
+    await _ensure_challenge_exists(challenge_id, session)
+    index = await challenge_ranking_index(challenge_id, by)
+    rank = index.rank(user_id)
+    if rank is None:
+        raise HTTPException(status_code=404, detail="Not participating in this challenge")
+    return {"challenge_id": challenge_id, "by": by, "rank": rank, by: index.score(user_id), "total": len(index)}
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+
+from ..db import get_session
+from ..services.leaderboard import LEADERBOARD_MAX_LIMIT, serialize_entries, xp_leaderboard
+from ..utils.dependencies import get_current_user_id
+
+router = APIRouter()
+
+@router.get("/")
+def top_users(
+    limit: int = Query(default=10, ge=1, le=LEADERBOARD_MAX_LIMIT),
+    offset: int = Query(default=0, ge=0),
+    session: Session = Depends(get_session)
+):
+    """
+    Global XP leaderboard, highest first.
+    """
+    index = xp_leaderboard.index(session)
+    return {
+        "total": len(index),
+        "entries": serialize_entries(index.top(limit, offset), session)
+    }
+
+@router.get("/me")
+def my_rank(user_id: int = Depends(get_current_user_id), session: Session = Depends(get_session)):
+    """
+    The current user's global rank.
+    """
+    index = xp_leaderboard.index(session)
+    rank = index.rank(user_id)
+    if rank is None:
+        raise HTTPException(status_code=404, detail="User not ranked")
+    return {"rank": rank, "xp": index.score(user_id), "total": len(index)}
+
+@router.get("/around-me")
+def around_me(
+    k: int = Query(default=5, ge=0, le=LEADERBOARD_MAX_LIMIT // 2),
+    user_id: int = Depends(get_current_user_id),
+    session: Session = Depends(get_session)
+):
+    """
+    The current user with up to `k` neighbours above and below.
+    """
+    index = xp_leaderboard.index(session)
+    entries = index.around(user_id, k)
+    if not entries:
+        raise HTTPException(status_code=404, detail="User not ranked")
+    return {"total": len(index), "entries": serialize_entries(entries, session)}
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import hmac
+
+from ..utils.dependencies import is_admin_key
+from ..utils.metrics import METRICS_ENABLED, METRICS_TOKEN, registry
+
+def require_metrics_access(
+    authorization: Optional[str] = Header(default=None),
+    x_admin_key: Optional[str] = Header(default=None)
+) -> None:
+    """
+    Dependency guarding /metrics, which exposes routes and traffic:
+    `Authorization: Bearer <METRICS_TOKEN>` or the X-Admin-Key header.
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    if METRICS_TOKEN and scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        return
+    if is_admin_key(x_admin_key):
+        return
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Metrics access required"
+    )
+
+router = APIRouter(dependencies=[Depends(require_metrics_access)])
+
+# Prometheus text exposition format, version 0.0.4
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """
+    Per-route latency, status and query metrics for Prometheus to scrape.
+    """
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
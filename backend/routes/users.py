@@ -1,69 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-from sqlmodel import Session, select
-from sqlalchemy.orm import selectinload
-import os
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from typing import Optional
 
-from ..db import engine, get_session
-from ..models.user import User
-from ..models.badge import Badge
-from ..models.title import Title
-from ..models.user_badge import UserBadge
-from ..models.user_title import UserTitle
-from ..utils.dependencies import get_current_user
-from ..utils.security import SECRET_KEY, ALGORITHM
-from ..utils.serialization import serialize_user_basic, serialize_badge, serialize_title
+from ..services.exports import NDJSON_MEDIA_TYPE, ExportKind, stream_export
+from ..services.user_dashboard import async_get_dashboard
+from ..utils.dependencies import get_current_user_id
 
 router = APIRouter()
-security = HTTPBearer()
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
 
 @router.get("/me")
-def read_users_me(
-    current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+async def read_users_me(
+    user_id: int = Depends(get_current_user_id),
+    if_none_match: Optional[str] = Header(default=None)
 ):
     """
     Return safe user fields for dashboard / frontend.
+    Served from a per-user cache; send the last ETag back in If-None-Match
+    to get a 304 when nothing changed.
     """
-    # Optimized query: Get user with all related data in one go
-    user_with_relations = session.exec(
-        select(User)
-        .options(
-            selectinload(User.user_badges).selectinload(UserBadge.badge),
-            selectinload(User.user_titles).selectinload(UserTitle.title)
-        )
-        .where(User.id == current_user.id)
-    ).first()
-    
-    if not user_with_relations:
+    dashboard = await async_get_dashboard(user_id)
+    if not dashboard:
         raise HTTPException(status_code=404, detail="User not found")
-    
-    # Get active title
-    active_title = session.exec(
-        select(Title).join(UserTitle).where(
-            UserTitle.user_id == current_user.id,
-            UserTitle.is_active == True
-        )
-    ).first()
-    
-    # Serialize user data
-    user_data = serialize_user_basic(user_with_relations)
-    
-    # Serialize badges
-    badges = [serialize_badge(ub.badge) for ub in user_with_relations.user_badges]
-    
-    # Serialize titles with active status
-    titles = []
-    for ut in user_with_relations.user_titles:
-        title_data = serialize_title(ut.title, ut.is_active)
-        titles.append(title_data)
-    
-    # Add badges, titles, and active title to response
-    user_data.update({
-        "badges": badges,
-        "titles": titles,
-        "active_title": serialize_title(active_title) if active_title else None
-    })
-    
-    return user_data
\ No newline at end of file
+
+    headers = {"ETag": dashboard.etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(if_none_match, dashboard.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=dashboard.body, media_type="application/json", headers=headers)
+
+@router.get("/me/export/{kind}")
+async def export_my_data(kind: ExportKind, user_id: int = Depends(get_current_user_id)):
+    """
+    Stream the user's challenges, badges, titles or activities as
+    newline-delimited JSON, one row per line.
+    """
+    return StreamingResponse(
+        stream_export(kind, user_id),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{kind.value}.ndjson"'}
+    )
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+import hmac
+import os
+
+from ..db import get_session
+from ..services.strava_events import record_event
+from ..services.sync_jobs import sync_worker_pool
+
+router = APIRouter()
+
+# Shared secret echoed by Strava when the push subscription is created
+STRAVA_WEBHOOK_VERIFY_TOKEN = os.getenv("STRAVA_WEBHOOK_VERIFY_TOKEN")
+# Optional: reject events for any other subscription
+STRAVA_WEBHOOK_SUBSCRIPTION_ID = os.getenv("STRAVA_WEBHOOK_SUBSCRIPTION_ID")
+
+REQUIRED_EVENT_FIELDS = ("object_type", "object_id", "aspect_type", "owner_id")
+
+# Subscription validation handshake
+@router.get("/strava")
+def verify_strava_subscription(
+    mode: str = Query(..., alias="hub.mode"),
+    verify_token: str = Query(..., alias="hub.verify_token"),
+    challenge: str = Query(..., alias="hub.challenge")
+):
+    if (
+        mode != "subscribe"
+        or not STRAVA_WEBHOOK_VERIFY_TOKEN
+        or not hmac.compare_digest(verify_token, STRAVA_WEBHOOK_VERIFY_TOKEN)
+    ):
+        raise HTTPException(status_code=403, detail="Invalid verify token")
+    return {"hub.challenge": challenge}
+
+# Event receiver; Strava expects a 200 within two seconds, so only queue here
+@router.post("/strava")
+async def receive_strava_event(
+    payload: dict = Body(...),
+    session: Session = Depends(get_session)
+):
+    if any(field not in payload for field in REQUIRED_EVENT_FIELDS):
+        raise HTTPException(status_code=400, detail="Malformed Strava event")
+
+    if STRAVA_WEBHOOK_SUBSCRIPTION_ID and str(payload.get("subscription_id")) != STRAVA_WEBHOOK_SUBSCRIPTION_ID:
+        raise HTTPException(status_code=403, detail="Unknown subscription")
+
+    event = await run_in_threadpool(record_event, payload, session)
+    sync_worker_pool.notify()
+
+    return {"event_id": event.id}
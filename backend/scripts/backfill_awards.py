@@ -0,0 +1,49 @@
+import argparse
+import sys
+from sqlmodel import Session, select
+from backend.db import engine
+from backend.models.badge import Badge
+from backend.models.title import Title
+from backend.services.backfill import backfill_award, DEFAULT_CHUNK_SIZE
+
+
+def backfill_awards(badge_ids, title_ids, all_awards: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Retroactively award badges/titles to every user who already meets their requirements.
+    """
+    with Session(engine) as session:
+        if all_awards:
+            awards = session.exec(select(Badge)).all() + session.exec(select(Title)).all()
+        else:
+            awards = [session.get(Badge, badge_id) or badge_id for badge_id in badge_ids]
+            awards += [session.get(Title, title_id) or title_id for title_id in title_ids]
+
+        for award in awards:
+            if isinstance(award, int):
+                print(f"❌ Award with ID {award} not found")
+                continue
+
+            try:
+                result = backfill_award(award, session, chunk_size=chunk_size)
+            except ValueError as exc:
+                print(f"❌ {type(award).__name__.lower()} '{award.name}' (ID: {award.id}): {exc}")
+                continue
+            print(
+                f"✅ {result.kind} '{result.name}' (ID: {result.award_id}): "
+                f"{result.inserted} awarded in {result.chunks} chunks, {result.elapsed_seconds}s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill badges/titles for existing users.")
+    parser.add_argument("--badge", type=int, action="append", default=[], help="Badge ID to backfill (repeatable)")
+    parser.add_argument("--title", type=int, action="append", default=[], help="Title ID to backfill (repeatable)")
+    parser.add_argument("--all", action="store_true", help="Backfill every badge and title")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Users per INSERT ... SELECT")
+    args = parser.parse_args()
+
+    if not (args.all or args.badge or args.title):
+        parser.print_usage()
+        sys.exit(1)
+
+    backfill_awards(args.badge, args.title, all_awards=args.all, chunk_size=args.chunk_size)
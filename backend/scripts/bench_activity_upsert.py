@@ -0,0 +1,97 @@
+"""
+Benchmark storing synced activities: bulk INSERT ... ON CONFLICT DO NOTHING
+against checking and adding rows one at a time through the ORM.
+
+Usage: python -m backend.scripts.bench_activity_upsert [--activities 5000] [--page-size 200]
+"""
+import argparse
+import time
+from typing import Callable, List
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session, create_engine, delete, select
+
+from backend.models import Activity, User
+from backend.services.activities import normalize_activity
+from backend.services.activity_store import insert_new_activities
+from backend.scripts.mock_strava import generate_activities
+
+
+def row_by_row_insert(user_id: int, activities: List[dict], session: Session) -> int:
+    """
+    The straightforward ORM version: look each activity up, add it if missing.
+    """
+    inserted = 0
+    for activity in activities:
+        exists = session.exec(select(Activity.id).where(Activity.strava_activity_id == activity["id"])).first()
+        if exists:
+            continue
+        normalized = normalize_activity(activity)
+        session.add(Activity(
+            strava_activity_id=activity["id"],
+            user_id=user_id,
+            name=activity.get("name"),
+            type=activity.get("type"),
+            distance_km=normalized.distance_km,
+            moving_time=activity.get("moving_time"),
+            start_date=normalized.start_date,
+        ))
+        session.flush()
+        inserted += 1
+    return inserted
+
+
+def bulk_insert(user_id: int, activities: List[dict], session: Session) -> int:
+    return len(insert_new_activities(user_id, activities, session))
+
+
+def run(label: str, store: Callable, user_id: int, pages: List[List[dict]], session: Session) -> float:
+    start = time.perf_counter()
+    inserted = 0
+    for page in pages:
+        inserted += store(user_id, page, session)
+        session.commit()
+    elapsed = time.perf_counter() - start
+    total = sum(len(page) for page in pages)
+    print(f"{label:<12} {total} activities, {inserted} inserted in {elapsed * 1000:.1f} ms -> {total / elapsed:,.0f} rows/sec")
+    return elapsed
+
+
+def paginate(activities: List[dict], page_size: int) -> List[List[dict]]:
+    return [activities[i:i + page_size] for i in range(0, len(activities), page_size)]
+
+
+def compare(scenario: str, user_id: int, pages: List[List[dict]], session: Session, reset: bool) -> None:
+    print(f"\n--- {scenario} ---")
+    before = run("row-by-row", row_by_row_insert, user_id, pages, session)
+    if reset:
+        session.exec(delete(Activity))
+        session.commit()
+    after = run("bulk upsert", bulk_insert, user_id, pages, session)
+    print(f"Speedup: {before / after:.1f}x")
+
+
+def main(activity_count: int, page_size: int) -> None:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    activities = generate_activities(activity_count)
+
+    with Session(engine) as session:
+        user = User(strava_athlete_id=1)
+        session.add(user)
+        session.commit()
+        user_id = user.id
+
+        print(f"{activity_count} activities in pages of {page_size}")
+        # Both sides start from an empty table
+        compare("First sync (all new)", user_id, paginate(activities, page_size), session, reset=True)
+        # Both sides see a table that already holds every activity
+        compare("Re-sync (all duplicates)", user_id, paginate(activities, page_size), session, reset=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bulk activity upserts.")
+    parser.add_argument("--activities", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=200)
+    args = parser.parse_args()
+
+    main(args.activities, args.page_size)
@@ -0,0 +1,149 @@
+"""
+Load test the async database routes against their threadpool equivalents.
+
+Sends the same requests at high concurrency to the async routes (AsyncSession
+on aiosqlite, served on the event loop) and to copies of the previous sync
+implementations (Session in FastAPI's threadpool, 40 workers by default), and
+reports requests/second and latency for each. The dashboard cache is disabled
+so /users/me always reaches the database.
+
+With more concurrent requests than pooled connections, threadpool workers
+block on pool checkout while the requests holding connections wait for a
+worker to close their session; those requests fail at the pool timeout,
+which is shortened here so a run finishes.
+
+Usage: python -m backend.scripts.bench_async_db [--requests 1000] [--concurrency 100] [--users 100]
+"""
+import os
+import tempfile
+
+# Throwaway database and secret; must be set before backend modules are imported
+BENCH_DATABASE_FILE = os.path.join(tempfile.gettempdir(), "bench_async_db.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DATABASE_FILE}"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("SQLITE_MODE", "production")
+os.environ["USER_DASHBOARD_CACHE_SIZE"] = "0"
+os.environ.setdefault("DB_POOL_SIZE", "40")
+os.environ.setdefault("DB_MAX_OVERFLOW", "20")
+os.environ.setdefault("DB_POOL_TIMEOUT_SECONDS", "5")
+
+from datetime import datetime, timedelta
+from typing import Dict, List
+import argparse
+import asyncio
+import random
+import time
+import httpx
+from fastapi import Depends, HTTPException, Response
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlmodel import Session, select
+
+from backend.main import app
+from backend.db import async_engine, async_read_engine, create_db_and_tables, engine, get_read_session
+from backend.models import Challenge, User, UserChallenge
+from backend.models.schemas import UserChallengeRead
+from backend.services.user_dashboard import get_dashboard
+from backend.utils.dependencies import _user_id_from_token, security
+from backend.utils.security import create_access_token
+
+
+def threadpool_user_id(credentials: HTTPAuthorizationCredentials = Depends(security), session: Session = Depends(get_read_session)) -> int:
+    user_id = _user_id_from_token(credentials.credentials)
+    if session.exec(select(User.id).where(User.id == user_id)).first() is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user_id
+
+
+@app.get("/bench/threadpool/users/me")
+def users_me_threadpool(user_id: int = Depends(threadpool_user_id)):
+    dashboard = get_dashboard(user_id)
+    return Response(content=dashboard.body, media_type="application/json", headers={"ETag": dashboard.etag})
+
+
+@app.get("/bench/threadpool/challenges/my")
+def my_challenges_threadpool(user_id: int = Depends(threadpool_user_id), session: Session = Depends(get_read_session)):
+    user_challenges = session.exec(select(UserChallenge).where(UserChallenge.user_id == user_id)).all()
+    return [UserChallengeRead.model_validate(uc) for uc in user_challenges]
+
+
+@app.get("/bench/threadpool/challenges/")
+def list_challenges_threadpool(session: Session = Depends(get_read_session)):
+    return session.exec(select(Challenge).where(Challenge.active == True)).all()
+
+
+def seed(user_count: int) -> List[str]:
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        challenges = [
+            Challenge(name=f"Challenge {i}", tier=("Sprint", "Marathon", "Ultra")[i % 3], type="solo", sport="running",
+                      distance_target_km=10 * (i + 1), start_date=now, end_date=now + timedelta(days=30))
+            for i in range(3)
+        ]
+        users = [User(strava_athlete_id=i + 1, username=f"runner{i}") for i in range(user_count)]
+        session.add_all([*challenges, *users])
+        session.commit()
+        session.add_all(UserChallenge(user_id=user.id, challenge_id=challenge.id) for user in users for challenge in challenges)
+        session.commit()
+        return [create_access_token({"user_id": user.id}) for user in users]
+
+
+async def drive(path: str, tokens: List[str], requests: int, concurrency: int) -> Dict[str, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one() -> None:
+            nonlocal errors
+            async with semaphore:
+                headers = {"Authorization": f"Bearer {random.choice(tokens)}"}
+                start = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "throughput": requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+async def compare(tokens: List[str], requests: int, concurrency: int) -> None:
+    # One event loop for every run: pooled aiosqlite connections belong to the loop that opened them
+    print(f"{'route':<18} {'model':<11} {'req/s':>8} {'p50':>9} {'p99':>9} {'errors':>7}")
+    for route in ("/users/me", "/challenges/my", "/challenges/"):
+        for model, path in (("threadpool", f"/bench/threadpool{route}"), ("async", route)):
+            stats = await drive(path, tokens, requests, concurrency)
+            print(f"{route:<18} {model:<11} {stats['throughput']:>8.1f} {stats['p50_ms']:>7.1f}ms "
+                  f"{stats['p99_ms']:>7.1f}ms {stats['errors']:>7}")
+    await async_engine.dispose()
+    await async_read_engine.dispose()
+
+
+def main(requests: int, concurrency: int, user_count: int) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(BENCH_DATABASE_FILE + suffix):
+            os.remove(BENCH_DATABASE_FILE + suffix)
+    create_db_and_tables()
+    tokens = seed(user_count)
+    print(f"{requests} GETs per route at concurrency {concurrency}, {user_count} users, SQLITE_MODE={os.environ['SQLITE_MODE']}\n")
+    asyncio.run(compare(tokens, requests, concurrency))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare async and threadpool database routes.")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+
+    main(args.requests, args.concurrency, args.users)
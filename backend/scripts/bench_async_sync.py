@@ -0,0 +1,149 @@
+"""
+Load test concurrent /activities/sync calls against a slow local mock Strava.
+
+Runs the same number of syncs through an async route (the code path the
+sync job workers use) and through a threadpool route that uses the
+blocking requests client, and reports
+syncs/second for each. The threadpool route holds a worker thread and a
+DB connection for the whole Strava round trip; once concurrency exceeds
+the DB pool (15 by default) its requests start timing out on checkout.
+
+Usage: python -m backend.scripts.bench_async_sync [--syncs 200] [--concurrency 50] [--latency-ms 250]
+"""
+import os
+import tempfile
+
+# Throwaway database and secret; must be set before backend modules are imported
+BENCH_DATABASE_FILE = os.path.join(tempfile.gettempdir(), "bench_async_sync.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DATABASE_FILE}"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import time
+import httpx
+from fastapi import Depends
+from sqlalchemy import event
+from sqlmodel import Session
+
+from backend.main import app
+from backend.db import create_db_and_tables, engine, get_session
+from backend.models.user import User
+from backend.services import strava_service
+from backend.services.strava_service import fetch_user_activities
+from backend.services.strava_async import close_async_client
+from backend.services.sync import apply_activity_sync, run_user_sync
+from backend.utils.dependencies import get_current_user
+from backend.utils.security import create_access_token
+from backend.scripts.mock_strava import MockStravaServer, generate_activities
+
+
+@event.listens_for(engine, "connect")
+def _skip_fsync(dbapi_connection, connection_record):
+    # The throwaway DB is not what's being measured; keep commit fsyncs out of the numbers
+    dbapi_connection.execute("PRAGMA synchronous=OFF")
+
+
+@app.post("/bench/sync-threadpool")
+def sync_activities_threadpool(
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """
+    The blocking implementation: Strava I/O holds a threadpool worker.
+    """
+    after_timestamp = int(current_user.last_sync_at.timestamp())
+    activities = fetch_user_activities(current_user, after_timestamp=after_timestamp)
+    return apply_activity_sync(current_user, activities, session)
+
+
+@app.post("/bench/sync-async")
+async def sync_activities_async(
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """
+    The async implementation: Strava I/O awaits on the event loop.
+    """
+    return await run_user_sync(current_user, session)
+
+
+def seed_users(count: int, first_athlete_id: int) -> list:
+    with Session(engine) as session:
+        users = [
+            User(strava_athlete_id=first_athlete_id + i, access_token=f"token-{i}", last_sync_at=datetime.utcnow())
+            for i in range(count)
+        ]
+        session.add_all(users)
+        session.commit()
+        return [create_access_token({"user_id": user.id}) for user in users]
+
+
+async def drive(path: str, tokens: list, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app, raise_app_exceptions=False), base_url="http://bench", timeout=None) as client:
+        async def one(token: str) -> None:
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(path, headers={"Authorization": f"Bearer {token}"})
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(token) for token in tokens))
+        elapsed = time.perf_counter() - start
+
+    await close_async_client()
+    latencies.sort()
+    return {
+        "syncs": len(tokens),
+        "elapsed": elapsed,
+        "throughput": len(tokens) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def report(label: str, stats: dict) -> None:
+    print(
+        f"{label:<11} {stats['syncs']} syncs in {stats['elapsed']:.2f}s -> {stats['throughput']:,.1f} syncs/sec "
+        f"(p50 {stats['p50_ms']:.0f} ms, p99 {stats['p99_ms']:.0f} ms, errors {stats['errors']})"
+    )
+
+
+def main(syncs: int, concurrency: int, latency_ms: float, activity_count: int) -> None:
+    if os.path.exists(BENCH_DATABASE_FILE):
+        os.remove(BENCH_DATABASE_FILE)
+    create_db_and_tables()
+
+    # Activities dated in the future so every sync has work to do
+    activities = generate_activities(activity_count, start=datetime.utcnow() + timedelta(days=1))
+
+    with MockStravaServer(activities, latency_ms=latency_ms, athlete_scoped_ids=True) as server:
+        strava_service.STRAVA_API_URL = server.api_url
+        strava_service.STRAVA_TOKEN_URL = server.token_url
+        print(f"{syncs} syncs at concurrency {concurrency}, mock Strava latency {latency_ms:.0f} ms")
+
+        threadpool_tokens = seed_users(syncs, first_athlete_id=1)
+        report("threadpool", asyncio.run(drive("/bench/sync-threadpool", threadpool_tokens, concurrency)))
+
+        async_tokens = seed_users(syncs, first_athlete_id=syncs + 1)
+        report("async", asyncio.run(drive("/bench/sync-async", async_tokens, concurrency)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test concurrent activity syncs.")
+    parser.add_argument("--syncs", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=250.0)
+    parser.add_argument("--activities", type=int, default=20)
+    args = parser.parse_args()
+
+    main(args.syncs, args.concurrency, args.latency_ms, args.activities)
@@ -0,0 +1,178 @@
+"""
+Benchmark award_badges_and_titles against the previous per-sync implementation.
+
+Usage: python -m backend.scripts.bench_awards [--badges 300] [--titles 60] [--iterations 500]
+"""
+from datetime import datetime, timedelta
+import argparse
+import json
+import random
+import time
+from typing import List, Tuple
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session, create_engine, select
+
+from backend.models import Badge, BadgeCategory, Challenge, Title, TitleRarity, User, UserBadge, UserChallenge, UserTitle
+from backend.services.awards import award_badges_and_titles
+from backend.services.award_rules import invalidate_rule_index
+
+TIERS = ["Sprint", "Marathon", "Ultra", "Trailblazer"]
+
+
+def legacy_award_badges_and_titles(user: User, user_challenges: List[UserChallenge], session: Session) -> Tuple[List[str], List[str]]:
+    """
+    The query-and-parse-per-sync implementation, kept here for comparison.
+    """
+    new_badges, new_titles = [], []
+    user_badge_names = {b.name for b in session.exec(select(Badge).join(UserBadge).where(UserBadge.user_id == user.id)).all()}
+    user_title_names = {t.name for t in session.exec(select(Title).join(UserTitle).where(UserTitle.user_id == user.id)).all()}
+
+    for badge in session.exec(select(Badge).where(Badge.category == BadgeCategory.DISTANCE)).all():
+        if badge.name not in user_badge_names:
+            requirements = json.loads(badge.requirements)
+            if requirements["type"] == "distance" and user.total_distance_km >= requirements["distance_required"]:
+                session.add(UserBadge(user_id=user.id, badge_id=badge.id))
+                new_badges.append(badge.name)
+
+    for badge in session.exec(select(Badge).where(Badge.category == BadgeCategory.STREAK)).all():
+        if badge.name not in user_badge_names:
+            requirements = json.loads(badge.requirements)
+            if requirements["type"] == "streak":
+                max_streak = max((uc.streak for uc in user_challenges), default=0)
+                if max_streak >= requirements["threshold"]:
+                    session.add(UserBadge(user_id=user.id, badge_id=badge.id))
+                    new_badges.append(badge.name)
+
+    for badge in session.exec(select(Badge).where(Badge.category == BadgeCategory.CHALLENGE)).all():
+        if badge.name not in user_badge_names:
+            requirements = json.loads(badge.requirements)
+            if requirements["type"] == "challenge_tier":
+                if any(uc.completed and uc.challenge and uc.challenge.tier == requirements["tier"] for uc in user_challenges):
+                    session.add(UserBadge(user_id=user.id, badge_id=badge.id))
+                    new_badges.append(badge.name)
+
+    for title in session.exec(select(Title)).all():
+        if title.name not in user_title_names:
+            requirements = json.loads(title.requirements)
+            should_award = False
+            if requirements["type"] == "challenge_completion":
+                should_award = sum(1 for uc in user_challenges if uc.completed) >= requirements["count"]
+            elif requirements["type"] == "all_tiers_completed":
+                tiers_completed = {uc.challenge.tier for uc in user_challenges if uc.completed and uc.challenge}
+                should_award = all(tier in tiers_completed for tier in requirements["tiers"])
+            if should_award:
+                session.add(UserTitle(user_id=user.id, title_id=title.id, is_active=False))
+                new_titles.append(title.name)
+
+    return new_badges, new_titles
+
+
+def seed_catalog(session: Session, badge_count: int, title_count: int, rng: random.Random) -> None:
+    categories = [
+        (BadgeCategory.DISTANCE, lambda i: {"type": "distance", "distance_required": rng.randint(1, 5000)}),
+        (BadgeCategory.STREAK, lambda i: {"type": "streak", "threshold": rng.randint(1, 365)}),
+        (BadgeCategory.CHALLENGE, lambda i: {"type": "challenge_tier", "tier": rng.choice(TIERS)}),
+    ]
+    for i in range(badge_count):
+        category, requirements = categories[i % len(categories)]
+        session.add(Badge(
+            name=f"Badge {i}",
+            description="Benchmark badge",
+            category=category,
+            requirements=json.dumps(requirements(i)),
+        ))
+
+    for i in range(title_count):
+        if i % 2:
+            requirements = {"type": "challenge_completion", "count": rng.randint(1, 50)}
+        else:
+            requirements = {"type": "all_tiers_completed", "tiers": rng.sample(TIERS, rng.randint(1, len(TIERS)))}
+        session.add(Title(
+            name=f"Title {i}",
+            description="Benchmark title",
+            requirements=json.dumps(requirements),
+            rarity=TitleRarity.COMMON,
+        ))
+
+
+def seed_user(session: Session, challenge_count: int, rng: random.Random) -> User:
+    user = User(strava_athlete_id=1, username="bench", total_distance_km=1200.0)
+    session.add(user)
+    session.flush()
+
+    now = datetime.utcnow()
+    for i in range(challenge_count):
+        challenge = Challenge(
+            name=f"Challenge {i}",
+            tier=TIERS[i % len(TIERS)],
+            type="solo",
+            sport="running",
+            distance_target_km=50,
+            start_date=now - timedelta(days=30),
+            end_date=now + timedelta(days=30),
+        )
+        session.add(challenge)
+        session.flush()
+        session.add(UserChallenge(
+            user_id=user.id,
+            challenge_id=challenge.id,
+            distance_completed_km=rng.uniform(0, 200),
+            streak=rng.randint(0, 60),
+            completed=bool(i % 3),
+        ))
+    session.commit()
+    return user
+
+
+def run(label: str, award, user: User, user_challenges: List[UserChallenge], session: Session, iterations: int) -> float:
+    # Discard pending awards after each call so every iteration does the full evaluation
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with session.no_autoflush:
+            award(user, user_challenges, session)
+        for pending in list(session.new):
+            session.expunge(pending)
+    elapsed = time.perf_counter() - start
+    rate = iterations / elapsed
+    print(f"{label:<10} {iterations} evaluations in {elapsed:.3f}s -> {rate:,.0f} awards/sec")
+    return rate
+
+
+def main(badge_count: int, title_count: int, challenge_count: int, iterations: int, seed: int) -> None:
+    rng = random.Random(seed)
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        seed_catalog(session, badge_count, title_count, rng)
+        user = seed_user(session, challenge_count, rng)
+        user_challenges = session.exec(select(UserChallenge).where(UserChallenge.user_id == user.id)).all()
+
+        print(f"Catalog: {badge_count} badges, {title_count} titles; user with {challenge_count} challenges")
+        invalidate_rule_index()
+
+        print("\n--- Nothing earned yet (every eligible award is new) ---")
+        before = run("legacy", legacy_award_badges_and_titles, user, user_challenges, session, iterations)
+        after = run("indexed", award_badges_and_titles, user, user_challenges, session, iterations)
+        print(f"Speedup: {after / before:.1f}x")
+
+        # Persist the awards so later syncs are the common "nothing new" case
+        award_badges_and_titles(user, user_challenges, session)
+        session.commit()
+
+        print("\n--- Steady state (eligible awards already earned) ---")
+        before = run("legacy", legacy_award_badges_and_titles, user, user_challenges, session, iterations)
+        after = run("indexed", award_badges_and_titles, user, user_challenges, session, iterations)
+        print(f"Speedup: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark badge/title awarding.")
+    parser.add_argument("--badges", type=int, default=300)
+    parser.add_argument("--titles", type=int, default=60)
+    parser.add_argument("--challenges", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    main(args.badges, args.titles, args.challenges, args.iterations, args.seed)
@@ -0,0 +1,142 @@
+"""
+Before/after benchmark of GET /challenges/ with and without the catalog
+snapshot (CHALLENGE_CATALOG_SNAPSHOT in services/challenge_catalog.py).
+
+Seeds a catalog across tiers, types and sports, then sends first pages with
+a random filter combination (and a share of second pages) at a fixed
+concurrency, and reports requests/second and latency for each variant.
+
+Each variant runs in its own process, since the setting is read at import.
+
+Usage: python -m backend.scripts.bench_challenge_catalog [--requests 5000] [--concurrency 50] [--challenges 500]
+"""
+import os
+import tempfile
+
+# A variant run is a child process configured through the environment; these
+# must be set before backend modules are imported
+BENCH_DATABASE_FILE = os.path.join(tempfile.gettempdir(), "bench_challenge_catalog.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DATABASE_FILE}"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("SQLITE_MODE", "production")
+
+from datetime import datetime, timedelta
+from typing import Dict, List
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+
+TIERS = ("Sprint", "Marathon", "Ultra")
+TYPES = ("solo", "team")
+SPORTS = ("running", "cycling", "walking")
+
+
+def run_variant(requests: int, concurrency: int, challenge_count: int) -> Dict[str, float]:
+    import httpx
+    from sqlalchemy import insert
+
+    from backend.main import app
+    from backend.db import async_engine, async_read_engine, create_db_and_tables, engine
+    from backend.models import Challenge
+    from backend.services.challenge_catalog import CHALLENGE_CATALOG_SNAPSHOT
+
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(BENCH_DATABASE_FILE + suffix):
+            os.remove(BENCH_DATABASE_FILE + suffix)
+    create_db_and_tables()
+
+    rng = random.Random(42)
+    start, end = datetime(2025, 1, 1), datetime.utcnow() + timedelta(days=30)
+    with engine.begin() as connection:
+        connection.execute(insert(Challenge), [
+            {"name": f"Challenge {i}", "tier": rng.choice(TIERS), "type": rng.choice(TYPES), "sport": rng.choice(SPORTS),
+             "distance_target_km": rng.choice((5, 10, 21.1, 42.2, 100)), "start_date": start,
+             "end_date": end, "active": rng.random() < 0.9, "created_at": start + timedelta(hours=i)}
+            for i in range(challenge_count)
+        ])
+
+    def params() -> dict:
+        filters = {"tier": rng.choice((None, *TIERS)), "type": rng.choice((None, *TYPES)), "sport": rng.choice((None, *SPORTS))}
+        return {name: value for name, value in filters.items() if value}
+
+    latencies: List[float] = []
+    errors = 0
+
+    async def drive() -> float:
+        nonlocal errors
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            queue = list(range(requests))
+
+            async def worker() -> None:
+                nonlocal errors
+                while queue:
+                    queue.pop()
+                    request_params = params()
+                    started = time.perf_counter()
+                    response = await client.get("/challenges/", params=request_params)
+                    # One in five follows the cursor to the second page
+                    cursor = response.headers.get("X-Next-Cursor")
+                    if response.status_code == 200 and cursor and rng.random() < 0.2:
+                        response = await client.get("/challenges/", params={**request_params, "cursor": cursor})
+                    if response.status_code == 200:
+                        latencies.append(time.perf_counter() - started)
+                    else:
+                        errors += 1
+
+            await client.get("/challenges/")  # warm up pools and, with the snapshot, build it
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+        await async_engine.dispose()
+        await async_read_engine.dispose()
+        return elapsed
+
+    elapsed = asyncio.run(drive())
+    latencies.sort()
+
+    def pick(q: float) -> float:
+        return latencies[min(int(len(latencies) * q), len(latencies) - 1)] * 1000 if latencies else 0.0
+
+    return {
+        "variant": "snapshot" if CHALLENGE_CATALOG_SNAPSHOT else "database",
+        "requests_per_sec": requests / elapsed,
+        "p50_ms": pick(0.50),
+        "p99_ms": pick(0.99),
+        "errors": errors,
+    }
+
+
+def main(requests: int, concurrency: int, challenges: int) -> None:
+    print(f"{requests} GET /challenges/ at concurrency {concurrency}, {challenges} challenges\n")
+    print(f"{'variant':<9} {'req/s':>8} {'p50':>9} {'p99':>9} {'errors':>7}")
+    results = {}
+    for enabled in ("0", "1"):
+        env = {**os.environ, "CHALLENGE_CATALOG_SNAPSHOT": enabled}
+        command = [sys.executable, "-m", "backend.scripts.bench_challenge_catalog", "--child",
+                   "--requests", str(requests), "--concurrency", str(concurrency), "--challenges", str(challenges)]
+        output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        results[result["variant"]] = result
+        print(f"{result['variant']:<9} {result['requests_per_sec']:>8.1f} {result['p50_ms']:>7.2f}ms "
+              f"{result['p99_ms']:>7.2f}ms {result['errors']:>7}")
+    speedup = results["snapshot"]["requests_per_sec"] / results["database"]["requests_per_sec"]
+    print(f"\nSnapshot: {speedup:.1f}x the database path's throughput")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark GET /challenges/ with and without the catalog snapshot.")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--challenges", type=int, default=500)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_variant(args.requests, args.concurrency, args.challenges)))
+    else:
+        main(args.requests, args.concurrency, args.challenges)
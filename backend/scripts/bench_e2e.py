@@ -0,0 +1,330 @@
+"""
+End-to-end benchmark suite: the real app against a local mock Strava.
+
+Seeds a synthetic population (users, challenges, participations, badges,
+titles), starts a mock Strava with configurable latency and page size, and
+drives the public routes at a fixed concurrency:
+
+  auth_callback      GET  /auth/strava/callback (token exchange + user upsert)
+  activities_sync    POST /activities/sync, then polls the job until it finishes;
+                     latency is enqueue to finished, and includes the worker's
+                     Strava fetch and DB work
+  users_me           GET  /users/me
+  challenges_list    GET  /challenges/
+  challenges_my      GET  /challenges/my
+  challenge_join     POST /challenges/{id}/join
+  leaderboard        GET  /challenges/{id}/leaderboard
+
+Prints one JSON document with p50/p95/p99 latency, throughput, errors and
+queries per operation for each scenario. With --baseline, compares against
+a previous run and exits 1 if any scenario's p95 or queries per operation
+grew by more than --tolerance.
+
+Usage: python -m backend.scripts.bench_e2e [--users 500] [--challenges 20] [--requests 500] [--concurrency 50]
+       [--strava-latency-ms 50] [--strava-page-size 200] [--activities 60] [--scenarios users_me ...]
+       [--output results.json] [--baseline previous.json] [--tolerance 0.2]
+"""
+import os
+import tempfile
+
+# Throwaway database and secret; must be set before backend modules are imported
+BENCH_DATABASE_FILE = os.path.join(tempfile.gettempdir(), "bench_e2e.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DATABASE_FILE}"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("SQLITE_MODE", "production")
+os.environ.setdefault("DB_POOL_SIZE", "40")
+os.environ.setdefault("DB_MAX_OVERFLOW", "20")
+
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Awaitable, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+import httpx
+from sqlalchemy import event
+from sqlmodel import Session
+
+from backend.main import app
+from backend.db import SQLITE_MODE, async_engine, async_read_engine, create_db_and_tables, engine, read_engine
+from backend.models import Badge, BadgeCategory, Challenge, Title, TitleRarity, User, UserChallenge
+from backend.services import strava_service
+from backend.services.strava_async import close_async_client
+from backend.services.sync_jobs import sync_worker_pool
+from backend.utils.security import create_access_token
+from backend.scripts.mock_strava import MockStravaServer, generate_activities
+
+SCENARIOS = ("auth_callback", "activities_sync", "users_me", "challenges_list", "challenges_my", "challenge_join", "leaderboard")
+TIERS = ("Sprint", "Marathon", "Ultra")
+SYNC_POLL_SECONDS = 0.02
+
+_queries = 0
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    global _queries
+    _queries += 1
+
+
+for counted_engine in {engine, read_engine, async_engine.sync_engine, async_read_engine.sync_engine}:
+    event.listen(counted_engine, "before_cursor_execute", _count_query)
+
+
+# --- Population ---
+def seed(user_count: int, challenge_count: int, joins_per_user: int, rng: random.Random) -> dict:
+    """
+    Users with valid Strava tokens, a challenge catalog across tiers, random
+    participations, and badge/title catalogs covering every rule type.
+    """
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        challenges = [
+            Challenge(name=f"{TIERS[i % 3]} Challenge {i}", tier=TIERS[i % 3], type="solo", sport="running",
+                      distance_target_km=(25, 100, 250)[i % 3], start_date=now - timedelta(days=30),
+                      end_date=now + timedelta(days=30 + i))
+            for i in range(challenge_count)
+        ]
+        users = [
+            User(strava_athlete_id=i + 1, username=f"runner{i}", access_token=f"token-{i}", refresh_token=f"refresh-{i}",
+                 token_expires_at=now + timedelta(hours=6), last_sync_at=now - timedelta(days=30),
+                 total_distance_km=round(rng.uniform(0, 500), 1))
+            for i in range(user_count)
+        ]
+        badges = [
+            *(Badge(name=f"{km} km", description="", category=BadgeCategory.DISTANCE,
+                    requirements=json.dumps({"type": "distance", "distance_required": km})) for km in (10, 50, 100, 250)),
+            *(Badge(name=f"{days}-day streak", description="", category=BadgeCategory.STREAK,
+                    requirements=json.dumps({"type": "streak", "threshold": days})) for days in (3, 7, 30)),
+            *(Badge(name=f"{tier} finisher", description="", category=BadgeCategory.CHALLENGE,
+                    requirements=json.dumps({"type": "challenge_tier", "tier": tier})) for tier in TIERS),
+        ]
+        titles = [
+            *(Title(name=f"{n}x finisher", description="", rarity=TitleRarity.COMMON,
+                    requirements=json.dumps({"type": "challenge_completion", "count": n})) for n in (1, 5, 10)),
+            Title(name="Completionist", description="", rarity=TitleRarity.LEGENDARY,
+                  requirements=json.dumps({"type": "all_tiers_completed", "tiers": list(TIERS)})),
+        ]
+        session.add_all([*challenges, *users, *badges, *titles])
+        session.commit()
+
+        challenge_ids = [challenge.id for challenge in challenges]
+        for user in users:
+            for challenge_id in rng.sample(challenge_ids, min(joins_per_user, len(challenge_ids))):
+                session.add(UserChallenge(user_id=user.id, challenge_id=challenge_id,
+                                          distance_completed_km=round(rng.uniform(0, 50), 1)))
+        session.commit()
+
+        return {
+            "tokens": [create_access_token({"user_id": user.id}) for user in users],
+            "challenge_ids": challenge_ids,
+            "athlete_ids": [user.strava_athlete_id for user in users],
+        }
+
+
+# --- Scenarios ---
+def scenario_operations(population: dict, rng: random.Random) -> Dict[str, Callable[[httpx.AsyncClient, int], Awaitable[bool]]]:
+    """
+    One coroutine per scenario, taking the client and the operation number
+    and returning whether the operation succeeded.
+    """
+    tokens = population["tokens"]
+    challenge_ids = population["challenge_ids"]
+    new_athlete_ids = count(start=max(population["athlete_ids"]) + 1)
+
+    def auth(i: int) -> dict:
+        return {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+
+    async def auth_callback(client: httpx.AsyncClient, i: int) -> bool:
+        # Alternate returning athletes (update) and first logins (insert)
+        athlete_id = population["athlete_ids"][i % len(tokens)] if i % 2 else next(new_athlete_ids)
+        response = await client.get("/auth/strava/callback", params={"code": str(athlete_id)})
+        return response.status_code == 200
+
+    async def activities_sync(client: httpx.AsyncClient, i: int) -> bool:
+        response = await client.post("/activities/sync", headers=auth(i))
+        if response.status_code != 202:
+            return False
+        status_url = response.json()["status_url"]
+        while True:
+            job = (await client.get(status_url, headers=auth(i))).json()
+            if job["status"] in ("succeeded", "failed"):
+                return job["status"] == "succeeded"
+            await asyncio.sleep(SYNC_POLL_SECONDS)
+
+    def get(path: Callable[[int], str], authenticated: bool = True):
+        async def operation(client: httpx.AsyncClient, i: int) -> bool:
+            response = await client.get(path(i), headers=auth(i) if authenticated else None)
+            return response.status_code == 200
+        return operation
+
+    async def challenge_join(client: httpx.AsyncClient, i: int) -> bool:
+        response = await client.post(f"/challenges/{rng.choice(challenge_ids)}/join", headers=auth(i))
+        # Joining twice is a 400 "Already joined"; both are served normally
+        return response.status_code in (200, 400)
+
+    return {
+        "auth_callback": auth_callback,
+        "activities_sync": activities_sync,
+        "users_me": get(lambda i: "/users/me"),
+        "challenges_list": get(lambda i: "/challenges/", authenticated=False),
+        "challenges_my": get(lambda i: "/challenges/my"),
+        "challenge_join": challenge_join,
+        "leaderboard": get(lambda i: f"/challenges/{challenge_ids[i % len(challenge_ids)]}/leaderboard", authenticated=False),
+    }
+
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    return sorted_samples[min(int(len(sorted_samples) * q), len(sorted_samples) - 1)] * 1000
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    operation: Callable[[httpx.AsyncClient, int], Awaitable[bool]],
+    requests: int,
+    concurrency: int
+) -> Dict[str, float]:
+    global _queries
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                ok = await operation(client, i)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    _queries = 0
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "errors": errors,
+        "queries_per_request": round(_queries / requests, 2),
+    }
+
+
+async def run_suite(scenarios: List[str], population: dict, requests: int, concurrency: int, seed_value: int) -> Dict[str, dict]:
+    # The suite drives the app in-process, so start the sync workers its lifespan would
+    await sync_worker_pool.start()
+    operations = scenario_operations(population, random.Random(seed_value))
+    results = {}
+    try:
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name in scenarios:
+                results[name] = await run_scenario(client, operations[name], requests, concurrency)
+                print(f"{name:<16} {results[name]['throughput_rps']:>8.1f} req/s  p95 {results[name]['p95_ms']:>8.1f} ms  "
+                      f"{results[name]['queries_per_request']:>6.1f} queries  {results[name]['errors']} errors", file=sys.stderr)
+    finally:
+        await sync_worker_pool.stop()
+        await close_async_client()
+        await async_engine.dispose()
+        await async_read_engine.dispose()
+    return results
+
+
+# --- Regression gate ---
+def regressions(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """
+    Scenarios whose p95 latency or queries per request grew by more than `tolerance`.
+    """
+    found = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in ("p95_ms", "queries_per_request"):
+            if previous[metric] and current[metric] > previous[metric] * (1 + tolerance):
+                found.append(f"{name}.{metric}: {previous[metric]} -> {current[metric]}")
+        if current["errors"] > previous["errors"]:
+            found.append(f"{name}.errors: {previous['errors']} -> {current['errors']}")
+    return found
+
+
+def main(args: argparse.Namespace) -> int:
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(BENCH_DATABASE_FILE + suffix):
+            os.remove(BENCH_DATABASE_FILE + suffix)
+    create_db_and_tables()
+    rng = random.Random(args.seed)
+    population = seed(args.users, args.challenges, args.joins_per_user, rng)
+
+    activities = generate_activities(args.activities, seed=args.seed, start=datetime.utcnow() - timedelta(days=20))
+    with MockStravaServer(activities, latency_ms=args.strava_latency_ms, max_page_size=args.strava_page_size,
+                          athlete_scoped_ids=True) as strava:
+        strava_service.STRAVA_API_URL = strava.api_url
+        strava_service.STRAVA_TOKEN_URL = strava.token_url
+        results = asyncio.run(run_suite(args.scenarios, population, args.requests, args.concurrency, args.seed))
+        strava_requests = strava.requests
+
+    report = {
+        "config": {
+            "users": args.users,
+            "challenges": args.challenges,
+            "joins_per_user": args.joins_per_user,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "strava_latency_ms": args.strava_latency_ms,
+            "strava_page_size": args.strava_page_size,
+            "activities_per_athlete": args.activities,
+            "seed": args.seed,
+            "sqlite_mode": SQLITE_MODE,
+            "python": platform.python_version(),
+        },
+        "strava_requests": strava_requests,
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    print(output)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            found = regressions(results, json.load(file)["scenarios"], args.tolerance)
+        for line in found:
+            print(f"❌ regression: {line}", file=sys.stderr)
+        if found:
+            return 1
+        print(f"✅ no regressions beyond {args.tolerance:.0%} of {args.baseline}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the app against a mock Strava.")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--challenges", type=int, default=20)
+    parser.add_argument("--joins-per-user", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=500, help="Operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--strava-latency-ms", type=float, default=50.0)
+    parser.add_argument("--strava-page-size", type=int, default=200, help="Largest page the mock Strava serves")
+    parser.add_argument("--activities", type=int, default=60, help="Activities each athlete has on the mock Strava")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--baseline", help="Previous JSON report to gate against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative growth before failing")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,89 @@
+"""
+Benchmark the in-memory XP leaderboard at scale: build time, rank / top-N /
+keyset page / around-me latency percentiles and update throughput. With
+--sql, also time the equivalent ORDER BY / COUNT queries on an SQLite copy
+of the scores.
+
+Usage: python -m backend.scripts.bench_leaderboard [--users 1000000] [--lookups 100000] [--sql]
+"""
+import argparse
+import random
+import sqlite3
+import time
+from typing import Callable, List
+
+from backend.services.ranking import RankIndex
+
+
+def percentiles(samples: List[float]) -> str:
+    samples.sort()
+    pick = lambda q: samples[min(int(len(samples) * q), len(samples) - 1)] * 1e6
+    return f"p50 {pick(0.50):7.1f} µs   p99 {pick(0.99):7.1f} µs   max {samples[-1] * 1e6:8.1f} µs"
+
+
+def timed(label: str, operation: Callable[[int], object], arguments: List[int]) -> None:
+    samples = []
+    for argument in arguments:
+        start = time.perf_counter()
+        operation(argument)
+        samples.append(time.perf_counter() - start)
+    print(f"{label:<22} {percentiles(samples)}")
+
+
+def bench_sql(scores: List[int], member_ids: List[int], lookups: int) -> None:
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE user (id INTEGER PRIMARY KEY, xp INTEGER NOT NULL)")
+    connection.executemany("INSERT INTO user (id, xp) VALUES (?, ?)", enumerate(scores))
+
+    rank_sql = "SELECT COUNT(*) + 1 FROM user WHERE xp > ? OR (xp = ? AND id < ?)"
+    top_sql = "SELECT id, xp FROM user ORDER BY xp DESC, id LIMIT 10"
+
+    def rank(member: int) -> None:
+        xp = scores[member]
+        connection.execute(rank_sql, (xp, xp, member)).fetchone()
+
+    for label in ("no index", "index on (xp, id)"):
+        if label != "no index":
+            connection.execute("CREATE INDEX ix_user_xp ON user (xp, id)")
+        print(f"\n--- SQLite, {label} ---")
+        timed("rank (COUNT)", rank, member_ids[: max(lookups // 1000, 20)])
+        timed("top 10 (ORDER BY)", lambda _: connection.execute(top_sql).fetchall(), member_ids[:20])
+
+
+def main(user_count: int, lookups: int, with_sql: bool, seed: int) -> None:
+    rng = random.Random(seed)
+    # Long-tailed XP: most users low, a few very high
+    scores = [int(rng.paretovariate(1.2) * 100) for _ in range(user_count)]
+
+    start = time.perf_counter()
+    index = RankIndex.from_scores(enumerate(scores))
+    print(f"Built index of {len(index):,} users in {time.perf_counter() - start:.2f}s")
+
+    member_ids = [rng.randrange(user_count) for _ in range(lookups)]
+    print(f"\n--- In-memory RankIndex, {lookups:,} lookups ---")
+    timed("rank", index.rank, member_ids)
+    timed("top 10", lambda _: index.top(10), member_ids[: lookups // 10])
+    timed("top 10 at offset 500k", lambda _: index.top(10, offset=user_count // 2), member_ids[: lookups // 10])
+    timed("keyset page (after)", lambda member: index.after(scores[member], member, 20), member_ids[: lookups // 10])
+    timed("around me (k=5)", lambda member: index.around(member, 5), member_ids[: lookups // 10])
+
+    updates = [(member, scores[member] + rng.randint(1, 500)) for member in member_ids]
+    start = time.perf_counter()
+    for member, score in updates:
+        index.update(member, score)
+    elapsed = time.perf_counter() - start
+    print(f"{'update':<22} {len(updates) / elapsed:,.0f} updates/sec ({elapsed / len(updates) * 1e6:.1f} µs each)")
+
+    if with_sql:
+        bench_sql(scores, member_ids, lookups)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the XP leaderboard index.")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--sql", action="store_true", help="Also time the SQL equivalents")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    main(args.users, args.lookups, args.sql, args.seed)
@@ -0,0 +1,164 @@
+"""
+Mixed read/write benchmark of the SQLite modes (SQLITE_MODE in backend/db.py).
+
+For each mode, concurrent readers call GET /users/me while concurrent
+writers run activity syncs (the DB half of a sync job: store new activities,
+advance challenges, award, commit) through the app for a fixed time. Reports
+throughput, latency and "database is locked" timeouts per mode. The
+dashboard cache is disabled so every read reaches the database.
+
+Each mode runs in its own process, since the engine is configured at import.
+
+Usage: python -m backend.scripts.bench_sqlite_modes [--seconds 10] [--readers 16] [--writers 4]
+       [--busy-timeout-ms 1000] [--modes default production]
+"""
+import os
+import tempfile
+
+# A mode run is a child process configured through the environment; these
+# must be set before backend modules are imported
+BENCH_DATABASE_FILE = os.path.join(tempfile.gettempdir(), "bench_sqlite_modes.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DATABASE_FILE}"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ["USER_DASHBOARD_CACHE_SIZE"] = "0"
+
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Dict, List
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+
+
+def run_mode(seconds: float, readers: int, writers: int, user_count: int) -> Dict[str, float]:
+    import httpx
+    from fastapi import Depends
+    from fastapi.responses import JSONResponse
+    from sqlalchemy.exc import OperationalError
+    from sqlmodel import Session
+
+    from backend.main import app
+    from backend.db import SQLITE_MODE, create_db_and_tables, engine, get_session
+    from backend.models import Challenge, User, UserChallenge
+    from backend.services.sync import apply_activity_sync
+    from backend.utils.dependencies import get_current_user
+    from backend.utils.security import create_access_token
+    from backend.scripts.mock_strava import generate_activities
+
+    activity_ids = count(start=1)
+    activity_ids_lock = threading.Lock()
+
+    @app.exception_handler(OperationalError)
+    async def _locked(request, exc: OperationalError):
+        locked = "locked" in str(exc.orig)
+        return JSONResponse({"detail": "locked" if locked else "error"}, status_code=503 if locked else 500)
+
+    @app.post("/bench/sync")
+    def bench_sync(current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+        # Fresh Strava ids every call so each sync writes new rows
+        batch = generate_activities(10, seed=random.randrange(1 << 30), start=datetime.utcnow() - timedelta(days=5))
+        with activity_ids_lock:
+            for activity in batch:
+                activity["id"] = next(activity_ids)
+        return apply_activity_sync(current_user, batch, session)
+
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(BENCH_DATABASE_FILE + suffix):
+            os.remove(BENCH_DATABASE_FILE + suffix)
+    create_db_and_tables()
+
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        challenges = [
+            Challenge(name=f"{tier} Challenge", tier=tier, type="solo", sport="running",
+                      distance_target_km=50, start_date=now - timedelta(days=30), end_date=now + timedelta(days=30))
+            for tier in ("Sprint", "Marathon", "Ultra")
+        ]
+        users = [User(strava_athlete_id=i + 1, username=f"runner{i}") for i in range(user_count)]
+        session.add_all([*challenges, *users])
+        session.commit()
+        session.add_all(UserChallenge(user_id=user.id, challenge_id=challenge.id) for user in users for challenge in challenges)
+        session.commit()
+        tokens = [create_access_token({"user_id": user.id}) for user in users]
+
+    stats = {"reads": [], "writes": [], "locked": 0, "errors": 0}
+
+    async def drive() -> float:
+        deadline = time.perf_counter() + seconds
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            async def loop(method: str, path: str, samples: List[float]) -> None:
+                while time.perf_counter() < deadline:
+                    headers = {"Authorization": f"Bearer {random.choice(tokens)}"}
+                    start = time.perf_counter()
+                    response = await client.request(method, path, headers=headers)
+                    if response.status_code == 200:
+                        samples.append(time.perf_counter() - start)
+                    elif response.status_code == 503:
+                        stats["locked"] += 1
+                    else:
+                        stats["errors"] += 1
+
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(loop("GET", "/users/me", stats["reads"]) for _ in range(readers)),
+                *(loop("POST", "/bench/sync", stats["writes"]) for _ in range(writers)),
+            )
+            return time.perf_counter() - start
+
+    elapsed = asyncio.run(drive())
+
+    def pick(samples: List[float], q: float) -> float:
+        samples = sorted(samples)
+        return samples[min(int(len(samples) * q), len(samples) - 1)] * 1000 if samples else 0.0
+
+    return {
+        "mode": SQLITE_MODE,
+        "elapsed": elapsed,
+        "reads_per_sec": len(stats["reads"]) / elapsed,
+        "writes_per_sec": len(stats["writes"]) / elapsed,
+        "read_p50_ms": pick(stats["reads"], 0.50),
+        "read_p99_ms": pick(stats["reads"], 0.99),
+        "write_p50_ms": pick(stats["writes"], 0.50),
+        "write_p99_ms": pick(stats["writes"], 0.99),
+        "locked": stats["locked"],
+        "errors": stats["errors"],
+    }
+
+
+def main(modes: List[str], seconds: float, readers: int, writers: int, users: int, busy_timeout_ms: int) -> None:
+    print(f"{readers} readers (/users/me) + {writers} writers (sync) for {seconds:.0f}s per mode, "
+          f"{users} users, busy timeout {busy_timeout_ms} ms\n")
+    print(f"{'mode':<11} {'reads/s':>8} {'read p50':>9} {'read p99':>9} {'syncs/s':>8} "
+          f"{'sync p50':>9} {'sync p99':>9} {'locked':>7} {'errors':>7}")
+    for mode in modes:
+        env = {**os.environ, "SQLITE_MODE": mode, "SQLITE_BUSY_TIMEOUT_MS": str(busy_timeout_ms)}
+        command = [sys.executable, "-m", "backend.scripts.bench_sqlite_modes", "--child",
+                   "--seconds", str(seconds), "--readers", str(readers), "--writers", str(writers), "--users", str(users)]
+        output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{result['mode']:<11} {result['reads_per_sec']:>8.1f} {result['read_p50_ms']:>7.1f}ms "
+              f"{result['read_p99_ms']:>7.1f}ms {result['writes_per_sec']:>8.1f} {result['write_p50_ms']:>7.1f}ms "
+              f"{result['write_p99_ms']:>7.1f}ms {result['locked']:>7} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark SQLite modes under concurrent reads and syncs.")
+    parser.add_argument("--modes", nargs="+", default=["default", "production"])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--busy-timeout-ms", type=int, default=1000)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args.seconds, args.readers, args.writers, args.users)))
+    else:
+        main(args.modes, args.seconds, args.readers, args.writers, args.users, args.busy_timeout_ms)
@@ -0,0 +1,79 @@
+"""
+Measure Strava activity fetching against the local mock Strava server.
+
+Compares one fresh connection per request (plain requests.get) with the
+pooled, paginated client in strava_service, reporting pages/second and
+how many TCP connections the server saw.
+
+Usage: python -m backend.scripts.bench_strava_fetch [--activities 4000] [--rounds 20] [--threads 4]
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import time
+import requests
+
+from backend.models.user import User
+from backend.services import strava_service
+from backend.services.strava_service import STRAVA_PAGE_SIZE, STRAVA_TIMEOUT, iter_activity_pages
+from backend.scripts.mock_strava import MockStravaServer, generate_activities
+
+
+def fetch_unpooled(user: User, api_url: str, per_page: int) -> int:
+    """
+    Walk every page with a new connection per request.
+    """
+    pages = 0
+    page = 1
+    while True:
+        response = requests.get(
+            f"{api_url}/athlete/activities",
+            headers={"Authorization": f"Bearer {user.access_token}"},
+            params={"per_page": per_page, "page": page},
+            timeout=STRAVA_TIMEOUT,
+        )
+        activities = response.json()
+        if activities:
+            pages += 1
+        if len(activities) < per_page:
+            return pages
+        page += 1
+
+
+def fetch_pooled(user: User, api_url: str, per_page: int) -> int:
+    return sum(1 for _ in iter_activity_pages(user, per_page=per_page))
+
+
+def run(label: str, fetch, server: MockStravaServer, rounds: int, threads: int, per_page: int) -> None:
+    users = [User(strava_athlete_id=i, access_token=f"token-{i}") for i in range(rounds)]
+    server.reset_counters()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        pages = sum(pool.map(lambda user: fetch(user, server.api_url, per_page), users))
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{label:<10} {pages} pages in {elapsed:.3f}s -> {pages / elapsed:,.0f} pages/sec, "
+        f"{server.requests} requests over {server.connections} connections"
+    )
+
+
+def main(activity_count: int, rounds: int, threads: int, per_page: int, latency_ms: float) -> None:
+    with MockStravaServer(generate_activities(activity_count), latency_ms=latency_ms) as server:
+        strava_service.STRAVA_API_URL = server.api_url
+        strava_service.STRAVA_TOKEN_URL = server.token_url
+        print(f"{activity_count} activities, {per_page} per page, {rounds} full syncs on {threads} threads")
+        run("unpooled", fetch_unpooled, server, rounds, threads, per_page)
+        run("pooled", fetch_pooled, server, rounds, threads, per_page)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Strava activity pagination and connection reuse.")
+    parser.add_argument("--activities", type=int, default=4000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--per-page", type=int, default=STRAVA_PAGE_SIZE)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    main(args.activities, args.rounds, args.threads, args.per_page, args.latency_ms)
@@ -0,0 +1,122 @@
+"""
+Count the SQL queries each authenticated GET runs, with cold and warm auth caches.
+
+Fails (exit code 1) unless authentication itself costs at most one query on
+a cold cache and none on a warm one, and loading the lean current user is
+a single query.
+
+Usage: python -m backend.scripts.check_auth_queries
+"""
+import os
+import tempfile
+
+# Throwaway database and secret; must be set before backend modules are imported
+CHECK_DATABASE_FILE = os.path.join(tempfile.gettempdir(), "check_auth_queries.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{CHECK_DATABASE_FILE}"
+os.environ.setdefault("SECRET_KEY", "check-secret")
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import sys
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session
+
+from backend.main import app
+from backend.db import async_engine, async_read_engine, create_db_and_tables, engine, read_engine
+from backend.models import Badge, BadgeCategory, Challenge, SyncJob, Title, TitleRarity, User, UserBadge, UserChallenge, UserTitle
+from backend.utils import dependencies, security
+from backend.utils.dependencies import get_current_user, get_current_user_id
+from backend.utils.security import create_access_token
+
+_query_count = 0
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    global _query_count
+    _query_count += 1
+
+
+for counted_engine in {engine, read_engine, async_engine.sync_engine, async_read_engine.sync_engine}:
+    event.listen(counted_engine, "before_cursor_execute", _count_query)
+
+
+@contextmanager
+def counting():
+    global _query_count
+    _query_count = 0
+    counts = {}
+    yield counts
+    counts["queries"] = _query_count
+
+
+@app.get("/check/identity")
+def identity_probe(user_id: int = Depends(get_current_user_id)):
+    return {"user_id": user_id}
+
+
+@app.get("/check/user")
+def user_probe(user: User = Depends(get_current_user)):
+    return {"user_id": user.id}
+
+
+def seed() -> tuple:
+    with Session(engine) as session:
+        user = User(strava_athlete_id=1, username="runner")
+        badge = Badge(name="First 5K", description="Ran 5 km", category=BadgeCategory.DISTANCE, requirements='{"type": "distance", "distance_required": 5}')
+        title = Title(name="Rookie", description="Joined", rarity=TitleRarity.COMMON, requirements='{"type": "challenge_completion", "count": 1}')
+        challenges = [
+            Challenge(name=f"Challenge {i}", tier="Sprint", type="distance", sport="run", distance_target_km=10 * (i + 1),
+                      start_date=datetime.utcnow(), end_date=datetime.utcnow() + timedelta(days=30))
+            for i in range(3)
+        ]
+        session.add_all([user, badge, title, *challenges])
+        session.commit()
+        session.add_all([UserBadge(user_id=user.id, badge_id=badge.id), UserTitle(user_id=user.id, title_id=title.id, is_active=True)])
+        session.add_all([UserChallenge(user_id=user.id, challenge_id=challenge.id) for challenge in challenges])
+        job = SyncJob(user_id=user.id)
+        session.add(job)
+        session.commit()
+        return create_access_token({"user_id": user.id}), job.id
+
+
+def reset_auth_caches() -> None:
+    security._claims_cache.clear()
+    dependencies._known_users.clear()
+
+
+def main() -> int:
+    if os.path.exists(CHECK_DATABASE_FILE):
+        os.remove(CHECK_DATABASE_FILE)
+    create_db_and_tables()
+    token, job_id = seed()
+    headers = {"Authorization": f"Bearer {token}"}
+    client = TestClient(app)
+
+    paths = ["/check/identity", "/check/user", f"/activities/sync/{job_id}", "/challenges/my", "/users/me"]
+    results = {}
+    for path in paths:
+        reset_auth_caches()
+        with counting() as cold:
+            assert client.get(path, headers=headers).status_code == 200, path
+        with counting() as warm:
+            assert client.get(path, headers=headers).status_code == 200, path
+        results[path] = (cold["queries"], warm["queries"])
+
+    print(f"{'GET':<24} {'cold':>5} {'warm':>5}")
+    for path, (cold, warm) in results.items():
+        print(f"{path:<24} {cold:>5} {warm:>5}")
+
+    checks = [
+        ("auth costs <= 1 query cold", results["/check/identity"][0] <= 1),
+        ("auth costs 0 queries warm", results["/check/identity"][1] == 0),
+        ("lean current user is 1 query", results["/check/user"][1] == 1),
+    ]
+    for label, ok in checks:
+        print(f"{'✅' if ok else '❌'} {label}")
+    return 0 if all(ok for _label, ok in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Check the challenge catalog snapshot behind GET /challenges/: every filter
+combination and page matches what the database path returns byte for byte,
+warm requests run no queries, and committing a Challenge, a listed challenge
+ending or the TTL running out replaces the snapshot.
+
+Exits non-zero if any check fails.
+
+Usage: python -m backend.scripts.check_challenge_catalog
+"""
+import os
+import tempfile
+
+# Throwaway database and secret; must be set before backend modules are imported
+CHECK_DATABASE_FILE = os.path.join(tempfile.gettempdir(), "check_challenge_catalog.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{CHECK_DATABASE_FILE}"
+os.environ.setdefault("SECRET_KEY", "check-secret")
+
+from datetime import datetime, timedelta
+from itertools import product
+from typing import List, Optional
+import json
+import sys
+import time
+from fastapi.testclient import TestClient
+from sqlalchemy import event, tuple_
+from sqlmodel import Session, select
+
+from backend.main import app
+from backend.db import async_engine, create_db_and_tables, engine
+from backend.models import Challenge
+from backend.models.schemas import ChallengeRead
+from backend.services import challenge_catalog
+
+TIERS = ("Sprint", "Marathon", "Ultra")
+TYPES = ("solo", "team")
+SPORTS = ("running", "cycling")
+
+_query_count = 0
+
+
+# Snapshots are loaded from the primary
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    global _query_count
+    _query_count += 1
+
+
+def seed() -> None:
+    start = datetime(2025, 1, 1)
+    ongoing, ended = datetime.utcnow() + timedelta(days=30), datetime.utcnow() - timedelta(days=1)
+    with Session(engine) as session:
+        session.add_all(
+            Challenge(name=f"Challenge {i}", tier=TIERS[i % 3], type=TYPES[i % 2], sport=SPORTS[i // 2 % 2],
+                      distance_target_km=5 + i, start_date=start, end_date=ended if i in (4, 15, 26, 37, 48) else ongoing,
+                      # Runs of equal created_at, so cursors have to break ties on id
+                      active=i % 7 != 0, created_at=start + timedelta(hours=i // 3))
+            for i in range(60)
+        )
+        session.commit()
+
+
+def expected_page(filters: dict, after: Optional[tuple], limit: int) -> List[dict]:
+    # The database path's query, serialized through ChallengeRead
+    query = select(Challenge).where(Challenge.active == True, Challenge.end_date > datetime.utcnow())
+    for column, value in filters.items():
+        query = query.where(getattr(Challenge, column) == value)
+    if after:
+        query = query.where(tuple_(Challenge.created_at, Challenge.id) < tuple_(*after))
+    query = query.order_by(Challenge.created_at.desc(), Challenge.id.desc()).limit(limit)
+    with Session(engine) as session:
+        return [ChallengeRead.model_validate(c).model_dump(mode="json") for c in session.exec(query).all()]
+
+
+def walk(client: TestClient, filters: dict, limit: int) -> tuple:
+    # Every page of one listing: (pages match the database path, rows seen)
+    matches, rows, cursor, after = True, [], None, None
+    while True:
+        params = {**filters, "limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/challenges/", params=params)
+        page = response.json()
+        matches = matches and response.status_code == 200 and page == expected_page(filters, after, limit)
+        rows += page
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return matches, rows
+        after = (datetime.fromisoformat(page[-1]["created_at"]), page[-1]["id"])
+
+
+def catalog_names(client: TestClient) -> List[str]:
+    return [challenge["name"] for challenge in client.get("/challenges/", params={"limit": 200}).json()]
+
+
+def main() -> int:
+    global _query_count
+    if os.path.exists(CHECK_DATABASE_FILE):
+        os.remove(CHECK_DATABASE_FILE)
+    create_db_and_tables()
+    seed()
+    client = TestClient(app)
+    results = []
+
+    def check(label: str, ok: bool) -> None:
+        results.append(ok)
+        print(f"{'✅' if ok else '❌'} {label}")
+
+    combinations = [
+        {column: value for column, value in zip(("tier", "type", "sport"), values) if value}
+        for values in product((None, *TIERS, "Unknown"), (None, *TYPES), (None, *SPORTS))
+    ]
+    mismatched = [filters for filters in combinations for limit in (1, 4, 50) if not walk(client, filters, limit)[0]]
+    check(f"{len(combinations)} filter combinations x 3 page sizes match the database path", not mismatched)
+    for filters in mismatched[:5]:
+        print(f"     mismatch for {filters}")
+
+    _, rows = walk(client, {}, limit=4)
+    # 9 inactive and 5 ended (none both)
+    check("paging visits every listed challenge once", len(rows) == len({row["id"] for row in rows}) == 60 - 9 - 5)
+
+    default_page = client.get("/challenges/")
+    expected_body = json.dumps(expected_page({}, None, challenge_catalog.CHALLENGES_PAGE_SIZE), separators=(",", ":")).encode()
+    check("default first page is the same bytes as the database path", default_page.content == expected_body)
+
+    _query_count = 0
+    client.get("/challenges/", params={"tier": "Sprint", "limit": 3})
+    check(f"warm request runs no queries ({_query_count})", _query_count == 0)
+    check("invalid cursor -> 400", client.get("/challenges/", params={"cursor": "not-a-cursor"}).status_code == 400)
+
+    with Session(engine) as session:
+        session.add(Challenge(name="Fresh Challenge", tier="Sprint", type="solo", sport="running", distance_target_km=5,
+                              start_date=datetime.utcnow(), end_date=datetime.utcnow() + timedelta(days=7)))
+        session.commit()
+    check("a new challenge is listed right after its commit", catalog_names(client)[0] == "Fresh Challenge")
+
+    with Session(engine) as session:
+        fresh = session.exec(select(Challenge).where(Challenge.name == "Fresh Challenge")).one()
+        fresh.active = False
+        session.add(fresh)
+        session.commit()
+    check("a deactivated challenge is dropped right after its commit", "Fresh Challenge" not in catalog_names(client))
+
+    # Nothing is committed when a challenge ends; the snapshot expires then
+    with Session(engine) as session:
+        session.add(Challenge(name="Ending Challenge", tier="Sprint", type="solo", sport="running", distance_target_km=5,
+                              start_date=datetime.utcnow(), end_date=datetime.utcnow() + timedelta(seconds=1)))
+        session.commit()
+    listed_before_end = "Ending Challenge" in catalog_names(client)
+    time.sleep(1.2)
+    check("a challenge is dropped once its end_date passes",
+          listed_before_end and "Ending Challenge" not in catalog_names(client))
+
+    # A change from another process: no commit hook fires here, the TTL catches it
+    with engine.begin() as connection:
+        connection.exec_driver_sql("UPDATE challenge SET name = 'Renamed Elsewhere' WHERE name = 'Challenge 59'")
+    stale = "Renamed Elsewhere" not in catalog_names(client)
+    challenge_catalog._snapshot.expires_at = time.time()
+    check("out-of-process changes show up once the TTL expires", stale and "Renamed Elsewhere" in catalog_names(client))
+
+    print("\nChallenge catalog OK." if all(results) else "\nChallenge catalog checks failed.")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Check the /users/me cache: revalidation with If-None-Match returns 304 without
+touching the database, and syncs, awards and backfills change the ETag.
+
+Exits non-zero if any check fails.
+
+Usage: python -m backend.scripts.check_dashboard_cache
+"""
+import os
+import tempfile
+
+# Throwaway database and secret; must be set before backend modules are imported
+CHECK_DATABASE_FILE = os.path.join(tempfile.gettempdir(), "check_dashboard_cache.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{CHECK_DATABASE_FILE}"
+os.environ.setdefault("SECRET_KEY", "check-secret")
+
+from datetime import datetime, timedelta
+import sys
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session
+
+from backend.main import app
+from backend.db import create_db_and_tables, engine
+from backend.models import Badge, BadgeCategory, Title, TitleRarity, User, UserTitle
+from backend.services.backfill import backfill_award
+from backend.services.sync import apply_activity_sync
+from backend.utils.security import create_access_token
+
+_query_count = 0
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    global _query_count
+    _query_count += 1
+
+
+def seed() -> tuple:
+    with Session(engine) as session:
+        user = User(strava_athlete_id=1, username="runner")
+        badge = Badge(name="First 5K", description="Ran 5 km", category=BadgeCategory.DISTANCE, requirements='{"type": "distance", "distance_required": 5}')
+        title = Title(name="Rookie", description="Joined", rarity=TitleRarity.COMMON, requirements='{"type": "challenge_completion", "count": 99}')
+        session.add_all([user, badge, title])
+        session.commit()
+        return user.id, badge.id, title.id
+
+
+def main() -> int:
+    if os.path.exists(CHECK_DATABASE_FILE):
+        os.remove(CHECK_DATABASE_FILE)
+    create_db_and_tables()
+    user_id, badge_id, title_id = seed()
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token({'user_id': user_id})}"}
+    results = []
+
+    def check(label: str, ok: bool) -> None:
+        results.append(ok)
+        print(f"{'✅' if ok else '❌'} {label}")
+
+    def fetch(etag: str = None):
+        global _query_count
+        _query_count = 0
+        request_headers = {**headers, "If-None-Match": etag} if etag else headers
+        response = client.get("/users/me", headers=request_headers)
+        return response, _query_count
+
+    first, _ = fetch()
+    etag = first.headers["ETag"]
+    check("first GET returns 200 with an ETag", first.status_code == 200 and bool(etag))
+
+    revalidated, queries = fetch(etag)
+    check(f"If-None-Match with the current ETag -> 304 ({queries} queries)", revalidated.status_code == 304 and queries == 0)
+
+    # A sync that adds distance and XP
+    with Session(engine) as session:
+        user = session.get(User, user_id)
+        start = (datetime.utcnow() - timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        apply_activity_sync(user, [{"id": 1, "type": "Run", "distance": 3000, "start_date": start}], session)
+    after_sync, _ = fetch(etag)
+    check("sync changes the ETag", after_sync.status_code == 200 and after_sync.headers["ETag"] != etag)
+    etag = after_sync.headers["ETag"]
+
+    # A title awarded through the ORM
+    with Session(engine) as session:
+        session.add(UserTitle(user_id=user_id, title_id=title_id, is_active=True))
+        session.commit()
+    after_title, _ = fetch(etag)
+    check("title award changes the ETag", after_title.status_code == 200 and after_title.json()["active_title"] is not None)
+    etag = after_title.headers["ETag"]
+
+    # A badge granted by the Core backfill (no ORM hooks)
+    with Session(engine) as session:
+        user = session.get(User, user_id)
+        user.total_distance_km = 10
+        session.add(user)
+        session.commit()
+        etag = fetch()[0].headers["ETag"]
+        backfill_award(session.get(Badge, badge_id), session)
+    after_backfill, _ = fetch(etag)
+    check("backfill changes the ETag", after_backfill.status_code == 200 and len(after_backfill.json()["badges"]) == 1)
+
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
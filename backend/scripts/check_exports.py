@@ -0,0 +1,150 @@
+"""
+Check the NDJSON exports: every row of the user's (or, for admins, every
+user's) challenges, badges, titles and activities comes back as one JSON
+line, other users' rows don't, and peak memory while streaming doesn't grow
+with the number of rows.
+
+Exits non-zero if any check fails.
+
+Usage: python -m backend.scripts.check_exports [--small 2000] [--large 40000]
+"""
+import os
+import tempfile
+
+# Throwaway database, secret and admin key; must be set before backend modules are imported
+CHECK_DATABASE_FILE = os.path.join(tempfile.gettempdir(), "check_exports.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{CHECK_DATABASE_FILE}"
+os.environ.setdefault("SECRET_KEY", "check-secret")
+os.environ.setdefault("ADMIN_API_KEY", "check-admin-key")
+
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import json
+import sys
+import tracemalloc
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from backend.main import app
+from backend.db import async_read_engine, create_db_and_tables, engine
+from backend.models import (
+    Activity, Badge, BadgeCategory, Challenge, Title, TitleRarity, User, UserBadge, UserChallenge, UserTitle
+)
+from backend.services.exports import ExportKind, stream_export
+from backend.utils.security import create_access_token
+
+ROWS = 5  # challenges, badges and titles per user
+
+
+def seed() -> dict:
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        users = [User(strava_athlete_id=i + 1, username=f"runner{i}") for i in range(3)]
+        challenges = [
+            Challenge(name=f"Challenge {i}", tier="Sprint", type="solo", sport="running", distance_target_km=5,
+                      start_date=now - timedelta(days=10), end_date=now + timedelta(days=10))
+            for i in range(ROWS)
+        ]
+        badges = [Badge(name=f"Badge {i}", description="", category=BadgeCategory.DISTANCE, requirements="{}") for i in range(ROWS)]
+        titles = [Title(name=f"Title {i}", description="", rarity=TitleRarity.RARE, requirements="{}") for i in range(ROWS)]
+        session.add_all([*users, *challenges, *badges, *titles])
+        session.commit()
+        for user in users:
+            session.add_all(UserChallenge(user_id=user.id, challenge_id=challenge.id, distance_completed_km=2.5) for challenge in challenges)
+            session.add_all(UserBadge(user_id=user.id, badge_id=badge.id) for badge in badges)
+            session.add_all(UserTitle(user_id=user.id, title_id=title.id, is_active=title is titles[0]) for title in titles)
+        session.commit()
+        return {"user_id": users[0].id, "other_ids": [user.id for user in users[1:]]}
+
+
+def add_activities(user_id: int, count: int, first_id: int) -> None:
+    start = datetime(2024, 1, 1)
+    rows = [
+        {"strava_activity_id": first_id + i, "user_id": user_id, "name": f"Run {i}", "type": "Run",
+         "distance_km": 5.0, "moving_time": 1800, "start_date": start + timedelta(hours=i), "created_at": start}
+        for i in range(count)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Activity), rows)
+
+
+async def measure_export(user_id: int) -> tuple:
+    # (lines, peak traced bytes) while consuming the stream chunk by chunk
+    lines = 0
+    tracemalloc.start()
+    async for chunk in stream_export(ExportKind.ACTIVITIES, user_id):
+        lines += chunk.count(b"\n")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return lines, peak
+
+
+async def measure_memory(user_id: int, other_id: int) -> tuple:
+    try:
+        # Warm up the pool and statement caches so only the export is measured
+        await measure_export(user_id)
+        return await measure_export(user_id), await measure_export(other_id)
+    finally:
+        await async_read_engine.dispose()
+
+
+def main(small: int, large: int) -> int:
+    if os.path.exists(CHECK_DATABASE_FILE):
+        os.remove(CHECK_DATABASE_FILE)
+    create_db_and_tables()
+    ids = seed()
+    user_id, other_ids = ids["user_id"], ids["other_ids"]
+    add_activities(user_id, small, first_id=1)
+    add_activities(other_ids[0], large, first_id=small + 1)
+
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token({'user_id': user_id})}"}
+    results = []
+
+    def check(label: str, ok: bool) -> None:
+        results.append(ok)
+        print(f"{'✅' if ok else '❌'} {label}")
+
+    expected = {ExportKind.CHALLENGES: ROWS, ExportKind.BADGES: ROWS, ExportKind.TITLES: ROWS, ExportKind.ACTIVITIES: small}
+    for kind, count in expected.items():
+        response = client.get(f"/users/me/export/{kind.value}", headers=headers)
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        check(
+            f"/users/me/export/{kind.value}: {len(rows)} NDJSON rows, all the user's",
+            response.status_code == 200
+            and response.headers["content-type"].startswith("application/x-ndjson")
+            and len(rows) == count
+            and all(row["user_id"] == user_id for row in rows)
+        )
+
+    titles = [json.loads(line) for line in client.get("/users/me/export/titles", headers=headers).text.splitlines()]
+    check("rows carry the joined catalog columns", sum(row["is_active"] for row in titles) == 1 and titles[0]["rarity"] == "rare")
+    check("unknown export kind -> 422", client.get("/users/me/export/passwords", headers=headers).status_code == 422)
+    check("export requires a token", client.get("/users/me/export/activities").status_code in (401, 403))
+
+    admin = {"X-Admin-Key": os.environ["ADMIN_API_KEY"]}
+    check("admin export requires the admin key", client.get("/admin/export/badges").status_code in (401, 403))
+    badges = [json.loads(line) for line in client.get("/admin/export/badges", headers=admin).text.splitlines()]
+    check(f"/admin/export/badges covers every user ({len(badges)} rows)", {row["user_id"] for row in badges} == {user_id, *other_ids})
+    activities = client.get("/admin/export/activities", headers=admin).text.count("\n")
+    check(f"/admin/export/activities has every activity ({activities} rows)", activities == small + large)
+
+    (small_lines, small_peak), (large_lines, large_peak) = asyncio.run(measure_memory(user_id, other_ids[0]))
+    print(f"   {small_lines} rows: peak {small_peak / 1024:.0f} KiB; {large_lines} rows: peak {large_peak / 1024:.0f} KiB")
+    check(
+        f"peak memory flat from {small} to {large} rows",
+        small_lines == small and large_lines == large and large_peak < small_peak * 1.5
+    )
+
+    print("\nExports OK." if all(results) else "\nExport checks failed.")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the streaming NDJSON exports.")
+    parser.add_argument("--small", type=int, default=2000, help="Activities for the exporting user")
+    parser.add_argument("--large", type=int, default=40000, help="Activities for the user exported to check memory")
+    args = parser.parse_args()
+    sys.exit(main(args.small, args.large))
@@ -0,0 +1,158 @@
+"""
+N+1 query check for the hot routes, services and CLI scripts.
+
+Runs each path under a strict query audit (backend/utils/query_audit.py)
+against a throwaway database with more rows per relationship than the
+repeat threshold, and fails (exit code 1) if any statement shape repeats
+past it. Also checks that the detector flags a per-row lookup loop and
+that loading one challenge no longer cascades into its participants.
+
+Usage: python -m backend.scripts.check_n_plus_one [--threshold 5]
+"""
+import os
+import tempfile
+
+# Throwaway database, strict auditing and secret; must be set before backend modules are imported
+CHECK_DATABASE_FILE = os.path.join(tempfile.gettempdir(), "check_n_plus_one.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{CHECK_DATABASE_FILE}"
+os.environ["QUERY_AUDIT"] = "strict"
+os.environ.setdefault("SECRET_KEY", "check-secret")
+
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from typing import Callable, List, Tuple
+import argparse
+import io
+import json
+import sys
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from backend.main import app
+from backend.db import create_db_and_tables, engine
+from backend.models import Badge, BadgeCategory, Challenge, Title, TitleRarity, User, UserChallenge
+from backend.services.backfill import backfill_award
+from backend.services.sync import apply_activity_sync
+from backend.utils.query_audit import NPlusOneError, audit_queries
+from backend.utils.security import create_access_token
+from backend.scripts.list_user_challenges import list_user_challenges
+from backend.scripts.list_users import list_users
+
+ROWS = 12  # per relationship; above the default threshold
+
+
+def seed() -> dict:
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        users = [User(strava_athlete_id=i + 1, username=f"runner{i}", last_sync_at=now - timedelta(days=10)) for i in range(ROWS)]
+        challenges = [
+            Challenge(name=f"Challenge {i}", tier=("Sprint", "Marathon", "Ultra")[i % 3], type="solo", sport="running",
+                      distance_target_km=5, start_date=now - timedelta(days=10), end_date=now + timedelta(days=10))
+            for i in range(ROWS)
+        ]
+        badge = Badge(name="First 10k", description="", category=BadgeCategory.DISTANCE,
+                      requirements=json.dumps({"type": "distance", "distance_required": 1}))
+        title = Title(name="Finisher", description="", rarity=TitleRarity.COMMON,
+                      requirements=json.dumps({"type": "challenge_completion", "count": 1}))
+        session.add_all([*users, *challenges, badge, title])
+        session.commit()
+        # Everyone but the last user joins every challenge except the last one
+        session.add_all(
+            UserChallenge(user_id=user.id, challenge_id=challenge.id, distance_completed_km=user.id)
+            for user in users[:-1] for challenge in challenges[:-1]
+        )
+        session.commit()
+        return {
+            "user_id": users[0].id,
+            "joiner_id": users[-1].id,
+            "challenge_id": challenges[0].id,
+            "open_challenge_id": challenges[-1].id,
+            "badge_id": badge.id,
+            "title_id": title.id,
+        }
+
+
+def checked_paths(ids: dict, threshold: int) -> List[Tuple[str, Callable[[], object]]]:
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token({'user_id': ids['user_id']})}"}
+    joiner = {"Authorization": f"Bearer {create_access_token({'user_id': ids['joiner_id']})}"}
+
+    def request(method: str, path: str, request_headers: dict = None) -> Callable[[], object]:
+        # The app's own audit middleware raises NPlusOneError through the test client
+        return lambda: client.request(method, path, headers=request_headers or headers).raise_for_status()
+
+    def audited(label: str, operation: Callable[[Session], object]) -> Callable[[], object]:
+        def run():
+            with audit_queries(label, strict=True, threshold=threshold), Session(engine) as session, redirect_stdout(io.StringIO()):
+                return operation(session)
+        return run
+
+    def sync(session: Session):
+        user = session.get(User, ids["user_id"])
+        activities = [
+            {"id": 5000 + i, "type": "Run", "distance": 5000, "start_date": (datetime.utcnow() - timedelta(days=i)).isoformat() + "Z"}
+            for i in range(ROWS)
+        ]
+        return apply_activity_sync(user, activities, session)
+
+    return [
+        ("GET /challenges/", request("GET", "/challenges/")),
+        ("GET /challenges/my", request("GET", "/challenges/my")),
+        ("POST /challenges/{id}/join", request("POST", f"/challenges/{ids['open_challenge_id']}/join", joiner)),
+        ("GET /challenges/{id}/leaderboard", request("GET", f"/challenges/{ids['challenge_id']}/leaderboard")),
+        ("GET /users/me", request("GET", "/users/me")),
+        ("GET /leaderboard/", request("GET", "/leaderboard/")),
+        ("activity sync", audited("activity sync", sync)),
+        ("badge backfill", audited("badge backfill", lambda session: backfill_award(session.get(Badge, ids["badge_id"]), session))),
+        ("title backfill", audited("title backfill", lambda session: backfill_award(session.get(Title, ids["title_id"]), session))),
+        ("scripts/list_user_challenges", audited("list_user_challenges", lambda session: list_user_challenges(ids["user_id"]))),
+        ("scripts/list_users", audited("list_users", lambda session: list_users())),
+    ]
+
+
+def check_detector(ids: dict, threshold: int) -> List[Tuple[str, bool]]:
+    # The pattern my_challenges used to have: one lookup per participation
+    try:
+        with audit_queries("per-row lookups", strict=True, threshold=threshold), Session(engine) as session:
+            for uc in session.exec(select(UserChallenge).where(UserChallenge.user_id == ids["user_id"])).all():
+                session.get(Challenge, uc.challenge_id)
+        flagged = False
+    except NPlusOneError:
+        flagged = True
+
+    with audit_queries("challenge load", threshold=threshold) as audit, Session(engine) as session:
+        session.get(Challenge, ids["challenge_id"])
+
+    return [
+        ("detector flags a per-row lookup loop", flagged),
+        ("loading a challenge does not load its participants", audit.total == 1),
+    ]
+
+
+def main(threshold: int) -> int:
+    if os.path.exists(CHECK_DATABASE_FILE):
+        os.remove(CHECK_DATABASE_FILE)
+    create_db_and_tables()
+    ids = seed()
+
+    ok = True
+    for label, operation in checked_paths(ids, threshold):
+        try:
+            operation()
+            print(f"✅ {label}")
+        except NPlusOneError as exc:
+            ok = False
+            print(f"❌ {label}: {exc}")
+    for label, passed in check_detector(ids, threshold):
+        ok = ok and passed
+        print(f"{'✅' if passed else '❌'} {label}")
+
+    print("\nNo N+1 query patterns found." if ok else "\nN+1 query patterns found.")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail if a hot path runs the same query shape repeatedly.")
+    parser.add_argument("--threshold", type=int, default=5, help="Allowed repeats of one statement shape")
+    args = parser.parse_args()
+    sys.exit(main(args.threshold))
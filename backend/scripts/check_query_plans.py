@@ -0,0 +1,295 @@
+"""
+Query-plan regression checks for the hot paths in routes/ and services/.
+
+Runs each hot path against a small throwaway database, captures every SQL
+statement it issues and fails (exit code 1) if SQLite's EXPLAIN QUERY PLAN
+shows a full table scan for any of them, or a sort for the paginated
+listings (a page must be an index range read). Also checks that the
+migrations upgrade a pre-index database with duplicate rows.
+
+Usage: python -m backend.scripts.check_query_plans [--verbose]
+"""
+import os
+import tempfile
+
+# Throwaway database and secret; must be set before backend modules are imported.
+# The catalog snapshot is off so the catalog's database path is checked too.
+CHECK_DATABASE_FILE = os.path.join(tempfile.gettempdir(), "check_query_plans.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{CHECK_DATABASE_FILE}"
+os.environ.setdefault("SECRET_KEY", "check-secret")
+os.environ["CHALLENGE_CATALOG_SNAPSHOT"] = "0"
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Tuple
+import argparse
+import asyncio
+import json
+import re
+import sys
+from fastapi import Response
+from sqlalchemy import event, inspect as sa_inspect, text
+from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.db import async_engine, create_db_and_tables, engine
+from backend.migrations import MIGRATIONS, run_migrations, schema_version
+from backend.migrations import m0001_hot_path_indexes, m0002_keyset_pagination_indexes, m0003_unique_user_titles
+from backend.models import (
+    Badge, BadgeCategory, Challenge, StravaEvent, SyncJob, Title, TitleRarity,
+    User, UserBadge, UserChallenge, UserTitle,
+)
+from backend.routes.challenges import _find_user_challenge, list_challenges, my_challenges
+from backend.services import strava_events, sync_jobs
+from backend.services.challenge_catalog import async_get_catalog, invalidate_catalog
+from backend.services.activity_store import sync_cursor
+from backend.services.awards import _earned_award_ids
+from backend.services.backfill import backfill_award
+from backend.services.leaderboard import challenge_leaderboards, serialize_entries
+from backend.services.strava_tokens import token_manager
+from backend.services.sync import apply_activity_sync
+from backend.services.user_dashboard import async_get_dashboard, get_dashboard, invalidate_all_dashboards
+
+# Award catalogs are small and read whole into the cached rule index
+ALLOWED_SCANS = {"badge", "title"}
+# Paginated listings, whose pages must come off an index already in order
+NO_SORT_PATHS = {"challenge catalog", "challenge catalog by tier", "challenge catalog by type, page 2",
+                 "challenge catalog by sport", "my challenges", "my challenges, page 2"}
+INDEXES = m0001_hot_path_indexes.INDEXES + m0002_keyset_pagination_indexes.INDEXES + m0003_unique_user_titles.INDEXES
+
+_captured: List[Tuple[str, tuple]] = []
+_capturing = False
+
+
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    if _capturing and not executemany:
+        _captured.append((statement, parameters))
+
+
+for captured_engine in (engine, async_engine.sync_engine):
+    event.listen(captured_engine, "before_cursor_execute", _capture)
+
+
+@contextmanager
+def capturing():
+    global _capturing
+    _captured.clear()
+    _capturing = True
+    try:
+        yield _captured
+    finally:
+        _capturing = False
+
+
+def query_plan(statement: str, parameters) -> List[str]:
+    with engine.connect() as connection:
+        return [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()]
+
+
+def table_scans(plan: List[str]) -> List[str]:
+    """
+    Tables a query plan reads with a full scan.
+    """
+    tables = set(SQLModel.metadata.tables)
+    scans = []
+    for step in plan:
+        match = re.match(r"SCAN (?:TABLE )?(\w+)(.*)", step)
+        if match and match.group(1) in tables and "INDEX" not in match.group(2):
+            scans.append(match.group(1))
+    return scans
+
+
+def sorts(plan: List[str]) -> bool:
+    return any("USE TEMP B-TREE" in step for step in plan)
+
+
+def seed() -> dict:
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        users = [
+            User(strava_athlete_id=1000 + i, username=f"runner{i}", refresh_token="r", access_token="a",
+                 token_expires_at=now + timedelta(minutes=i), total_distance_km=10.0 * i)
+            for i in range(5)
+        ]
+        challenges = [
+            Challenge(name=f"{tier} Challenge", tier=tier, type="solo", sport="running",
+                      distance_target_km=5, start_date=now, end_date=now + timedelta(days=7))
+            for tier in ("Sprint", "Marathon")
+        ]
+        badge = Badge(name="First 10k", description="", category=BadgeCategory.DISTANCE,
+                      requirements=json.dumps({"type": "distance", "distance_required": 10}))
+        title = Title(name="Finisher", description="", rarity=TitleRarity.COMMON,
+                      requirements=json.dumps({"type": "challenge_completion", "count": 1}))
+        session.add_all([*users, *challenges, badge, title])
+        session.commit()
+
+        for user in users:
+            for challenge in challenges:
+                session.add(UserChallenge(user_id=user.id, challenge_id=challenge.id, distance_completed_km=user.id))
+        session.add(UserBadge(user_id=users[0].id, badge_id=badge.id))
+        session.add(UserTitle(user_id=users[0].id, title_id=title.id, is_active=True))
+        session.add(SyncJob(user_id=users[0].id))
+        session.add(StravaEvent(object_type="activity", object_id=1, aspect_type="create", owner_id=1001))
+        session.commit()
+        return {"user_id": users[0].id, "challenge_id": challenges[0].id, "badge_id": badge.id, "title_id": title.id}
+
+
+async def second_page(listing: Callable[..., Awaitable[list]], **kwargs) -> list:
+    # Page 1 of one row, then the page after its cursor
+    response = Response()
+    await listing(response, limit=1, cursor=None, **kwargs)
+    return await listing(Response(), limit=1, cursor=response.headers["X-Next-Cursor"], **kwargs)
+
+
+def hot_paths(ids: dict) -> List[Tuple[str, Callable[[], object]]]:
+    user_id, challenge_id = ids["user_id"], ids["challenge_id"]
+
+    def with_session(operation: Callable[[Session], object]) -> Callable[[], object]:
+        def run():
+            with Session(engine) as session:
+                return operation(session)
+        return run
+
+    def with_async_session(operation: Callable[[AsyncSession], Awaitable[object]]) -> Callable[[], object]:
+        async def run_async():
+            try:
+                async with AsyncSession(async_engine) as session:
+                    return await operation(session)
+            finally:
+                await async_engine.dispose()
+        return lambda: asyncio.run(run_async())
+
+    def leaderboard(session: Session):
+        ranking = challenge_leaderboards.ranking(challenge_id, "distance")
+        entries = ranking.index(session).top(10)
+        return serialize_entries(entries, session, score_field="distance")
+
+    def dashboard():
+        invalidate_all_dashboards()
+        return get_dashboard(user_id)
+
+    # Cache fills open their own primary session
+    async def async_dashboard(_session: AsyncSession):
+        invalidate_all_dashboards()
+        return await async_get_dashboard(user_id)
+
+    async def catalog_snapshot(_session: AsyncSession):
+        invalidate_catalog()
+        return await async_get_catalog()
+
+    def sync(session: Session):
+        user = session.get(User, user_id)
+        activity = {"id": 9001, "type": "Run", "distance": 5000, "start_date": datetime.utcnow().isoformat() + "Z"}
+        return sync_cursor(user, session), apply_activity_sync(user, [activity], session)
+
+    return [
+        ("challenge catalog", with_async_session(lambda session: list_challenges(Response(), limit=20, cursor=None, session=session))),
+        ("challenge catalog by tier", with_async_session(lambda session: list_challenges(Response(), tier="Sprint", limit=20, cursor=None, session=session))),
+        ("challenge catalog by type, page 2", with_async_session(lambda session: second_page(list_challenges, type="solo", session=session))),
+        ("challenge catalog by sport", with_async_session(lambda session: list_challenges(Response(), sport="running", limit=20, cursor=None, session=session))),
+        ("challenge catalog snapshot load", with_async_session(catalog_snapshot)),
+        ("join: existing participation", with_async_session(lambda session: _find_user_challenge(user_id, challenge_id, session))),
+        ("my challenges", with_async_session(lambda session: my_challenges(Response(), limit=20, cursor=None, user_id=user_id, session=session))),
+        ("my challenges, page 2", with_async_session(lambda session: second_page(my_challenges, user_id=user_id, session=session))),
+        ("challenge leaderboard", with_session(leaderboard)),
+        ("users/me dashboard", dashboard),
+        ("users/me dashboard (async)", with_async_session(async_dashboard)),
+        ("earned award ids", with_session(lambda session: _earned_award_ids(user_id, session))),
+        ("activity sync", with_session(sync)),
+        ("expiring tokens", token_manager._load_expiring_users),
+        ("claim sync job", sync_jobs.claim_next_job),
+        ("claim webhook event", strava_events.claim_next_event),
+        ("badge backfill", with_session(lambda session: backfill_award(session.get(Badge, ids["badge_id"]), session))),
+        ("title backfill", with_session(lambda session: backfill_award(session.get(Title, ids["title_id"]), session))),
+    ]
+
+
+def check_hot_paths(verbose: bool) -> bool:
+    ids = seed()
+    ok = True
+    for label, operation in hot_paths(ids):
+        with capturing() as statements:
+            operation()
+        regressions = []
+        for statement, parameters in statements:
+            if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "INSERT INTO", "WITH")):
+                continue
+            plan = query_plan(statement, parameters)
+            problems = [f"full scan of {table}" for table in table_scans(plan) if table not in ALLOWED_SCANS]
+            if label in NO_SORT_PATHS and sorts(plan):
+                problems.append("sort instead of index order")
+            if problems:
+                regressions.append((problems, statement))
+
+        print(f"{'✅' if not regressions else '❌'} {label} ({len(statements)} statements)")
+        for problems, statement in regressions:
+            print(f"     {', '.join(problems)}:")
+            sql = " ".join(statement.split())
+            print(f"     {sql if verbose else sql[:160]}")
+        ok = ok and not regressions
+    return ok
+
+
+def check_migration_upgrade() -> bool:
+    """
+    Rebuild the pre-index schema with duplicate rows, then migrate it.
+    """
+    with engine.begin() as connection:
+        for statement in INDEXES:
+            name = statement.split(" IF NOT EXISTS ")[1].split()[0]
+            connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        connection.execute(text("CREATE INDEX ix_challenge_active_tier ON challenge (active, tier)"))
+        connection.execute(schema_version.delete())
+        user_id, challenge_id = connection.execute(text("SELECT user_id, challenge_id FROM userchallenge LIMIT 1")).one()
+        connection.execute(text(
+            "INSERT INTO userchallenge (user_id, challenge_id, distance_completed_km, streak, completed, xp_earned, joined_at, updated_at) "
+            "VALUES (:user_id, :challenge_id, 99, 0, 0, 0, :now, :now)"
+        ), {"user_id": user_id, "challenge_id": challenge_id, "now": datetime.utcnow()})
+        connection.execute(text("INSERT INTO userbadge (user_id, badge_id, earned_at) SELECT user_id, badge_id, earned_at FROM userbadge"))
+        # An inactive copy of the active title
+        connection.execute(text("INSERT INTO usertitle (user_id, title_id, earned_at, is_active) SELECT user_id, title_id, earned_at, 0 FROM usertitle"))
+
+    applied = run_migrations(engine)
+    with engine.connect() as connection:
+        duplicate_progress = connection.execute(text(
+            "SELECT distance_completed_km FROM userchallenge WHERE user_id = :user_id AND challenge_id = :challenge_id"
+        ), {"user_id": user_id, "challenge_id": challenge_id}).scalars().all()
+        duplicate_badges = connection.execute(text(
+            "SELECT COUNT(*) - COUNT(DISTINCT user_id || ':' || badge_id) FROM userbadge"
+        )).scalar()
+        remaining_titles = connection.execute(text("SELECT is_active FROM usertitle")).scalars().all()
+    indexes = {index["name"] for table in ("user", "userchallenge", "userbadge", "usertitle", "challenge")
+               for index in sa_inspect(engine).get_indexes(table)}
+    expected = {statement.split(" IF NOT EXISTS ")[1].split()[0] for statement in INDEXES}
+    expected -= set(m0002_keyset_pagination_indexes.SUPERSEDED_INDEXES)
+
+    checks = [
+        ("all migrations applied", len(applied) == len(MIGRATIONS)),
+        ("duplicate participation collapsed to the most progressed row", duplicate_progress == [99]),
+        ("duplicate badges removed", duplicate_badges == 0),
+        ("duplicate titles collapsed to the active row", remaining_titles == [True]),
+        ("hot-path indexes created", expected <= indexes),
+        ("superseded indexes dropped", not indexes & set(m0002_keyset_pagination_indexes.SUPERSEDED_INDEXES)),
+        ("re-running is a no-op", run_migrations(engine) == []),
+    ]
+    for label, passed in checks:
+        print(f"{'✅' if passed else '❌'} migration: {label}")
+    return all(passed for _, passed in checks)
+
+
+def main(verbose: bool) -> int:
+    if os.path.exists(CHECK_DATABASE_FILE):
+        os.remove(CHECK_DATABASE_FILE)
+    create_db_and_tables()
+
+    ok = check_hot_paths(verbose)
+    ok = check_migration_upgrade() and ok
+    print("\nAll query plans use indexes." if ok else "\nQuery plan regressions found.")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail if a hot query regresses to a full table scan.")
+    parser.add_argument("--verbose", action="store_true", help="Print full SQL for regressions")
+    args = parser.parse_args()
+    sys.exit(main(args.verbose))
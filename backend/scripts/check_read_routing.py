@@ -0,0 +1,108 @@
+"""
+Check read/write session routing against a primary and a "replica" SQLite file.
+
+The replica is a copy of the primary taken after seeding; the primary is then
+changed, so every response shows which database served it. Fails (exit code 1)
+unless the read-only routes are served by the replica, write routes and
+cache fills (the /users/me dashboard, the catalog snapshot) by the primary,
+a routed session stays on the primary once it has written, and the pool
+settings reach both engines.
+
+Usage: python -m backend.scripts.check_read_routing
+"""
+import os
+import tempfile
+
+# Throwaway databases, pools and secret; must be set before backend modules are imported
+PRIMARY_FILE = os.path.join(tempfile.gettempdir(), "check_read_routing_primary.db")
+REPLICA_FILE = os.path.join(tempfile.gettempdir(), "check_read_routing_replica.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{PRIMARY_FILE}"
+os.environ["DATABASE_READ_URL"] = f"sqlite:///{REPLICA_FILE}"
+os.environ["DB_POOL_SIZE"] = "7"
+os.environ["DB_READ_POOL_SIZE"] = "3"
+os.environ["DB_MAX_OVERFLOW"] = "2"
+os.environ.setdefault("SECRET_KEY", "check-secret")
+
+from datetime import datetime, timedelta
+import shutil
+import sys
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from backend.main import app
+from backend.routes import challenges as challenge_routes
+from backend.db import RoutingSession, create_db_and_tables, engine, read_engine
+from backend.models import Challenge, User, UserChallenge
+from backend.utils.security import create_access_token
+
+
+def seed() -> tuple:
+    with Session(engine) as session:
+        user = User(strava_athlete_id=1, username="replica-name")
+        challenge = Challenge(name="Replica Challenge", tier="Sprint", type="solo", sport="running", distance_target_km=5,
+                              start_date=datetime.utcnow(), end_date=datetime.utcnow() + timedelta(days=7))
+        session.add_all([user, challenge])
+        session.commit()
+        session.add(UserChallenge(user_id=user.id, challenge_id=challenge.id))
+        session.commit()
+        return user.id, challenge.id
+
+
+def diverge_primary(user_id: int, challenge_id: int) -> int:
+    with Session(engine) as session:
+        session.get(User, user_id).username = "primary-name"
+        session.get(Challenge, challenge_id).name = "Primary Challenge"
+        joinable = Challenge(name="Joinable", tier="Sprint", type="solo", sport="running", distance_target_km=5,
+                             start_date=datetime.utcnow(), end_date=datetime.utcnow() + timedelta(days=7))
+        session.add(joinable)
+        session.commit()
+        return joinable.id
+
+
+def main() -> int:
+    for path in (PRIMARY_FILE, REPLICA_FILE):
+        if os.path.exists(path):
+            os.remove(path)
+    create_db_and_tables()
+    user_id, challenge_id = seed()
+    shutil.copyfile(PRIMARY_FILE, REPLICA_FILE)
+    joinable_id = diverge_primary(user_id, challenge_id)
+
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token({'user_id': user_id})}"}
+
+    catalog = [challenge["name"] for challenge in client.get("/challenges/").json()]
+    challenge_routes.CHALLENGE_CATALOG_SNAPSHOT = False
+    catalog_from_database = [challenge["name"] for challenge in client.get("/challenges/").json()]
+    challenge_routes.CHALLENGE_CATALOG_SNAPSHOT = True
+    mine = client.get("/challenges/my", headers=headers).json()
+    me = client.get("/users/me", headers=headers).json()
+    # The new challenge only exists on the primary, so joining proves writes go there
+    joined = client.post(f"/challenges/{joinable_id}/join", headers=headers)
+
+    with RoutingSession() as session:
+        before_write = session.exec(select(User.username).where(User.id == user_id)).one()
+        session.get(User, user_id).momentum += 1
+        session.flush()
+        after_write = session.exec(select(User.username).where(User.id == user_id)).one()
+        pinned = session.pinned_to_primary
+        session.rollback()
+
+    checks = [
+        ("/challenges/ snapshot is loaded from the primary", catalog == ["Joinable", "Primary Challenge"]),
+        ("/challenges/ without the snapshot reads the replica", catalog_from_database == ["Replica Challenge"]),
+        ("/challenges/my reads the replica", [uc["challenge"]["name"] for uc in mine] == ["Replica Challenge"]),
+        ("/users/me dashboard is loaded from the primary", me.get("username") == "primary-name"),
+        ("join writes to the primary", joined.status_code == 200 and joined.json().get("message") == "Challenge joined"),
+        ("routed session reads the replica before writing", before_write == "replica-name"),
+        ("routed session is pinned to the primary after a write", pinned and after_write == "primary-name"),
+        ("primary pool settings applied", engine.pool.size() == 7 and engine.pool._max_overflow == 2),
+        ("read pool settings applied", read_engine.pool.size() == 3 and read_engine.pool._max_overflow == 2),
+    ]
+    for label, ok in checks:
+        print(f"{'✅' if ok else '❌'} {label}")
+    return 0 if all(ok for _label, ok in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
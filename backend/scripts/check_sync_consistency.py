@@ -0,0 +1,209 @@
+"""
+Consistency checks for the paths that change a user's progress concurrently:
+full syncs (sync jobs) and webhook events.
+
+- A sync applied with a user loaded before its Strava fetch keeps progress
+  committed by a webhook event during the fetch.
+- Webhook events and sync jobs for one user are never claimed to run at the
+  same time; other users' work is claimed meanwhile.
+- Webhook activities don't move the full-sync fetch window, so a later full
+  sync still fetches what webhooks missed.
+- Update and delete events revise the stored activity and reverse the
+  distance and XP it added.
+
+Exits non-zero if any check fails.
+
+Usage: python -m backend.scripts.check_sync_consistency
+"""
+import os
+import tempfile
+
+# Throwaway database and secret; must be set before backend modules are imported
+CHECK_DATABASE_FILE = os.path.join(tempfile.gettempdir(), "check_sync_consistency.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{CHECK_DATABASE_FILE}"
+os.environ.setdefault("SECRET_KEY", "check-secret")
+
+from datetime import datetime, timedelta
+from typing import Callable, List, Tuple
+import asyncio
+import sys
+from sqlmodel import Session, select
+
+from backend.db import create_db_and_tables, engine
+from backend.models import Activity, Challenge, StravaEvent, StravaEventStatus, SyncJob, SyncJobStatus, User, UserChallenge
+from backend.services.activity_store import SYNC_LOOKBACK_HOURS, sync_cursor
+from backend.services.strava_events import claim_next_event, finish_event, process_event
+from backend.services.sync import apply_activity_sync, revise_activity
+from backend.services.sync_jobs import claim_next_job, finish_job
+
+
+def run(strava_id: int, km: float, days_ago: float = 1) -> dict:
+    start = datetime.utcnow() - timedelta(days=days_ago)
+    return {"id": strava_id, "type": "Run", "distance": km * 1000, "start_date": start.isoformat() + "Z"}
+
+
+def new_user(athlete_id: int, **fields) -> int:
+    with Session(engine) as session:
+        user = User(strava_athlete_id=athlete_id, username=f"runner{athlete_id}", **fields)
+        session.add(user)
+        session.commit()
+        return user.id
+
+
+def check_no_lost_update() -> List[Tuple[str, bool]]:
+    user_id = new_user(1)
+
+    # What run_user_sync does: load the user, then release the session for the fetch
+    job_session = Session(engine)
+    stale_user = job_session.get(User, user_id)
+    job_session.close()
+
+    # A webhook event commits a 5 km run meanwhile
+    with Session(engine) as session:
+        apply_activity_sync(session.get(User, user_id), [run(101, 5)], session, advance_cursor=False)
+
+    # The job then applies its own 10 km run with the user it loaded earlier
+    apply_activity_sync(stale_user, [run(102, 10)], job_session)
+    job_session.close()
+
+    with Session(engine) as session:
+        user = session.get(User, user_id)
+        return [(f"sync after a concurrent webhook commit keeps both (xp {user.xp}, {user.total_distance_km} km)",
+                 user.xp == 150 and user.total_distance_km == 15.0)]
+
+
+def check_per_user_serialization() -> List[Tuple[str, bool]]:
+    busy_id, idle_id = new_user(11), new_user(12)
+    with Session(engine) as session:
+        running = SyncJob(user_id=busy_id, status=SyncJobStatus.RUNNING, started_at=datetime.utcnow())
+        busy_event = StravaEvent(object_type="activity", object_id=1, aspect_type="create", owner_id=11)
+        idle_event = StravaEvent(object_type="activity", object_id=2, aspect_type="create", owner_id=12)
+        session.add_all([running, busy_event])
+        session.commit()
+        session.add(idle_event)  # queued after the busy user's event
+        session.commit()
+        running_id, busy_event_id, idle_event_id = running.id, busy_event.id, idle_event.id
+
+    results = [("an event waits while its user's sync job runs; other users' events don't",
+                claim_next_event() == idle_event_id)]
+    finish_event(idle_event_id, StravaEventStatus.PROCESSED)
+    finish_job(running_id, SyncJobStatus.SUCCEEDED)
+    results.append(("the event is claimed once the job finishes", claim_next_event() == busy_event_id))
+
+    # busy_event is now processing: a second event and a new job for that user wait
+    with Session(engine) as session:
+        second_event = StravaEvent(object_type="activity", object_id=3, aspect_type="create", owner_id=11)
+        job = SyncJob(user_id=busy_id)
+        session.add_all([second_event, job])
+        session.commit()
+        second_event_id, job_id = second_event.id, job.id
+    results.append(("a job and a second event wait while the user's event is processed",
+                    claim_next_job() is None and claim_next_event() is None))
+    finish_event(busy_event_id, StravaEventStatus.PROCESSED)
+    results.append(("then the job is claimed, and the event waits for it", claim_next_job() == job_id and claim_next_event() is None))
+    finish_job(job_id, SyncJobStatus.SUCCEEDED)
+    results.append(("and the event after the job", claim_next_event() == second_event_id))
+    finish_event(second_event_id, StravaEventStatus.PROCESSED)
+    return results
+
+
+def check_sync_cursor() -> List[Tuple[str, bool]]:
+    last_full_sync = datetime.utcnow() - timedelta(days=10)
+    legacy_id = new_user(21, last_sync_at=last_full_sync)
+    user_id = new_user(22, last_sync_at=last_full_sync)
+
+    with Session(engine) as session:
+        legacy_cursor = sync_cursor(session.get(User, legacy_id), session)
+        # Stored by the last full sync, then a webhook run from an hour ago
+        apply_activity_sync(session.get(User, user_id), [run(2201, 5, days_ago=12)], session, advance_cursor=False)
+        apply_activity_sync(session.get(User, user_id), [run(2202, 5, days_ago=1 / 24)], session, advance_cursor=False)
+        user = session.get(User, user_id)
+        cursor = sync_cursor(user, session)
+
+    expected = max(last_full_sync - timedelta(hours=SYNC_LOOKBACK_HOURS), datetime.utcnow() - timedelta(days=12))
+    return [
+        ("no stored activities: fetch from the last full sync", legacy_cursor == last_full_sync),
+        ("webhook activities leave last_sync_at alone", user.last_sync_at == last_full_sync),
+        ("cursor follows the last full sync, not the newest webhook activity",
+         abs((cursor - expected).total_seconds()) < 60),
+    ]
+
+
+def check_update_and_delete() -> List[Tuple[str, bool]]:
+    user_id = new_user(31)
+    with Session(engine) as session:
+        now = datetime.utcnow()
+        challenge = Challenge(name="Sprint", tier="Sprint", type="solo", sport="running", distance_target_km=50,
+                              start_date=now - timedelta(days=5), end_date=now + timedelta(days=5))
+        session.add(challenge)
+        session.commit()
+        session.add(UserChallenge(user_id=user_id, challenge_id=challenge.id, joined_at=now - timedelta(days=1)))
+        session.commit()
+        apply_activity_sync(session.get(User, user_id), [run(3101, 10)], session, advance_cursor=False)
+
+    def state():
+        with Session(engine) as session:
+            user = session.get(User, user_id)
+            uc = session.exec(select(UserChallenge).where(UserChallenge.user_id == user_id)).one()
+            stored = session.exec(select(Activity).where(Activity.strava_activity_id == 3101)).first()
+            return round(user.xp, 6), user.total_distance_km, uc.distance_completed_km, stored
+
+    # 10 km: 100 base XP + 140 Sprint challenge XP
+    applied = state()
+    with Session(engine) as session:
+        revise_activity(user_id, 3101, run(3101, 4), session)
+    shortened = state()
+    with Session(engine) as session:
+        revise_activity(user_id, 3101, {**run(3101, 4), "type": "Ride"}, session)
+    retyped = state()
+
+    with Session(engine) as session:
+        delete = StravaEvent(object_type="activity", object_id=3101, aspect_type="delete", owner_id=31)
+        unknown = StravaEvent(object_type="activity", object_id=9999, aspect_type="delete", owner_id=31)
+        session.add_all([delete, unknown])
+        session.commit()
+        delete_id, unknown_id = delete.id, unknown.id
+    with Session(engine) as session:
+        revise_activity(user_id, 3101, run(3101, 4), session)  # back to a 4 km run before the delete
+    asyncio.run(process_event(delete_id))
+    asyncio.run(process_event(unknown_id))
+    deleted = state()
+    with Session(engine) as session:
+        statuses = (session.get(StravaEvent, delete_id).status, session.get(StravaEvent, unknown_id).status)
+
+    return [
+        (f"10 km run applied (xp {applied[0]}, {applied[1]} km, challenge {applied[2]} km)", applied[:3] == (240, 10.0, 10.0)),
+        (f"update to 4 km reverses the difference (xp {shortened[0]})",
+         shortened[:3] == (96, 4.0, 4.0) and shortened[3].distance_km == 4.0),
+        (f"update to a ride removes it from progress (xp {retyped[0]})", retyped[:3] == (0, 0.0, 0.0) and retyped[3].type == "Ride"),
+        (f"delete event removes the activity and its progress (xp {deleted[0]})", deleted == (0, 0.0, 0.0, None)),
+        ("delete of an activity never stored is ignored",
+         statuses == (StravaEventStatus.PROCESSED, StravaEventStatus.IGNORED)),
+    ]
+
+
+CHECKS: List[Callable[[], List[Tuple[str, bool]]]] = [
+    check_no_lost_update,
+    check_per_user_serialization,
+    check_sync_cursor,
+    check_update_and_delete,
+]
+
+
+def main() -> int:
+    if os.path.exists(CHECK_DATABASE_FILE):
+        os.remove(CHECK_DATABASE_FILE)
+    create_db_and_tables()
+
+    ok = True
+    for check in CHECKS:
+        for label, passed in check():
+            ok = ok and passed
+            print(f"{'✅' if passed else '❌'} {label}")
+
+    print("\nSync paths are consistent." if ok else "\nSync consistency checks failed.")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
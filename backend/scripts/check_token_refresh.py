@@ -0,0 +1,153 @@
+"""
+Check Strava token handling against the local mock Strava server:
+
+1. Concurrent syncs for one user with an expired token share a single refresh.
+2. The proactive pass renews every soon-to-expire token in bulk, after which
+   a sync makes no token request at all.
+3. Refresh tokens Strava rejects are backed off instead of filling every
+   batch, and inactive users aren't refreshed ahead.
+
+Exits non-zero if any check fails.
+
+Usage: python -m backend.scripts.check_token_refresh [--concurrent 50] [--users 200] [--latency-ms 100]
+"""
+import os
+import tempfile
+
+# Throwaway database and secret; must be set before backend modules are imported
+CHECK_DATABASE_FILE = os.path.join(tempfile.gettempdir(), "check_token_refresh.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{CHECK_DATABASE_FILE}"
+os.environ.setdefault("SECRET_KEY", "check-secret")
+
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import sys
+import time
+from sqlmodel import Session, select
+
+from backend.db import create_db_and_tables, engine
+from backend.models.user import User
+from backend.services import strava_service, strava_tokens
+from backend.services.strava_async import async_fetch_user_activities, close_async_client
+from backend.services.strava_tokens import token_manager
+from backend.scripts.mock_strava import MockStravaServer, generate_activities
+
+
+def seed_users(count: int, expires_in: timedelta, first_athlete_id: int, **fields) -> list:
+    with Session(engine) as session:
+        users = [
+            User(
+                strava_athlete_id=first_athlete_id + i,
+                access_token=f"stale-{i}",
+                refresh_token=f"refresh-{first_athlete_id + i}",
+                token_expires_at=datetime.utcnow() + expires_in,
+                **fields,
+            )
+            for i in range(count)
+        ]
+        session.add_all(users)
+        session.commit()
+        return [user.id for user in users]
+
+
+def load_users(user_ids: list) -> list:
+    with Session(engine) as session:
+        users = session.exec(select(User).where(User.id.in_(user_ids))).all()
+        session.expunge_all()
+        return users
+
+
+async def check_single_flight(server: MockStravaServer, concurrent: int) -> bool:
+    [user_id] = seed_users(1, expires_in=timedelta(hours=-1), first_athlete_id=1)
+    # Every caller holds its own copy of the user, as separate requests/jobs would
+    users = [load_users([user_id])[0] for _ in range(concurrent)]
+
+    server.reset_counters()
+    start = time.perf_counter()
+    await asyncio.gather(*(async_fetch_user_activities(user) for user in users))
+    elapsed = time.perf_counter() - start
+
+    ok = server.token_requests == 1
+    print(f"{'✅' if ok else '❌'} {concurrent} concurrent syncs, expired token: "
+          f"{server.token_requests} token request(s), {elapsed * 1000:.0f} ms")
+    return ok
+
+
+async def check_proactive(server: MockStravaServer, user_count: int) -> bool:
+    user_ids = seed_users(user_count, expires_in=timedelta(minutes=10), first_athlete_id=2)
+
+    server.reset_counters()
+    start = time.perf_counter()
+    summary = await token_manager.refresh_expiring_tokens()
+    elapsed = time.perf_counter() - start
+    with Session(engine) as session:
+        saved = session.exec(select(User.id).where(
+            User.id.in_(user_ids), User.token_expires_at > datetime.utcnow() + timedelta(hours=1)
+        )).all()
+    refreshed_ok = summary["refreshed"] == user_count and server.token_requests == user_count and len(saved) == user_count
+    print(f"{'✅' if refreshed_ok else '❌'} Proactive pass: {summary} in {elapsed * 1000:.0f} ms, {len(saved)} tokens saved")
+
+    server.reset_counters()
+    users = load_users(user_ids[:10])
+    start = time.perf_counter()
+    await asyncio.gather(*(async_fetch_user_activities(user) for user in users))
+    elapsed = time.perf_counter() - start
+    sync_ok = server.token_requests == 0
+    print(f"{'✅' if sync_ok else '❌'} {len(users)} syncs after the pass: "
+          f"{server.token_requests} token request(s), {elapsed * 1000:.0f} ms")
+    return refreshed_ok and sync_ok
+
+
+async def check_backoff(server: MockStravaServer, batch_size: int) -> bool:
+    # A full batch of revoked tokens expiring before everyone else's
+    revoked = seed_users(batch_size, expires_in=timedelta(hours=-1), first_athlete_id=10_000)
+    live = seed_users(5, expires_in=timedelta(minutes=10), first_athlete_id=20_000)
+    seed_users(5, expires_in=timedelta(minutes=10), first_athlete_id=30_000,
+               last_sync_at=datetime.utcnow() - timedelta(days=strava_tokens.STRAVA_TOKEN_REFRESH_ACTIVE_DAYS + 1))
+    server.revoked_refresh_tokens = {f"refresh-{10_000 + i}" for i in range(batch_size)}
+    strava_tokens.STRAVA_TOKEN_REFRESH_BATCH_SIZE = batch_size
+
+    server.reset_counters()
+    first = await token_manager.refresh_expiring_tokens()
+    second = await token_manager.refresh_expiring_tokens()
+    ok = first == {"refreshed": 0, "failed": len(revoked)} and second == {"refreshed": len(live), "failed": 0}
+    print(f"{'✅' if ok else '❌'} Revoked tokens back off: first pass {first}, second pass {second}")
+
+    server.reset_counters()
+    third = await token_manager.refresh_expiring_tokens()
+    idle_ok = third == {"refreshed": 0, "failed": 0} and server.token_requests == 0
+    print(f"{'✅' if idle_ok else '❌'} Backed-off and inactive users are skipped: {third}, "
+          f"{server.token_requests} token request(s)")
+    return ok and idle_ok
+
+
+async def run_checks(server: MockStravaServer, concurrent: int, user_count: int) -> bool:
+    try:
+        return (await check_single_flight(server, concurrent) & await check_proactive(server, user_count)
+                & await check_backoff(server, batch_size=20))
+    finally:
+        await close_async_client()
+
+
+def main(concurrent: int, user_count: int, latency_ms: float) -> int:
+    if os.path.exists(CHECK_DATABASE_FILE):
+        os.remove(CHECK_DATABASE_FILE)
+    create_db_and_tables()
+
+    with MockStravaServer(generate_activities(50), latency_ms=latency_ms) as server:
+        strava_service.STRAVA_API_URL = server.api_url
+        strava_service.STRAVA_TOKEN_URL = server.token_url
+        ok = asyncio.run(run_checks(server, concurrent, user_count))
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check single-flight and proactive Strava token refresh.")
+    parser.add_argument("--concurrent", type=int, default=50)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    sys.exit(main(args.concurrent, args.users, args.latency_ms))
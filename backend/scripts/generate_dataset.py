@@ -0,0 +1,356 @@
+"""
+Generate a large synthetic dataset for load testing, with bulk Core inserts.
+
+Creates a challenge catalog, the badge and title catalogs, then users with
+their activities, challenge participations, badges and titles. Distributions
+follow real usage loosely: activity counts per user have a long tail, runs
+dominate, a few challenges are far more popular than the rest, and XP,
+levels and awards are derived from the generated progress with the app's
+own rules.
+
+Users are generated in fixed-size chunks, one transaction per chunk, and
+rows are sent as batched executemany INSERTs. With --workers, chunks are
+built in parallel processes (on SQLite the inserts stay in one process,
+since it takes one writer at a time). Each chunk is seeded from --seed and
+its chunk number, so the same --seed and --end-date give the same data
+for any --workers.
+Rows are appended after the highest existing ids, so the generator can
+also top up an existing database.
+
+Writes to DATABASE_URL (SQLITE_MODE=production speeds up SQLite runs).
+
+Usage: python -m backend.scripts.generate_dataset [--users 100000] [--activities-per-user 100]
+       [--challenges 200] [--joins-per-user 4] [--days 365] [--chunk-size 2000] [--batch-size 5000]
+       [--workers 1] [--seed 1] [--end-date YYYY-MM-DD]
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Tuple
+import argparse
+import json
+import random
+import time
+from sqlalchemy import func, select
+
+from backend.db import create_db_and_tables, engine
+from backend.models import (
+    Activity, Badge, BadgeCategory, Challenge, Title, TitleRarity, User, UserBadge, UserChallenge, UserTitle,
+)
+from backend.services.progress import CHALLENGE_GOALS, TIER_XP_MULTIPLIERS, calculate_base_xp, calculate_level
+
+TIERS = ("Sprint", "Marathon", "Ultra", "Trailblazer")
+# Activity type -> (weight, median km, spread, seconds per km)
+ACTIVITY_TYPES = {
+    "Run": (0.6, 7.0, 0.45, 330),
+    "Ride": (0.25, 30.0, 0.5, 120),
+    "Walk": (0.15, 4.0, 0.4, 720),
+}
+DISTANCE_BADGES_KM = (10, 50, 100, 250, 500, 1000)
+STREAK_BADGES_DAYS = (3, 7, 14, 30)
+COMPLETION_TITLES = (1, 5, 10, 25)
+# Strava activity ids reserved per user; activity counts are capped below this
+ACTIVITY_ID_STRIDE = 10_000
+
+
+class Catalog(NamedTuple):
+    challenges: List[Tuple[int, str, float]]  # (id, tier, distance target km)
+    challenge_weights: List[float]
+    distance_badges: List[Tuple[float, int]]  # (km, badge id)
+    streak_badges: List[Tuple[int, int]]  # (days, badge id)
+    tier_badges: Dict[str, int]
+    completion_titles: List[Tuple[int, int]]  # (count, title id)
+    all_tiers_title: int
+
+
+class Bases(NamedTuple):
+    # Highest ids already in the database; generated rows start after them
+    user_id: int
+    athlete_id: int
+    strava_activity_id: int
+
+
+def insert_batched(connection, table, rows: List[dict], batch_size: int) -> None:
+    for start in range(0, len(rows), batch_size):
+        connection.execute(table.insert(), rows[start:start + batch_size])
+
+
+# --- Catalogs ---
+def create_catalog(challenge_count: int, days: int, seed: int, now: datetime) -> Catalog:
+    """
+    Insert the challenges, badges and titles, returning what the user chunks need.
+    """
+    rng = random.Random(f"{seed}:catalog")
+    challenges = []
+    for i in range(challenge_count):
+        tier = TIERS[i % len(TIERS)]
+        start_date = now - timedelta(days=rng.randint(0, days))
+        challenges.append({
+            "name": f"{tier} Challenge {i + 1}",
+            "tier": tier,
+            "type": rng.choice(["solo", "solo", "group"]),
+            "sport": "running",
+            "distance_target_km": CHALLENGE_GOALS[tier],
+            "start_date": start_date,
+            "end_date": start_date + timedelta(days=rng.choice([7, 14, 30, 60])),
+            "active": rng.random() < 0.8,
+            "created_at": start_date,
+        })
+    badges = [
+        *({"name": f"{km} km Club", "description": f"Run {km} km in total", "category": BadgeCategory.DISTANCE,
+           "requirements": json.dumps({"type": "distance", "distance_required": km})} for km in DISTANCE_BADGES_KM),
+        *({"name": f"{days}-Day Streak", "description": f"Run {days} days in a row", "category": BadgeCategory.STREAK,
+           "requirements": json.dumps({"type": "streak", "threshold": days})} for days in STREAK_BADGES_DAYS),
+        *({"name": f"{tier} Finisher", "description": f"Complete a {tier} challenge", "category": BadgeCategory.CHALLENGE,
+           "requirements": json.dumps({"type": "challenge_tier", "tier": tier})} for tier in TIERS),
+    ]
+    titles = [
+        *({"name": f"{count}x Finisher", "description": f"Complete {count} challenges", "rarity": rarity,
+           "requirements": json.dumps({"type": "challenge_completion", "count": count})}
+          for count, rarity in zip(COMPLETION_TITLES, (TitleRarity.COMMON, TitleRarity.UNCOMMON, TitleRarity.RARE, TitleRarity.EPIC))),
+        {"name": "Completionist", "description": "Complete every tier", "rarity": TitleRarity.LEGENDARY,
+         "requirements": json.dumps({"type": "all_tiers_completed", "tiers": list(TIERS)})},
+    ]
+    for row in (*badges, *titles):
+        row["created_at"] = now
+
+    with engine.begin() as connection:
+        first = {
+            table: connection.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar() + 1
+            for table in (Challenge.__table__, Badge.__table__, Title.__table__)
+        }
+        for table, rows in ((Challenge.__table__, challenges), (Badge.__table__, badges), (Title.__table__, titles)):
+            for offset, row in enumerate(rows):
+                row["id"] = first[table] + offset
+            connection.execute(table.insert(), rows)
+
+    badge_ids = iter(row["id"] for row in badges)
+    title_ids = iter(row["id"] for row in titles)
+    return Catalog(
+        challenges=[(row["id"], row["tier"], row["distance_target_km"]) for row in challenges],
+        # Zipf-like popularity: the first challenges draw most participants
+        challenge_weights=[1 / (rank + 1) for rank in range(len(challenges))],
+        distance_badges=[(km, next(badge_ids)) for km in DISTANCE_BADGES_KM],
+        streak_badges=[(days, next(badge_ids)) for days in STREAK_BADGES_DAYS],
+        tier_badges={tier: next(badge_ids) for tier in TIERS},
+        completion_titles=[(count, next(title_ids)) for count in COMPLETION_TITLES],
+        all_tiers_title=next(title_ids),
+    )
+
+
+def current_bases() -> Bases:
+    with engine.connect() as connection:
+        return Bases(
+            user_id=connection.execute(select(func.coalesce(func.max(User.id), 0))).scalar(),
+            athlete_id=connection.execute(select(func.coalesce(func.max(User.strava_athlete_id), 0))).scalar(),
+            strava_activity_id=connection.execute(select(func.coalesce(func.max(Activity.strava_activity_id), 0))).scalar(),
+        )
+
+
+# --- Users and everything they own ---
+def generate_user(index: int, rng: random.Random, catalog: Catalog, bases: Bases, options: dict, now: datetime) -> Dict[str, List[dict]]:
+    user_id = bases.user_id + index + 1
+    created_at = now - timedelta(days=options["days"], hours=rng.randint(0, 24 * 30))
+
+    # Long tail: most users log a few activities, some log hundreds
+    activity_count = min(int(rng.expovariate(1 / options["activities_per_user"])), ACTIVITY_ID_STRIDE - 1)
+    offsets = sorted(rng.uniform(0, options["days"] * 86_400) for _ in range(activity_count))
+    types = rng.choices(list(ACTIVITY_TYPES), weights=[spec[0] for spec in ACTIVITY_TYPES.values()], k=activity_count)
+    activities = []
+    run_days = set()
+    total_km = 0.0
+    for n, (offset, activity_type) in enumerate(zip(offsets, types)):
+        _weight, median_km, spread, seconds_per_km = ACTIVITY_TYPES[activity_type]
+        distance_km = round(median_km * rng.lognormvariate(0, spread), 2)
+        start_date = now - timedelta(days=options["days"]) + timedelta(seconds=offset)
+        activities.append({
+            "strava_activity_id": bases.strava_activity_id + (index + 1) * ACTIVITY_ID_STRIDE + n,
+            "user_id": user_id,
+            "name": f"{activity_type} {n + 1}",
+            "type": activity_type,
+            "distance_km": distance_km,
+            "moving_time": int(distance_km * seconds_per_km * rng.uniform(0.85, 1.2)),
+            "start_date": start_date,
+            "created_at": start_date,
+        })
+        if activity_type == "Run":
+            total_km += distance_km
+            run_days.add(start_date.date())
+
+    longest_streak = current = 0
+    previous = None
+    for day in sorted(run_days):
+        current = current + 1 if previous and day - previous == timedelta(days=1) else 1
+        longest_streak = max(longest_streak, current)
+        previous = day
+
+    joins = min(int(rng.expovariate(1 / options["joins_per_user"])) + 1, len(catalog.challenges)) if catalog.challenges else 0
+    joined = set()
+    while len(joined) < joins:
+        joined.update(rng.choices(range(len(catalog.challenges)), weights=catalog.challenge_weights, k=joins - len(joined)))
+    user_challenges = []
+    completed_tiers = []
+    xp = 0.0
+    for position in sorted(joined):
+        challenge_id, tier, target_km = catalog.challenges[position]
+        distance_km = round(min(target_km * rng.betavariate(1.5, 1.2) * 1.3, target_km * 1.5), 2)
+        completed = distance_km >= target_km
+        xp_earned = round(calculate_base_xp(distance_km, in_challenge=True) * TIER_XP_MULTIPLIERS[tier], 1)
+        joined_at = created_at + timedelta(days=rng.randint(0, options["days"]))
+        user_challenges.append({
+            "user_id": user_id,
+            "challenge_id": challenge_id,
+            "distance_completed_km": distance_km,
+            "streak": rng.randint(0, longest_streak) if longest_streak else 0,
+            "completed": completed,
+            "xp_earned": xp_earned,
+            "joined_at": joined_at,
+            "updated_at": joined_at,
+        })
+        xp += xp_earned
+        if completed:
+            completed_tiers.append(tier)
+
+    earned_badges = [
+        *(badge_id for km, badge_id in catalog.distance_badges if total_km >= km),
+        *(badge_id for days, badge_id in catalog.streak_badges if longest_streak >= days),
+        *(catalog.tier_badges[tier] for tier in set(completed_tiers)),
+    ]
+    earned_titles = [title_id for count, title_id in catalog.completion_titles if len(completed_tiers) >= count]
+    if set(TIERS) <= set(completed_tiers):
+        earned_titles.append(catalog.all_tiers_title)
+    last_activity = activities[-1]["start_date"] if activities else created_at
+
+    xp = int(xp)
+    return {
+        "user": [{
+            "id": user_id,
+            "strava_athlete_id": bases.athlete_id + index + 1,
+            "username": f"runner{bases.user_id + index + 1}",
+            "first_name": rng.choice(["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie"]),
+            "last_name": f"Runner {index + 1}",
+            "city": rng.choice(["Cape Town", "London", "Berlin", "Boston", "Tokyo", "Nairobi", None]),
+            "premium": rng.random() < 0.2,
+            "xp": xp,
+            "level": calculate_level(xp),
+            "momentum": rng.randint(0, 100),
+            "total_distance_km": round(total_km, 2),
+            "created_at": created_at,
+            "last_sync_at": last_activity,
+        }],
+        "activity": activities,
+        "userchallenge": user_challenges,
+        "userbadge": [{"user_id": user_id, "badge_id": badge_id, "earned_at": last_activity} for badge_id in earned_badges],
+        "usertitle": [
+            # The highest title earned is the active one
+            {"user_id": user_id, "title_id": title_id, "earned_at": last_activity, "is_active": n == len(earned_titles) - 1}
+            for n, title_id in enumerate(earned_titles)
+        ],
+    }
+
+
+TABLES = {
+    "user": User.__table__,
+    "activity": Activity.__table__,
+    "userchallenge": UserChallenge.__table__,
+    "userbadge": UserBadge.__table__,
+    "usertitle": UserTitle.__table__,
+}
+
+
+def build_chunk(chunk: int, first_index: int, size: int, catalog: Catalog, bases: Bases, options: dict) -> Dict[str, List[dict]]:
+    """
+    Rows for users [first_index, first_index + size), keyed by table.
+    """
+    rng = random.Random(f"{options['seed']}:{chunk}")
+    rows: Dict[str, List[dict]] = {name: [] for name in TABLES}
+    for index in range(first_index, first_index + size):
+        for name, user_rows in generate_user(index, rng, catalog, bases, options, options["now"]).items():
+            rows[name].extend(user_rows)
+    return rows
+
+
+def insert_chunk(rows: Dict[str, List[dict]], batch_size: int) -> Dict[str, int]:
+    """
+    Insert one chunk in a single transaction.
+    """
+    with engine.begin() as connection:
+        # Users first: every other table references them
+        for name, table in TABLES.items():
+            insert_batched(connection, table, rows[name], batch_size)
+    return {name: len(table_rows) for name, table_rows in rows.items()}
+
+
+def generate_chunk(chunk: int, first_index: int, size: int, catalog: Catalog, bases: Bases, options: dict) -> Dict[str, int]:
+    return insert_chunk(build_chunk(chunk, first_index, size, catalog, bases, options), options["batch_size"])
+
+
+def _init_worker() -> None:
+    # Forked workers must not share the parent's pooled connections
+    engine.dispose(close=False)
+
+
+def main(args: argparse.Namespace) -> None:
+    create_db_and_tables()
+    options = {
+        "seed": args.seed,
+        "days": args.days,
+        "activities_per_user": args.activities_per_user,
+        "joins_per_user": args.joins_per_user,
+        "batch_size": args.batch_size,
+        # End of the generated history; every worker dates rows from it
+        "now": datetime.strptime(args.end_date, "%Y-%m-%d"),
+    }
+    start = time.perf_counter()
+    bases = current_bases()
+    catalog = create_catalog(args.challenges, args.days, args.seed, options["now"])
+    chunks = [
+        (chunk, first_index, min(args.chunk_size, args.users - first_index))
+        for chunk, first_index in enumerate(range(0, args.users, args.chunk_size))
+    ]
+    print(f"Generating {args.users} users in {len(chunks)} chunks with {args.workers} worker(s), seed {args.seed}")
+
+    totals = {name: 0 for name in TABLES}
+    totals["challenge"] = len(catalog.challenges)
+
+    def record(counts: Dict[str, int], done: int) -> None:
+        for name, rows in counts.items():
+            totals[name] += rows
+        elapsed = time.perf_counter() - start
+        rows = sum(totals.values())
+        print(f"  chunk {done}/{len(chunks)}: {rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+
+    if args.workers > 1:
+        # SQLite takes one writer at a time: workers only build rows and this
+        # process inserts them; other databases insert from the workers
+        single_writer = engine.dialect.name == "sqlite"
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+            task = build_chunk if single_writer else generate_chunk
+            futures = [pool.submit(task, *chunk, catalog, bases, options) for chunk in chunks]
+            for done, future in enumerate(futures, start=1):
+                result = future.result()
+                record(insert_chunk(result, args.batch_size) if single_writer else result, done)
+    else:
+        for done, chunk in enumerate(chunks, start=1):
+            record(generate_chunk(*chunk, catalog, bases, options), done)
+
+    elapsed = time.perf_counter() - start
+    rows = sum(totals.values())
+    print(f"\n✅ {rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+    for name, count in totals.items():
+        print(f"   {name:<14} {count:>12,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic load-testing dataset.")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--activities-per-user", type=float, default=100, help="Mean; the distribution has a long tail")
+    parser.add_argument("--challenges", type=int, default=200)
+    parser.add_argument("--joins-per-user", type=float, default=4, help="Mean challenges joined per user")
+    parser.add_argument("--days", type=int, default=365, help="History length")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Users per transaction")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per INSERT batch")
+    parser.add_argument("--workers", type=int, default=1, help="Processes generating chunks in parallel")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--end-date", default=datetime.utcnow().strftime("%Y-%m-%d"),
+                        help="Last day of the history (YYYY-MM-DD); fix it to reproduce a dataset exactly")
+    main(parser.parse_args())
@@ -1,8 +1,8 @@
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 from backend.db import engine
 from backend.models.user import User
 from backend.models.user_challenge import UserChallenge
-from backend.models.challenge import Challenge
 import sys
 
 def list_user_challenges(user_id: int):
@@ -12,7 +12,11 @@ def list_user_challenges(user_id: int):
             print(f"User with ID {user_id} not found")
             return
 
-        ucs = session.exec(select(UserChallenge).where(UserChallenge.user_id == user_id)).all()
+        ucs = session.exec(
+            select(UserChallenge)
+            .where(UserChallenge.user_id == user_id)
+            .options(selectinload(UserChallenge.challenge))
+        ).all()
         if not ucs:
             print(f"No challenges found for user {user.username}")
             return
@@ -22,7 +26,7 @@ def list_user_challenges(user_id: int):
         print("------")
 
         for uc in ucs:
-            challenge = session.get(Challenge, uc.challenge_id)
+            challenge = uc.challenge
             print(f"UserChallenge ID: {uc.id}")
             print(f"  Challenge: {challenge.name if challenge else 'None'}")
             print(f"  Tier: {challenge.tier if challenge else 'None'}")
@@ -1,14 +1,15 @@
+from sqlalchemy.orm import selectinload
 from backend.db import engine
 from sqlmodel import Session, select
-from backend.models import User, UserChallenge, Challenge
+from backend.models import User
 
 def list_users():
     with Session(engine) as session:
-        users = session.exec(select(User)).all()
+        users = session.exec(select(User).options(selectinload(User.user_challenges))).all()
         for user in users:
             print(f"User: {user.username}, XP: {user.xp}, Momentum: {user.momentum}")
             # Optionally list challenges
-            for uc in getattr(user, "user_challenges", []):
+            for uc in user.user_challenges:
                 print(f"  Challenge ID: {uc.challenge_id}, Distance Completed: {uc.distance_completed_km} km")
 
 if __name__ == "__main__":
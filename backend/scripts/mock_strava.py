@@ -0,0 +1,251 @@
+"""
+Local stand-in for the Strava API, used by the benchmark scripts.
+
+Serves paginated /athlete/activities, single /activities/{id} lookups and
+the OAuth token endpoint with configurable latency, and counts requests
+and TCP connections so clients can verify connection reuse.
+
+Usage: python -m backend.scripts.mock_strava [--port 8765] [--activities 1000] [--latency-ms 50]
+"""
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set
+from urllib.parse import parse_qs, urlparse
+import argparse
+import json
+import random
+import socket
+import threading
+import time
+
+STRAVA_MAX_PAGE_SIZE = 200
+# Width of each athlete's id range when athlete_scoped_ids is on
+ATHLETE_ID_RANGE = 100_000_000
+
+
+def generate_activities(count: int, seed: int = 1, start: Optional[datetime] = None) -> List[dict]:
+    """
+    Build `count` Strava-shaped activities, one or two a day, oldest first.
+    """
+    rng = random.Random(seed)
+    start = start or datetime.utcnow() - timedelta(days=count)
+    activities = []
+    for i in range(count):
+        start_date = start + timedelta(days=i // 2, hours=rng.randint(5, 20))
+        activities.append({
+            "id": 10_000_000 + i,
+            "name": f"Activity {i}",
+            "type": rng.choice(["Run", "Run", "Run", "Ride", "Walk"]),
+            "distance": round(rng.uniform(2_000, 25_000), 1),
+            "moving_time": rng.randint(600, 9_000),
+            "start_date": start_date.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        })
+    return activities
+
+
+class MockStravaServer:
+    """
+    Threaded HTTP/1.1 server speaking the subset of the Strava API the app uses.
+    """
+
+    def __init__(
+        self,
+        activities: Optional[List[dict]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        max_page_size: int = STRAVA_MAX_PAGE_SIZE,
+        athlete_scoped_ids: bool = False,
+    ):
+        """
+        With athlete_scoped_ids, every access token sees the same activities
+        under its own id range, as if each athlete had uploaded them; otherwise
+        all tokens share one set of Strava ids.
+        """
+        self.athlete_scoped_ids = athlete_scoped_ids
+        self._id_offsets: Dict[str, int] = {}
+        self.activities = activities if activities is not None else generate_activities(500)
+        self.latency = latency_ms / 1000
+        self.max_page_size = max_page_size
+        self.requests = 0
+        self.connections = 0
+        self.token_requests = 0
+        # Refresh tokens the token endpoint rejects, as for a revoked grant
+        self.revoked_refresh_tokens: Set[str] = set()
+        self._counter_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def activities(self) -> List[dict]:
+        return self._activities
+
+    @activities.setter
+    def activities(self, activities: List[dict]) -> None:
+        self._activities = activities
+        self._start_timestamps = [
+            datetime.strptime(activity["start_date"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+            for activity in activities
+        ]
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.base_url}/api/v3"
+
+    @property
+    def token_url(self) -> str:
+        return f"{self.base_url}/oauth/token"
+
+    def reset_counters(self) -> None:
+        with self._counter_lock:
+            self.requests = 0
+            self.connections = 0
+            self.token_requests = 0
+
+    def _count(self, attribute: str) -> None:
+        with self._counter_lock:
+            setattr(self, attribute, getattr(self, attribute) + 1)
+
+    def start(self) -> "MockStravaServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockStravaServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    # --- Request handling ---
+    def activity_page(self, after: int, page: int, per_page: int) -> List[dict]:
+        per_page = min(per_page, self.max_page_size)
+        matching = [
+            activity for activity, start_ts in zip(self._activities, self._start_timestamps)
+            if start_ts > after
+        ] if after else self._activities
+        offset = (page - 1) * per_page
+        return matching[offset:offset + per_page]
+
+    def id_offset(self, authorization: Optional[str]) -> int:
+        if not self.athlete_scoped_ids:
+            return 0
+        with self._counter_lock:
+            return self._id_offsets.setdefault(authorization or "", len(self._id_offsets) * ATHLETE_ID_RANGE)
+
+    def token_response(self, code: Optional[str] = None) -> dict:
+        athlete_id = int(code) if code and code.isdigit() else 1
+        return {
+            "token_type": "Bearer",
+            "access_token": f"access-{athlete_id}-{time.time_ns()}",
+            "refresh_token": f"refresh-{athlete_id}",
+            "expires_at": int(time.time()) + 6 * 3600,
+            "athlete": {
+                "id": athlete_id,
+                "username": f"athlete{athlete_id}",
+                "firstname": "Mock",
+                "lastname": f"Athlete {athlete_id}",
+            },
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out in separate writes; don't let Nagle stall keep-alive clients
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                server._count("connections")
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _begin(self):
+                server._count("requests")
+                if server.latency:
+                    time.sleep(server.latency)
+                return urlparse(self.path)
+
+            def do_GET(self):
+                url = self._begin()
+                query = parse_qs(url.query)
+
+                if url.path.endswith("/athlete/activities"):
+                    page = server.activity_page(
+                        after=int(query.get("after", ["0"])[0]),
+                        page=int(query.get("page", ["1"])[0]),
+                        per_page=int(query.get("per_page", ["30"])[0]),
+                    )
+                    offset = server.id_offset(self.headers.get("Authorization"))
+                    if offset:
+                        page = [{**activity, "id": activity["id"] + offset} for activity in page]
+                    self._send_json(200, page)
+                elif "/activities/" in url.path:
+                    offset = server.id_offset(self.headers.get("Authorization"))
+                    activity_id = int(url.path.rsplit("/", 1)[-1]) - offset
+                    match = next((a for a in server.activities if a["id"] == activity_id), None)
+                    if match and offset:
+                        match = {**match, "id": match["id"] + offset}
+                    self._send_json(200 if match else 404, match or {"message": "Record Not Found"})
+                else:
+                    self._send_json(404, {"message": "Not Found"})
+
+            def do_POST(self):
+                url = self._begin()
+                length = int(self.headers.get("Content-Length") or 0)
+                form = parse_qs(self.rfile.read(length).decode())
+
+                if url.path.endswith("/oauth/token"):
+                    server._count("token_requests")
+                    if form.get("refresh_token", [None])[0] in server.revoked_refresh_tokens:
+                        self._send_json(400, {"message": "Bad Request", "errors": [{"field": "refresh_token", "code": "invalid"}]})
+                    else:
+                        self._send_json(200, server.token_response(form.get("code", [None])[0]))
+                else:
+                    self._send_json(404, {"message": "Not Found"})
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local mock Strava API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--activities", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--athlete-scoped-ids", action="store_true", help="Give each access token its own activity ids")
+    args = parser.parse_args()
+
+    mock = MockStravaServer(
+        activities=generate_activities(args.activities),
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        athlete_scoped_ids=args.athlete_scoped_ids,
+    )
+    print(f"Mock Strava listening on {mock.base_url} (API: {mock.api_url}, token: {mock.token_url})")
+    try:
+        mock.start()._thread.join()
+    except KeyboardInterrupt:
+        mock.stop()
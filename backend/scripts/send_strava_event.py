@@ -0,0 +1,69 @@
+"""
+Stand-in for Strava's webhook sender.
+
+Performs the subscription handshake and/or posts push events to a running
+app, e.g. with the app pointed at the mock Strava server:
+
+    STRAVA_API_URL=http://127.0.0.1:8765/api/v3 uvicorn backend.main:app
+    python -m backend.scripts.mock_strava --port 8765
+    python -m backend.scripts.send_strava_event --owner-id 1 --object-id 10000000 --count 5
+"""
+import argparse
+import secrets
+import time
+import requests
+
+
+def verify(app_url: str, verify_token: str) -> None:
+    challenge = secrets.token_hex(8)
+    response = requests.get(f"{app_url}/webhooks/strava", params={
+        "hub.mode": "subscribe",
+        "hub.verify_token": verify_token,
+        "hub.challenge": challenge,
+    }, timeout=5)
+    ok = response.status_code == 200 and response.json().get("hub.challenge") == challenge
+    print(f"{'✅' if ok else '❌'} Handshake: {response.status_code} {response.text}")
+
+
+def send_events(app_url: str, object_type: str, aspect_type: str, owner_id: int, first_object_id: int,
+                count: int, subscription_id: int, updates: dict) -> None:
+    start = time.perf_counter()
+    for i in range(count):
+        payload = {
+            "object_type": object_type,
+            "object_id": first_object_id + i,
+            "aspect_type": aspect_type,
+            "owner_id": owner_id,
+            "subscription_id": subscription_id,
+            "event_time": int(time.time()),
+            "updates": updates,
+        }
+        response = requests.post(f"{app_url}/webhooks/strava", json=payload, timeout=5)
+        print(f"{aspect_type} {object_type} {payload['object_id']}: {response.status_code} {response.text}")
+    elapsed = time.perf_counter() - start
+    print(f"Sent {count} events in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send Strava-style webhook events to the app.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the running app")
+    parser.add_argument("--verify-token", help="Run the subscription handshake with this token first")
+    parser.add_argument("--object-type", choices=["activity", "athlete"], default="activity")
+    parser.add_argument("--aspect", choices=["create", "update", "delete"], default="create")
+    parser.add_argument("--owner-id", type=int, help="Strava athlete id of the event owner")
+    parser.add_argument("--object-id", type=int, help="Activity (or athlete) id; incremented per event")
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--subscription-id", type=int, default=1)
+    parser.add_argument("--deauthorize", action="store_true", help="Send an athlete deauthorization event")
+    args = parser.parse_args()
+
+    if args.verify_token:
+        verify(args.url, args.verify_token)
+
+    if args.owner_id is not None:
+        if args.deauthorize:
+            send_events(args.url, "athlete", "update", args.owner_id, args.owner_id, 1,
+                        args.subscription_id, {"authorized": "false"})
+        else:
+            send_events(args.url, args.object_type, args.aspect, args.owner_id, args.object_id or 1,
+                        args.count, args.subscription_id, {})
@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+from typing import Iterable, List, NamedTuple, Optional, Union
+
+# Compact activity type codes; only runs count towards progress today
+ACTIVITY_OTHER = 0
+ACTIVITY_RUN = 1
+
+ACTIVITY_TYPE_CODES = {
+    "Run": ACTIVITY_RUN,
+}
+
+
+class NormalizedActivity(NamedTuple):
+    distance_km: float
+    start_ts: float
+    start_date: datetime  # naive UTC, like the rest of the models
+    type_code: int
+
+
+def parse_start_date(value: Union[str, datetime, None]) -> datetime:
+    """
+    Parse a Strava `start_date` (ISO 8601, usually with a trailing Z) into naive UTC.
+    """
+    if value is None:
+        return datetime.utcnow()
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def normalize_activity(activity: dict) -> NormalizedActivity:
+    """
+    Convert one raw Strava activity payload into a NormalizedActivity.
+    """
+    start_date = parse_start_date(activity.get("start_date"))
+    return NormalizedActivity(
+        distance_km=(activity.get("distance") or 0) / 1000,  # meters → km
+        start_ts=start_date.replace(tzinfo=timezone.utc).timestamp(),
+        start_date=start_date,
+        type_code=ACTIVITY_TYPE_CODES.get(activity.get("type"), ACTIVITY_OTHER),
+    )
+
+
+def normalize_activities(activities: Iterable[dict], type_code: Optional[int] = None) -> List[NormalizedActivity]:
+    """
+    Normalize a Strava activity payload once, sorted by start time.
+    Pass `type_code` to keep only activities of that type.
+    """
+    normalized = [normalize_activity(activity) for activity in activities]
+    if type_code is not None:
+        normalized = [activity for activity in normalized if activity.type_code == type_code]
+    normalized.sort(key=lambda activity: activity.start_ts)
+    return normalized
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from typing import Iterable, List
+import os
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+
+from ..models.activity import Activity
+from ..models.user import User
+from .activities import NormalizedActivity, normalize_activity
+
+# Re-fetch this far behind the newest stored activity to pick up late uploads
+SYNC_LOOKBACK_HOURS = float(os.getenv("SYNC_LOOKBACK_HOURS", "72"))
+# Rows per INSERT statement; keeps SQLite under its bound-parameter limit
+UPSERT_BATCH_SIZE = int(os.getenv("ACTIVITY_UPSERT_BATCH_SIZE", "500"))
+
+
+def _insert_ignoring_duplicates(session: Session):
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(Activity)
+    if dialect == "postgresql":
+        return postgresql.insert(Activity)
+    raise Exception(f"Activity upsert not supported on {dialect}")
+
+
+def insert_new_activities(user_id: int, activities: Iterable[dict], session: Session) -> List[NormalizedActivity]:
+    """
+    Store raw Strava activities, skipping any already stored (by Strava id),
+    and return only the newly inserted ones, normalized and sorted by start time.
+    Nothing is committed; the caller commits together with the progress it applies.
+    """
+    pending = {}  # Strava id -> (row, normalized); also drops repeats within the payload
+    for activity in activities:
+        normalized = normalize_activity(activity)
+        pending[activity["id"]] = ({
+            "strava_activity_id": activity["id"],
+            "user_id": user_id,
+            "name": activity.get("name"),
+            "type": activity.get("type"),
+            "distance_km": normalized.distance_km,
+            "moving_time": activity.get("moving_time"),
+            "start_date": normalized.start_date,
+            "created_at": datetime.utcnow(),
+        }, normalized)
+
+    strava_ids = list(pending)
+    inserted_ids = set()
+    for start in range(0, len(strava_ids), UPSERT_BATCH_SIZE):
+        batch = strava_ids[start:start + UPSERT_BATCH_SIZE]
+        # Skip the ids already stored (the common case for overlapping windows)
+        # with one indexed lookup; ON CONFLICT still covers concurrent inserts
+        stored = set(session.exec(
+            select(Activity.strava_activity_id).where(Activity.strava_activity_id.in_(batch))
+        ).all())
+        rows = [pending[strava_id][0] for strava_id in batch if strava_id not in stored]
+        if not rows:
+            continue
+
+        statement = (
+            _insert_ignoring_duplicates(session)
+            .on_conflict_do_nothing(index_elements=["strava_activity_id"])
+            .returning(Activity.strava_activity_id)
+        )
+        # executemany form: one cached statement, sent as multi-row INSERTs by SQLAlchemy
+        inserted_ids.update(session.exec(statement, params=rows).scalars())
+
+    inserted = [pending[strava_id][1] for strava_id in strava_ids if strava_id in inserted_ids]
+    inserted.sort(key=lambda activity: activity.start_ts)
+    return inserted
+
+
+def sync_cursor(user: User, session: Session) -> datetime:
+    """
+    Start of the next Strava fetch window.
+
+    The last full sync minus SYNC_LOOKBACK_HOURS, to pick up late uploads.
+    Only full syncs advance `last_sync_at` (webhook events apply with
+    advance_cursor=False), so anything a webhook missed is still inside the
+    window of the next full sync.
+
+    Never before the oldest stored activity, unless that is newer than the
+    last full sync: anything older was applied before activities were
+    persisted and must not be counted again. Users with no stored
+    activities fetch from `last_sync_at` itself.
+    """
+    last_full_sync = user.last_sync_at or user.created_at
+    oldest = session.exec(
+        select(func.min(Activity.start_date)).where(Activity.user_id == user.id)
+    ).one()
+
+    if oldest is None:
+        return last_full_sync
+    return max(last_full_sync - timedelta(hours=SYNC_LOOKBACK_HOURS), min(oldest, last_full_sync))
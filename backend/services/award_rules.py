@@ -0,0 +1,146 @@
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+import json
+import threading
+from sqlmodel import Session, select
+
+from ..models.badge import Badge, BadgeCategory
+from ..models.title import Title
+from ..utils.invalidation import on_commit
+
+
+@dataclass(frozen=True)
+class AwardRef:
+    id: int
+    name: str
+
+
+@dataclass
+class ThresholdRules:
+    """
+    Rules sorted by ascending threshold.
+    Every rule whose threshold is <= a value is met by that value.
+    """
+    thresholds: List[float] = field(default_factory=list)
+    awards: List[AwardRef] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, rules: Sequence[Tuple[float, AwardRef]]) -> "ThresholdRules":
+        ordered = sorted(rules, key=lambda rule: rule[0])
+        return cls(
+            thresholds=[threshold for threshold, _ in ordered],
+            awards=[award for _, award in ordered],
+        )
+
+    def met_by(self, value: float) -> List[AwardRef]:
+        return self.awards[:bisect_right(self.thresholds, value)]
+
+
+# The requirement type each badge category is evaluated by; badges of other
+# categories, or with another requirement type, are never awarded
+BADGE_RULE_TYPES: Dict[BadgeCategory, str] = {
+    BadgeCategory.DISTANCE: "distance",
+    BadgeCategory.STREAK: "streak",
+    BadgeCategory.CHALLENGE: "challenge_tier",
+}
+# The requirement types titles are evaluated by
+TITLE_RULE_TYPES = ("challenge_completion", "all_tiers_completed")
+
+
+@dataclass
+class AwardRuleIndex:
+    """
+    Badge and title requirements compiled into lookup structures.
+    """
+    distance_badges: ThresholdRules
+    streak_badges: ThresholdRules
+    tier_badges: Dict[str, List[AwardRef]]
+    completion_titles: ThresholdRules
+    tier_set_titles: List[Tuple[FrozenSet[str], AwardRef]]
+
+
+def compile_rule_index(badges: Sequence[Badge], titles: Sequence[Title]) -> AwardRuleIndex:
+    """
+    Parse every badge/title `requirements` blob once and index it by rule type.
+    """
+    distance_rules = []
+    streak_rules = []
+    tier_badges: Dict[str, List[AwardRef]] = {}
+
+    for badge in badges:
+        requirements = json.loads(badge.requirements)
+        if BADGE_RULE_TYPES.get(badge.category) != requirements["type"]:
+            continue
+        award = AwardRef(badge.id, badge.name)
+
+        if requirements["type"] == "distance":
+            distance_rules.append((requirements["distance_required"], award))
+        elif requirements["type"] == "streak":
+            streak_rules.append((requirements["threshold"], award))
+        else:
+            tier_badges.setdefault(requirements["tier"], []).append(award)
+
+    completion_rules = []
+    tier_set_titles = []
+
+    for title in titles:
+        requirements = json.loads(title.requirements)
+        award = AwardRef(title.id, title.name)
+
+        if requirements["type"] == "challenge_completion":
+            completion_rules.append((requirements["count"], award))
+        elif requirements["type"] == "all_tiers_completed":
+            tier_set_titles.append((frozenset(requirements["tiers"]), award))
+
+    return AwardRuleIndex(
+        distance_badges=ThresholdRules.build(distance_rules),
+        streak_badges=ThresholdRules.build(streak_rules),
+        tier_badges=tier_badges,
+        completion_titles=ThresholdRules.build(completion_rules),
+        tier_set_titles=tier_set_titles,
+    )
+
+
+# --- Process-wide index, rebuilt lazily after Badge/Title changes ---
+_lock = threading.Lock()
+_index: Optional[AwardRuleIndex] = None
+_generation = 0
+
+
+def get_rule_index(session: Session) -> AwardRuleIndex:
+    """
+    Return the compiled rule index, loading it through `session` if it
+    has not been built yet or was invalidated.
+    """
+    global _index
+
+    index = _index
+    if index is not None:
+        return index
+
+    with _lock:
+        if _index is not None:
+            return _index
+
+        generation = _generation
+        index = compile_rule_index(
+            session.exec(select(Badge)).all(),
+            session.exec(select(Title)).all(),
+        )
+        # Don't publish an index that was invalidated while it was being built
+        if generation == _generation:
+            _index = index
+        return index
+
+
+def invalidate_rule_index(*_args) -> None:
+    """
+    Drop the compiled index so the next evaluation reloads it.
+    """
+    global _index, _generation
+    _generation += 1
+    _index = None
+
+
+on_commit([Badge, Title], invalidate_rule_index, snapshot=lambda instance: None)
@@ -0,0 +1,170 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Union
+import json
+import time
+from sqlalchemy import and_, distinct, exists, func, literal, true
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+
+from ..models.user import User
+from ..models.challenge import Challenge
+from ..models.user_challenge import UserChallenge
+from ..models.badge import Badge
+from ..models.title import Title
+from ..models.user_badge import UserBadge
+from ..models.user_title import UserTitle
+from .award_rules import BADGE_RULE_TYPES, TITLE_RULE_TYPES
+from .user_dashboard import invalidate_all_dashboards
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+@dataclass
+class BackfillResult:
+    kind: str
+    award_id: int
+    name: str
+    inserted: int
+    chunks: int
+    elapsed_seconds: float
+
+
+def award_requirements(award: Union[Badge, Title]) -> dict:
+    """
+    The award's parsed `requirements`, if award_badges_and_titles evaluates
+    them: badges by the rule type of their category, titles by completion
+    count or tier set. Anything else is never awarded, so it can't be
+    backfilled either.
+    """
+    requirements = json.loads(award.requirements)
+    rule = requirements.get("type")
+    if isinstance(award, Badge):
+        if BADGE_RULE_TYPES.get(award.category) != rule:
+            category = getattr(award.category, "value", award.category)
+            raise ValueError(f"Badges of category {category!r} are not awarded for requirement type {rule!r}")
+    elif rule not in TITLE_RULE_TYPES:
+        raise ValueError(f"Titles are not awarded for requirement type {rule!r}")
+    return requirements
+
+
+def eligibility_clause(requirements: dict):
+    """
+    Translate a badge/title `requirements` dict into a SQL condition on User.
+    Mirrors the rules evaluated per user in award_badges_and_titles; check
+    the award with award_requirements first.
+    """
+    rule = requirements["type"]
+
+    if rule == "distance":
+        return User.total_distance_km >= requirements["distance_required"]
+
+    if rule == "streak":
+        # max(streak) >= threshold  <=>  some challenge has streak >= threshold
+        return exists().where(
+            UserChallenge.user_id == User.id,
+            UserChallenge.streak >= requirements["threshold"],
+        )
+
+    if rule == "challenge_tier":
+        return exists().where(
+            UserChallenge.user_id == User.id,
+            UserChallenge.completed == True,
+            Challenge.id == UserChallenge.challenge_id,
+            Challenge.tier == requirements["tier"],
+        )
+
+    if rule == "challenge_completion":
+        completed = (
+            select(func.count(UserChallenge.id))
+            .where(UserChallenge.user_id == User.id, UserChallenge.completed == True)
+            .scalar_subquery()
+        )
+        return completed >= requirements["count"]
+
+    if rule == "all_tiers_completed":
+        tiers = set(requirements["tiers"])
+        if not tiers:
+            return true()
+        tiers_completed = (
+            select(func.count(distinct(Challenge.tier)))
+            .select_from(UserChallenge)
+            .join(Challenge, Challenge.id == UserChallenge.challenge_id)
+            .where(
+                UserChallenge.user_id == User.id,
+                UserChallenge.completed == True,
+                Challenge.tier.in_(tiers),
+            )
+            .scalar_subquery()
+        )
+        return tiers_completed == len(tiers)
+
+    raise ValueError(f"Unsupported requirement type: {rule}")
+
+
+def _insert_ignoring_duplicates(model, session: Session):
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    raise Exception(f"Award backfill not supported on {dialect}")
+
+
+def _insert_statement(award: Union[Badge, Title], eligible, lower_id: int, upper_id: int, now: datetime, session: Session):
+    """
+    Build INSERT ... SELECT awarding `award` to `eligible` users in [lower_id, upper_id).
+    Users who already hold the award are skipped, so re-running is a no-op;
+    ON CONFLICT covers awards inserted per user while the chunk runs.
+    """
+    in_range = and_(User.id >= lower_id, User.id < upper_id)
+
+    if isinstance(award, Badge):
+        not_earned = ~exists().where(UserBadge.user_id == User.id, UserBadge.badge_id == award.id)
+        return _insert_ignoring_duplicates(UserBadge, session).from_select(
+            ["user_id", "badge_id", "earned_at"],
+            select(User.id, literal(award.id), literal(now)).where(in_range, eligible, not_earned),
+        ).on_conflict_do_nothing(index_elements=["user_id", "badge_id"])
+
+    not_earned = ~exists().where(UserTitle.user_id == User.id, UserTitle.title_id == award.id)
+    return _insert_ignoring_duplicates(UserTitle, session).from_select(
+        ["user_id", "title_id", "earned_at", "is_active"],
+        select(User.id, literal(award.id), literal(now), literal(False)).where(in_range, eligible, not_earned),
+    ).on_conflict_do_nothing(index_elements=["user_id", "title_id"])
+
+
+def backfill_award(award: Union[Badge, Title], session: Session, chunk_size: int = DEFAULT_CHUNK_SIZE) -> BackfillResult:
+    """
+    Retroactively award a badge or title to every eligible user.
+    Runs one INSERT ... SELECT per user id range, committing after each chunk.
+    Raises ValueError for awards award_badges_and_titles never grants.
+    """
+    start = time.perf_counter()
+    kind = "badge" if isinstance(award, Badge) else "title"
+    award_id, award_name = award.id, award.name
+    eligible = eligibility_clause(award_requirements(award))
+
+    lowest, highest = session.exec(select(func.min(User.id), func.max(User.id))).one()
+    inserted = 0
+    chunks = 0
+
+    if lowest is not None:
+        now = datetime.utcnow()
+        for lower_id in range(lowest, highest + 1, chunk_size):
+            statement = _insert_statement(award, eligible, lower_id, lower_id + chunk_size, now, session)
+            inserted += session.execute(statement).rowcount
+            session.commit()
+            chunks += 1
+
+    if inserted:
+        # Core inserts bypass the ORM commit hooks
+        invalidate_all_dashboards()
+
+    return BackfillResult(
+        kind=kind,
+        award_id=award_id,
+        name=award_name,
+        inserted=inserted,
+        chunks=chunks,
+        elapsed_seconds=round(time.perf_counter() - start, 3),
+    )
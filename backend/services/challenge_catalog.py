@@ -0,0 +1,148 @@
+"""
+In-process snapshot of the active challenge catalog for GET /challenges/.
+
+The catalog only changes when a Challenge is written or a listed challenge
+ends, so instead of a query and a ChallengeRead validation per request, the
+listed challenges (active and not yet ended) are loaded once, rendered to JSON once each and indexed by every tier/type/sport filter
+combination. A page is then a dict lookup plus a join of pre-rendered bytes;
+first pages at the default size are rendered whole up front.
+
+A snapshot is immutable and replaced whole: commits touching a Challenge in
+this process drop it, it expires when its first challenge ends, and
+CHALLENGE_CATALOG_TTL_SECONDS bounds how long changes committed by other
+processes can go unseen. Snapshots are loaded
+from the primary, so one rebuilt right after a commit can't come from a
+replica that hasn't caught up yet.
+"""
+from bisect import bisect_left
+from datetime import datetime, timezone
+from itertools import product
+from typing import Dict, List, Optional, Sequence, Tuple
+import json
+import os
+import time
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..db import async_engine
+from ..models.challenge import Challenge
+from ..models.schemas import ChallengeRead
+from ..utils.invalidation import on_commit
+
+# Page sizes for the catalog and /my listings; `limit` can't exceed the maximum
+CHALLENGES_PAGE_SIZE = int(os.getenv("CHALLENGES_PAGE_SIZE", "50"))
+CHALLENGES_MAX_PAGE_SIZE = int(os.getenv("CHALLENGES_MAX_PAGE_SIZE", "200"))
+# "0" serves the catalog straight from the database
+CHALLENGE_CATALOG_SNAPSHOT = os.getenv("CHALLENGE_CATALOG_SNAPSHOT", "1") == "1"
+CHALLENGE_CATALOG_TTL_SECONDS = float(os.getenv("CHALLENGE_CATALOG_TTL_SECONDS", "60"))
+
+# (tier, type, sport); None matches any value
+Filters = Tuple[Optional[str], Optional[str], Optional[str]]
+# (created_at, id), the catalog's sort key and cursor
+CatalogKey = Tuple[datetime, int]
+
+
+def catalog_query(now: Optional[datetime] = None):
+    """
+    The challenges GET /challenges/ lists: active ones that haven't ended.
+    Shared by the snapshot and the database path.
+    """
+    now = now or datetime.utcnow()
+    return select(Challenge).where(Challenge.active == True, Challenge.end_date > now)
+
+
+def render_challenge(challenge: Challenge) -> bytes:
+    # The same bytes FastAPI's JSON response would produce for ChallengeRead
+    payload = ChallengeRead.model_validate(challenge).model_dump(mode="json")
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class CatalogSnapshot:
+    """
+    The listed challenges newest first, each rendered once, with the
+    positions matching every filter combination.
+    """
+
+    def __init__(self, challenges: Sequence[Challenge], expires_at: float, first_page_size: int = CHALLENGES_PAGE_SIZE):
+        challenges = sorted(challenges, key=lambda c: (c.created_at, c.id), reverse=True)
+        self.expires_at = expires_at
+        self.first_page_size = first_page_size
+        self._rendered = [render_challenge(challenge) for challenge in challenges]
+        self._keys = [(challenge.created_at, challenge.id) for challenge in challenges]
+        # Oldest first, for bisecting on a cursor
+        self._ascending_keys = self._keys[::-1]
+        self._positions: Dict[Filters, List[int]] = {}
+        for position, challenge in enumerate(challenges):
+            for filters in product((challenge.tier, None), (challenge.type, None), (challenge.sport, None)):
+                self._positions.setdefault(filters, []).append(position)
+        self._first_pages = {filters: self._render_page(positions, 0, first_page_size) for filters, positions in self._positions.items()}
+
+    def __len__(self) -> int:
+        return len(self._rendered)
+
+    def _render_page(self, positions: List[int], start: int, limit: int) -> Tuple[bytes, Optional[CatalogKey]]:
+        page = positions[start:start + limit]
+        body = b"[" + b",".join(self._rendered[position] for position in page) + b"]"
+        more = start + limit < len(positions)
+        return body, (self._keys[page[-1]] if more else None)
+
+    def page(self, filters: Filters, after: Optional[CatalogKey], limit: int) -> Tuple[bytes, Optional[CatalogKey]]:
+        """
+        The JSON body of the page after `after` (or the first page), and
+        the key to continue from if more rows follow.
+        """
+        positions = self._positions.get(filters)
+        if not positions:
+            return b"[]", None
+        if after is None:
+            if limit == self.first_page_size:
+                return self._first_pages[filters]
+            return self._render_page(positions, 0, limit)
+
+        # First position older than `after`, then the first matching one from there
+        first = len(self._keys) - bisect_left(self._ascending_keys, after)
+        return self._render_page(positions, bisect_left(positions, first), limit)
+
+
+# --- Process-wide snapshot, replaced on Challenge commits and after the TTL ---
+_snapshot: Optional[CatalogSnapshot] = None
+_generation = 0
+
+
+async def async_get_catalog() -> CatalogSnapshot:
+    """
+    Return the current snapshot, loading the catalog from the primary if
+    there is none or it has expired. A snapshot expires after the TTL or
+    when its earliest-ending challenge ends, whichever comes first.
+    Concurrent misses may each load it.
+    """
+    global _snapshot
+
+    snapshot = _snapshot
+    if snapshot is not None and time.time() < snapshot.expires_at:
+        return snapshot
+
+    generation = _generation
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        challenges = (await session.exec(catalog_query())).all()
+    expires_at = time.time() + CHALLENGE_CATALOG_TTL_SECONDS
+    if challenges:
+        first_end = min(challenge.end_date for challenge in challenges)
+        expires_at = min(expires_at, first_end.replace(tzinfo=timezone.utc).timestamp())
+    snapshot = CatalogSnapshot(challenges, expires_at=expires_at)
+    # Don't publish a snapshot that was invalidated while it was being built
+    if generation == _generation:
+        _snapshot = snapshot
+    return snapshot
+
+
+def invalidate_catalog(*_args) -> None:
+    """
+    Drop the snapshot so the next catalog request rebuilds it.
+    """
+    global _snapshot, _generation
+    _generation += 1
+    _snapshot = None
+
+
+on_commit([Challenge], invalidate_catalog, snapshot=lambda instance: None)
@@ -0,0 +1,158 @@
+"""
+Streaming NDJSON exports of users' challenges, badges, titles and activities.
+
+Rows come off a server-side cursor EXPORT_BATCH_SIZE at a time and each
+batch is written out before the next is fetched, so memory stays flat
+however many rows a user (or, for the admin export, everyone) has.
+
+The export holds one read connection open until the last row is sent. On
+SQLite in the default journal mode an open read blocks writers for that
+long; SQLITE_MODE=production (WAL) doesn't have that problem.
+"""
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+import json
+import os
+from sqlalchemy import select
+from sqlalchemy.sql import Select
+
+from ..db import async_read_engine
+from ..models.activity import Activity
+from ..models.badge import Badge
+from ..models.challenge import Challenge
+from ..models.title import Title
+from ..models.user_badge import UserBadge
+from ..models.user_challenge import UserChallenge
+from ..models.user_title import UserTitle
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class ExportKind(str, Enum):
+    CHALLENGES = "challenges"
+    BADGES = "badges"
+    TITLES = "titles"
+    ACTIVITIES = "activities"
+
+
+# Flat column selects (no ORM objects), ordered along each table's per-user index
+def _challenges_query() -> Select:
+    return (
+        select(
+            UserChallenge.user_id,
+            UserChallenge.challenge_id,
+            Challenge.name.label("challenge_name"),
+            Challenge.tier,
+            Challenge.type,
+            Challenge.sport,
+            Challenge.distance_target_km,
+            Challenge.start_date,
+            Challenge.end_date,
+            UserChallenge.distance_completed_km,
+            UserChallenge.streak,
+            UserChallenge.completed,
+            UserChallenge.xp_earned,
+            UserChallenge.joined_at,
+            UserChallenge.updated_at,
+        )
+        .join(Challenge, Challenge.id == UserChallenge.challenge_id)
+        .order_by(UserChallenge.user_id, UserChallenge.challenge_id)
+    )
+
+
+def _badges_query() -> Select:
+    return (
+        select(
+            UserBadge.user_id,
+            UserBadge.badge_id,
+            Badge.name,
+            Badge.category,
+            Badge.rarity,
+            UserBadge.earned_at,
+        )
+        .join(Badge, Badge.id == UserBadge.badge_id)
+        .order_by(UserBadge.user_id, UserBadge.badge_id)
+    )
+
+
+def _titles_query() -> Select:
+    return (
+        select(
+            UserTitle.user_id,
+            UserTitle.title_id,
+            Title.name,
+            Title.rarity,
+            UserTitle.is_active,
+            UserTitle.earned_at,
+        )
+        .join(Title, Title.id == UserTitle.title_id)
+        .order_by(UserTitle.user_id, UserTitle.id)
+    )
+
+
+def _activities_query() -> Select:
+    return (
+        select(
+            Activity.user_id,
+            Activity.strava_activity_id,
+            Activity.name,
+            Activity.type,
+            Activity.distance_km,
+            Activity.moving_time,
+            Activity.start_date,
+        )
+        .order_by(Activity.user_id, Activity.start_date)
+    )
+
+
+_QUERIES: Dict[ExportKind, Callable[[], Select]] = {
+    ExportKind.CHALLENGES: _challenges_query,
+    ExportKind.BADGES: _badges_query,
+    ExportKind.TITLES: _titles_query,
+    ExportKind.ACTIVITIES: _activities_query,
+}
+_USER_COLUMNS = {
+    ExportKind.CHALLENGES: UserChallenge.user_id,
+    ExportKind.BADGES: UserBadge.user_id,
+    ExportKind.TITLES: UserTitle.user_id,
+    ExportKind.ACTIVITIES: Activity.user_id,
+}
+
+
+def export_query(kind: ExportKind, user_id: Optional[int] = None) -> Select:
+    """
+    The export's statement, for one user or (user_id=None) everyone.
+    """
+    statement = _QUERIES[kind]()
+    if user_id is not None:
+        statement = statement.where(_USER_COLUMNS[kind] == user_id)
+    return statement
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot export {type(value).__name__} as JSON")
+
+
+async def stream_export(
+    kind: ExportKind,
+    user_id: Optional[int] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[bytes]:
+    """
+    Yield the export as NDJSON, one chunk of up to `batch_size` lines per
+    fetch from the cursor.
+    """
+    statement = export_query(kind, user_id).execution_options(yield_per=batch_size)
+    async with async_read_engine.connect() as conn:
+        result = await conn.stream(statement)
+        async for rows in result.partitions():
+            yield "".join(
+                json.dumps(dict(row._mapping), default=_json_default, separators=(",", ":")) + "\n"
+                for row in rows
+            ).encode()
@@ -0,0 +1,203 @@
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import os
+import threading
+from sqlalchemy import inspect
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from ..db import engine
+from ..models.user import User
+from ..models.user_challenge import UserChallenge
+from ..utils.cache import LRUCache
+from ..utils.invalidation import on_commit
+from .ranking import LiveRanking, RankedEntry, RankIndex
+
+LEADERBOARD_RECONCILE_SECONDS = float(os.getenv("LEADERBOARD_RECONCILE_SECONDS", "300"))
+# Challenge rankings held in memory at once (each metric counts separately)
+CHALLENGE_LEADERBOARD_CACHE_SIZE = int(os.getenv("CHALLENGE_LEADERBOARD_CACHE_SIZE", "200"))
+LEADERBOARD_MAX_LIMIT = 100
+
+
+def _load_user_xp(session: Session) -> List[Tuple[int, float]]:
+    return session.exec(select(User.id, User.xp)).all()
+
+
+# Global XP ranking: built on first use, then updated on every commit that
+# touches a user; the reconciler rebuilds it to correct drift from other processes
+xp_leaderboard = LiveRanking(_load_user_xp)
+
+
+def _xp_change(user: User) -> Tuple[int, Optional[int]]:
+    return user.id, None if inspect(user).deleted else user.xp
+
+
+on_commit([User], xp_leaderboard.apply_changes, snapshot=_xp_change)
+
+
+# --- Per-challenge rankings ---
+CHALLENGE_METRICS = {
+    "distance": UserChallenge.distance_completed_km,
+    "xp": UserChallenge.xp_earned,
+}
+
+
+class ChallengeLeaderboards:
+    """
+    One LiveRanking per (challenge, metric), built on first view and kept
+    current from committed UserChallenge changes. The least recently viewed
+    rankings are dropped beyond CHALLENGE_LEADERBOARD_CACHE_SIZE.
+    """
+
+    def __init__(self, maxsize: int = CHALLENGE_LEADERBOARD_CACHE_SIZE):
+        self._rankings = LRUCache(maxsize)
+        self._lock = threading.Lock()
+
+    def ranking(self, challenge_id: int, metric: str) -> LiveRanking:
+        key = (challenge_id, metric)
+        with self._lock:
+            ranking = self._rankings.get(key)
+            if ranking is None:
+                column = CHALLENGE_METRICS[metric]
+                ranking = LiveRanking(lambda session: session.exec(
+                    select(UserChallenge.user_id, column).where(UserChallenge.challenge_id == challenge_id)
+                ).all())
+                self._rankings.set(key, ranking)
+            return ranking
+
+    def cached(self) -> List[LiveRanking]:
+        with self._lock:
+            return [ranking for ranking in (self._rankings.get(key) for key in self._rankings.keys()) if ranking]
+
+    def apply_changes(self, changes: List[Tuple[int, int, Optional[float], Optional[float]]]) -> None:
+        """
+        Apply committed (challenge_id, user_id, distance, xp) changes to the
+        rankings currently held; others are built fresh when next viewed.
+        """
+        for challenge_id, user_id, distance, xp in changes:
+            for metric, score in (("distance", distance), ("xp", xp)):
+                with self._lock:
+                    ranking = self._rankings.get((challenge_id, metric))
+                if ranking is not None:
+                    ranking.apply_changes([(user_id, score)])
+
+
+challenge_leaderboards = ChallengeLeaderboards()
+
+
+def _build_index(ranking: LiveRanking) -> RankIndex:
+    with Session(engine) as session:
+        return ranking.index(session)
+
+
+async def challenge_ranking_index(challenge_id: int, metric: str) -> RankIndex:
+    """
+    The live challenge index for async routes. A first view builds it on a
+    worker thread, since LiveRanking serializes builds with a thread lock.
+    """
+    ranking = challenge_leaderboards.ranking(challenge_id, metric)
+    index = ranking.current
+    if index is None:
+        index = await run_in_threadpool(_build_index, ranking)
+    return index
+
+
+def _progress_change(user_challenge: UserChallenge) -> Tuple[int, int, Optional[float], Optional[float]]:
+    if inspect(user_challenge).deleted:
+        return user_challenge.challenge_id, user_challenge.user_id, None, None
+    return (
+        user_challenge.challenge_id,
+        user_challenge.user_id,
+        user_challenge.distance_completed_km,
+        user_challenge.xp_earned,
+    )
+
+
+on_commit([UserChallenge], challenge_leaderboards.apply_changes, snapshot=_progress_change)
+
+
+# --- Periodic reconciliation ---
+def reconcile_leaderboards() -> int:
+    """
+    Rebuild the global ranking and every held challenge ranking from the
+    tables. Returns the total number of corrected entries.
+    """
+    corrected = 0
+    with Session(engine) as session:
+        for ranking in [xp_leaderboard, *challenge_leaderboards.cached()]:
+            corrected += ranking.reconcile(session)
+    return corrected
+
+
+class LeaderboardReconciler:
+    """
+    Background task: builds the global ranking at startup, then reconciles
+    every LEADERBOARD_RECONCILE_SECONDS.
+    """
+
+    def __init__(self, interval: float = LEADERBOARD_RECONCILE_SECONDS):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await run_in_threadpool(reconcile_leaderboards)
+            except Exception:
+                # Keep reconciling through transient DB errors
+                pass
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+leaderboard_reconciler = LeaderboardReconciler()
+
+
+def _profiles_query(entries: List[RankedEntry]):
+    user_ids = [entry.member for entry in entries]
+    return (
+        select(User.id, User.username, User.first_name, User.last_name, User.profile_medium, User.level)
+        .where(User.id.in_(user_ids))
+    )
+
+
+def serialize_entries(entries: List[RankedEntry], session: Session, score_field: str = "xp") -> List[Dict[str, Any]]:
+    """
+    Leaderboard rows with public profile fields, loaded in one query.
+    """
+    profiles = {row.id: row for row in session.exec(_profiles_query(entries)).all()} if entries else {}
+    return _leaderboard_rows(entries, profiles, score_field)
+
+
+async def async_serialize_entries(entries: List[RankedEntry], session: AsyncSession, score_field: str = "xp") -> List[Dict[str, Any]]:
+    """
+    serialize_entries for async routes.
+    """
+    profiles = {row.id: row for row in (await session.exec(_profiles_query(entries))).all()} if entries else {}
+    return _leaderboard_rows(entries, profiles, score_field)
+
+
+def _leaderboard_rows(entries: List[RankedEntry], profiles: Dict[int, Any], score_field: str) -> List[Dict[str, Any]]:
+    rows = []
+    for entry in entries:
+        profile = profiles.get(entry.member)
+        rows.append({
+            "rank": entry.rank,
+            "user_id": entry.member,
+            score_field: entry.score,
+            "username": profile.username if profile else None,
+            "first_name": profile.first_name if profile else None,
+            "last_name": profile.last_name if profile else None,
+            "profile_medium": profile.profile_medium if profile else None,
+            "level": profile.level if profile else None,
+        })
+    return rows
@@ -1,6 +1,8 @@
 from ..models.user_challenge import UserChallenge
 from ..models.user import User
+from .activities import NormalizedActivity
 from datetime import datetime, timedelta
+from typing import Sequence
 import math
 
 # Base XP system - everyone gets XP for running
@@ -145,3 +147,59 @@ def update_challenge_progress(
         user_challenge.completed = True
 
     return xp
+
+
+def apply_activities_to_challenge(
+    user_challenge: UserChallenge,
+    tier: str,
+    activities: Sequence[NormalizedActivity]
+) -> float:
+    """
+    Apply a date-sorted list of runs to a UserChallenge in one pass.
+
+    Same result as calling update_challenge_progress once per activity,
+    but progress is accumulated locally and written back to the model once.
+
+    Returns:
+        Total XP earned (float)
+    """
+    if not activities:
+        return 0.0
+
+    tier_multiplier = TIER_XP_MULTIPLIERS.get(tier, 1.0)
+    one_day = timedelta(days=1)
+
+    streak = user_challenge.streak
+    distance_completed = user_challenge.distance_completed_km
+    xp_earned = user_challenge.xp_earned
+    last_date = user_challenge.updated_at.date() if user_challenge.updated_at else None
+    total_xp = 0.0
+
+    for activity in activities:
+        xp = calculate_base_xp(activity.distance_km, in_challenge=True) * tier_multiplier
+
+        # Streak logic (see update_challenge_progress)
+        today = activity.start_date.date()
+        if last_date is None:
+            streak = 1
+        elif today == last_date + one_day:
+            streak += 1
+            xp += STREAK_BONUS
+        elif today != last_date:
+            streak = 1
+        last_date = today
+
+        distance_completed += activity.distance_km
+        xp_earned += xp
+        total_xp += xp
+
+    user_challenge.streak = streak
+    user_challenge.distance_completed_km = distance_completed
+    user_challenge.xp_earned = xp_earned
+    user_challenge.updated_at = activities[-1].start_date
+
+    # Check completion
+    if distance_completed >= CHALLENGE_GOALS.get(tier, 50):
+        user_challenge.completed = True
+
+    return total_xp
@@ -0,0 +1,290 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+import threading
+
+# Target bucket length; buckets split at twice this
+DEFAULT_BUCKET_SIZE = 1000
+
+
+class RankedEntry(NamedTuple):
+    rank: int  # 1-based; 1 is the highest score
+    member: Hashable
+    score: float
+
+
+class RankIndex:
+    """
+    In-memory ranking of members by score, highest first, ties broken by
+    member id ascending.
+
+    Keys (-score, member) are kept in sorted buckets of roughly
+    DEFAULT_BUCKET_SIZE with a Fenwick tree over bucket lengths, so rank
+    lookups, positional access and updates are O(log n) plus a short
+    in-bucket shift. Safe to share between threads.
+    """
+
+    def __init__(self, bucket_size: int = DEFAULT_BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self._scores: Dict[Hashable, float] = {}
+        self._buckets: List[List[Tuple[float, Hashable]]] = []
+        self._maxes: List[Tuple[float, Hashable]] = []
+        self._tree: List[int] = [0]
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_scores(cls, scores: Iterable[Tuple[Hashable, float]], bucket_size: int = DEFAULT_BUCKET_SIZE) -> "RankIndex":
+        """
+        Build an index in one sort from (member, score) pairs.
+        """
+        index = cls(bucket_size)
+        index._scores = dict(scores)
+        keys = sorted((-score, member) for member, score in index._scores.items())
+        index._buckets = [keys[i:i + bucket_size] for i in range(0, len(keys), bucket_size)]
+        index._maxes = [bucket[-1] for bucket in index._buckets]
+        index._rebuild_tree()
+        return index
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, member: Hashable) -> bool:
+        return member in self._scores
+
+    def score(self, member: Hashable) -> Optional[float]:
+        return self._scores.get(member)
+
+    def scores(self) -> Dict[Hashable, float]:
+        with self._lock:
+            return dict(self._scores)
+
+    # --- Fenwick tree over bucket lengths ---
+    def _rebuild_tree(self) -> None:
+        tree = [0] * (len(self._buckets) + 1)
+        for i, bucket in enumerate(self._buckets, start=1):
+            tree[i] += len(bucket)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, bucket: int, delta: int) -> None:
+        i = bucket + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _count_before(self, bucket: int) -> int:
+        total, i = 0, bucket
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, position: int) -> Tuple[int, int]:
+        # (bucket, offset) of the 0-based position, by binary lifting on the tree
+        bucket, remaining = 0, position
+        step = 1 << (len(self._tree).bit_length())
+        while step:
+            nxt = bucket + step
+            if nxt < len(self._tree) and self._tree[nxt] <= remaining:
+                bucket = nxt
+                remaining -= self._tree[nxt]
+            step >>= 1
+        return bucket, remaining
+
+    # --- Mutation ---
+    def _insert_key(self, key: Tuple[float, Hashable]) -> None:
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            self._rebuild_tree()
+            return
+
+        b = min(bisect_left(self._maxes, key), len(self._buckets) - 1)
+        bucket = self._buckets[b]
+        insort(bucket, key)
+        self._maxes[b] = bucket[-1]
+
+        if len(bucket) > 2 * self.bucket_size:
+            half = len(bucket) // 2
+            self._buckets[b:b + 1] = [bucket[:half], bucket[half:]]
+            self._maxes[b:b + 1] = [bucket[half - 1], bucket[-1]]
+            self._rebuild_tree()
+        else:
+            self._tree_add(b, 1)
+
+    def _remove_key(self, key: Tuple[float, Hashable]) -> None:
+        b = bisect_left(self._maxes, key)
+        bucket = self._buckets[b]
+        del bucket[bisect_left(bucket, key)]
+
+        if bucket:
+            self._maxes[b] = bucket[-1]
+            self._tree_add(b, -1)
+        else:
+            del self._buckets[b]
+            del self._maxes[b]
+            self._rebuild_tree()
+
+    def update(self, member: Hashable, score: float) -> None:
+        """
+        Insert the member or move it to its new score.
+        """
+        with self._lock:
+            previous = self._scores.get(member)
+            if previous == score:
+                return
+            if previous is not None:
+                self._remove_key((-previous, member))
+            self._insert_key((-score, member))
+            self._scores[member] = score
+
+    def discard(self, member: Hashable) -> None:
+        with self._lock:
+            previous = self._scores.pop(member, None)
+            if previous is not None:
+                self._remove_key((-previous, member))
+
+    # --- Queries ---
+    def rank(self, member: Hashable) -> Optional[int]:
+        """
+        1-based rank of the member, or None if it isn't ranked.
+        """
+        with self._lock:
+            score = self._scores.get(member)
+            if score is None:
+                return None
+            key = (-score, member)
+            b = bisect_left(self._maxes, key)
+            return self._count_before(b) + bisect_left(self._buckets[b], key) + 1
+
+    def range(self, start: int, stop: int) -> List[RankedEntry]:
+        """
+        Entries at 0-based positions [start, stop).
+        """
+        with self._lock:
+            start, stop = max(start, 0), min(stop, len(self._scores))
+            entries = []
+            if start >= stop:
+                return entries
+
+            b, offset = self._locate(start)
+            rank = start + 1
+            while rank <= stop:
+                bucket = self._buckets[b]
+                for neg_score, member in bucket[offset:offset + (stop - rank + 1)]:
+                    entries.append(RankedEntry(rank, member, -neg_score))
+                    rank += 1
+                b, offset = b + 1, 0
+            return entries
+
+    def top(self, limit: int, offset: int = 0) -> List[RankedEntry]:
+        return self.range(offset, offset + limit)
+
+    def after(self, score: float, member: Hashable, limit: int) -> List[RankedEntry]:
+        """
+        Up to `limit` entries ranked strictly below (score, member), which
+        need not be in the index any more; for keyset pagination.
+        """
+        with self._lock:
+            key = (-score, member)
+            b = bisect_left(self._maxes, key)
+            if b == len(self._buckets):
+                return []
+            start = self._count_before(b) + bisect_right(self._buckets[b], key)
+            return self.range(start, start + limit)
+
+    def around(self, member: Hashable, k: int) -> List[RankedEntry]:
+        """
+        The member with up to `k` neighbours on each side, or [] if it isn't ranked.
+        """
+        with self._lock:
+            rank = self.rank(member)
+            if rank is None:
+                return []
+            return self.range(rank - 1 - k, rank + k)
+
+
+class LiveRanking:
+    """
+    A RankIndex materialized from the database and kept current by applying
+    committed changes, with a full rebuild available to correct drift.
+
+    `load(session)` returns (member, score) pairs. Changes committed while a
+    rebuild is reading them are replayed on top of the new index.
+    """
+
+    def __init__(self, load: Callable[..., Iterable[Tuple[Hashable, float]]]):
+        self._load = load
+        self._index: Optional[RankIndex] = None
+        self._lock = threading.Lock()  # guards _index/_pending swaps
+        self._build_lock = threading.Lock()  # one rebuild at a time
+        self._pending: Optional[List[Tuple[Hashable, Optional[float]]]] = None
+
+    @property
+    def current(self) -> Optional[RankIndex]:
+        """
+        The live index, or None until it has been built.
+        """
+        return self._index
+
+    def index(self, session) -> RankIndex:
+        """
+        The live index, building it through `session` the first time.
+        """
+        index = self._index
+        if index is not None:
+            return index
+        with self._build_lock:
+            if self._index is None:
+                self._rebuild(session)
+            return self._index
+
+    def reconcile(self, session) -> int:
+        """
+        Rebuild from the database and swap the result in. Returns how many
+        members had a missing or different score in the previous index.
+        """
+        with self._build_lock:
+            return self._rebuild(session)
+
+    def _rebuild(self, session) -> int:
+        with self._lock:
+            self._pending = []
+        try:
+            index = RankIndex.from_scores(self._load(session))
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            for member, score in self._pending:
+                self._apply(index, member, score)
+            previous = self._index.scores() if self._index is not None else None
+            self._index, self._pending = index, None
+
+        if previous is None:
+            return 0
+        current = index.scores()
+        changed = sum(1 for member, score in current.items() if previous.get(member) != score)
+        return changed + sum(1 for member in previous if member not in current)
+
+    @staticmethod
+    def _apply(index: RankIndex, member: Hashable, score: Optional[float]) -> None:
+        if score is None:
+            index.discard(member)
+        else:
+            index.update(member, score)
+
+    def apply_changes(self, changes: Iterable[Tuple[Hashable, Optional[float]]]) -> None:
+        """
+        Apply committed (member, score) changes; a score of None removes the member.
+        """
+        with self._lock:
+            changes = list(changes)
+            if self._pending is not None:
+                self._pending.extend(changes)
+            if self._index is not None:
+                for member, score in changes:
+                    self._apply(self._index, member, score)
@@ -0,0 +1,129 @@
+from typing import AsyncIterator, List, Optional
+import os
+import httpx
+
+from ..models.user import User
+from . import strava_service, strava_tokens
+from .strava_service import (
+    STRAVA_CLIENT_ID,
+    STRAVA_CLIENT_SECRET,
+    STRAVA_PAGE_SIZE,
+    STRAVA_TIMEOUT,
+)
+
+STRAVA_ASYNC_MAX_CONNECTIONS = int(os.getenv("STRAVA_ASYNC_MAX_CONNECTIONS", "200"))
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Shared async HTTP client; one connection pool for every in-flight Strava call.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        connect_timeout, read_timeout = STRAVA_TIMEOUT
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=STRAVA_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=STRAVA_ASYNC_MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+
+async def close_async_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def async_exchange_code(code: str) -> httpx.Response:
+    """
+    Exchange an OAuth authorization code for tokens and the athlete profile.
+    """
+    return await get_async_client().post(strava_service.STRAVA_TOKEN_URL, data={
+        "client_id": STRAVA_CLIENT_ID,
+        "client_secret": STRAVA_CLIENT_SECRET,
+        "code": code,
+        "grant_type": "authorization_code"
+    })
+
+
+async def aiter_activity_pages(
+    user: User,
+    after_timestamp: int = None,
+    per_page: int = STRAVA_PAGE_SIZE
+) -> AsyncIterator[List[dict]]:
+    """
+    Async counterpart of strava_service.iter_activity_pages.
+    Tokens come from the token manager; refreshes once on a 401.
+    """
+    client = get_async_client()
+    access_token = await strava_tokens.token_manager.get_access_token(user)
+
+    params = {"per_page": per_page, "page": 1}
+    if after_timestamp:
+        params["after"] = after_timestamp
+
+    refreshed = False
+    while True:
+        response = await client.get(
+            f"{strava_service.STRAVA_API_URL}/athlete/activities",
+            headers={"Authorization": f"Bearer {access_token}"},
+            params=params,
+        )
+
+        # If unauthorized, try refreshing token once
+        if response.status_code == 401 and not refreshed:
+            access_token = await strava_tokens.token_manager.get_access_token(user, rejected_token=access_token)
+            refreshed = True
+            continue
+
+        if response.status_code != 200:
+            raise Exception(f"Strava API error: {response.json()}")
+
+        page = response.json()
+        if page:
+            yield page
+
+        # A short page is the last one
+        if len(page) < per_page:
+            return
+        params["page"] += 1
+
+
+async def async_fetch_user_activities(user: User, after_timestamp: int = None) -> List[dict]:
+    """
+    Fetch all Strava activities for a user without blocking the event loop.
+    """
+    activities = []
+    async for page in aiter_activity_pages(user, after_timestamp=after_timestamp):
+        activities.extend(page)
+    return activities
+
+
+async def async_fetch_activity(user: User, activity_id: int) -> Optional[dict]:
+    """
+    Fetch a single Strava activity, or None if it no longer exists / isn't visible.
+    Tokens come from the token manager; refreshes once on a 401.
+    """
+    client = get_async_client()
+    access_token = await strava_tokens.token_manager.get_access_token(user)
+
+    url = f"{strava_service.STRAVA_API_URL}/activities/{activity_id}"
+    response = await client.get(url, headers={"Authorization": f"Bearer {access_token}"})
+
+    # If unauthorized, try refreshing token once
+    if response.status_code == 401:
+        access_token = await strava_tokens.token_manager.get_access_token(user, rejected_token=access_token)
+        response = await client.get(url, headers={"Authorization": f"Bearer {access_token}"})
+
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise Exception(f"Strava API error: {response.json()}")
+
+    return response.json()
@@ -0,0 +1,181 @@
+from datetime import datetime, timedelta
+from typing import Optional
+import json
+from sqlalchemy import exists
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select, update
+from starlette.concurrency import run_in_threadpool
+
+from ..db import engine
+from ..models.strava_event import StravaEvent, StravaEventStatus
+from ..models.sync_job import SyncJob, SyncJobStatus
+from ..models.user import User
+from .strava_async import async_fetch_activity
+from .strava_tokens import token_manager
+from .sync import apply_activity_sync, revise_activity
+from .sync_jobs import SYNC_JOB_STALE_SECONDS, sync_worker_pool
+
+
+def record_event(payload: dict, session: Session) -> StravaEvent:
+    """
+    Store a webhook event for asynchronous processing.
+    """
+    event = StravaEvent(
+        object_type=payload["object_type"],
+        object_id=payload["object_id"],
+        aspect_type=payload["aspect_type"],
+        owner_id=payload["owner_id"],
+        subscription_id=payload.get("subscription_id"),
+        event_time=payload.get("event_time"),
+        updates=json.dumps(payload.get("updates") or {}),
+    )
+    session.add(event)
+    session.commit()
+    session.refresh(event)
+    return event
+
+
+def _owner_busy():
+    # The event's owner has a sync job running or another event being
+    # processed (either not orphaned)
+    cutoff = datetime.utcnow() - timedelta(seconds=SYNC_JOB_STALE_SECONDS)
+    other = aliased(StravaEvent)
+    running_job = exists(
+        select(SyncJob.id)
+        .join(User, User.id == SyncJob.user_id)
+        .where(
+            User.strava_athlete_id == StravaEvent.owner_id,
+            SyncJob.status == SyncJobStatus.RUNNING,
+            SyncJob.started_at >= cutoff
+        )
+    )
+    other_event = exists(
+        select(other.id).where(
+            other.owner_id == StravaEvent.owner_id,
+            other.status == StravaEventStatus.PROCESSING,
+            other.processed_at >= cutoff
+        )
+    )
+    return running_job | other_event
+
+
+def claim_next_event() -> Optional[int]:
+    """
+    Atomically move the oldest queued event to processing and return its id.
+    Events wait while their owner has a sync job running or another event
+    in progress, so a user's progress is only ever changed by one worker at
+    a time; the worker that finishes claims them next.
+
+    The claim locks the owner's user row first, as claim_next_job does, so
+    two claims for one user are serialized and the second sees the first's
+    claim (under READ COMMITTED, not just with SQLite's single writer).
+    """
+    with Session(engine) as session:
+        while True:
+            candidate = session.exec(
+                select(StravaEvent.id, StravaEvent.owner_id)
+                .where(StravaEvent.status == StravaEventStatus.QUEUED, ~_owner_busy())
+                .order_by(StravaEvent.id)
+                .limit(1)
+            ).first()
+            if candidate is None:
+                return None
+
+            event_id, owner_id = candidate
+            session.exec(select(User.id).where(User.strava_athlete_id == owner_id).with_for_update())
+            claimed = session.exec(
+                update(StravaEvent)
+                .where(StravaEvent.id == event_id, StravaEvent.status == StravaEventStatus.QUEUED, ~_owner_busy())
+                .values(status=StravaEventStatus.PROCESSING, processed_at=datetime.utcnow())
+            ).rowcount
+            session.commit()
+            if claimed:
+                return event_id
+
+
+def finish_event(event_id: int, status: StravaEventStatus, error: Optional[str] = None) -> None:
+    with Session(engine) as session:
+        session.exec(
+            update(StravaEvent)
+            .where(StravaEvent.id == event_id)
+            .values(status=status, error=error, processed_at=datetime.utcnow())
+        )
+        session.commit()
+
+
+def requeue_stale_events() -> int:
+    """
+    Return events orphaned mid-processing to the queue. Returns how many were requeued.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=SYNC_JOB_STALE_SECONDS)
+    with Session(engine) as session:
+        requeued = session.exec(
+            update(StravaEvent)
+            .where(StravaEvent.status == StravaEventStatus.PROCESSING, StravaEvent.processed_at < cutoff)
+            .values(status=StravaEventStatus.QUEUED)
+        ).rowcount
+        session.commit()
+        return requeued
+
+
+def _deauthorize(user: User, session: Session) -> None:
+    # The athlete revoked access; the stored tokens are useless now
+    user.access_token = None
+    user.refresh_token = None
+    user.token_expires_at = None
+    session.add(user)
+    session.commit()
+    token_manager.forget(user.id)
+
+
+async def process_event(event_id: int) -> None:
+    """
+    Apply one webhook event through the regular progress/award logic.
+
+    New activities go through the same deduplicating store as full syncs,
+    so an activity seen by both is only counted once. Updates and deletes
+    revise the stored activity and the progress it added (revise_activity);
+    events for activities that were never stored are marked ignored.
+    """
+    session = Session(engine)
+    try:
+        event = await run_in_threadpool(session.get, StravaEvent, event_id)
+        user = await run_in_threadpool(
+            lambda: session.exec(select(User).where(User.strava_athlete_id == event.owner_id)).first()
+        )
+        status = StravaEventStatus.IGNORED
+
+        if user and event.object_type == "athlete":
+            updates = json.loads(event.updates or "{}")
+            if str(updates.get("authorized")).lower() == "false":
+                await run_in_threadpool(_deauthorize, user, session)
+                status = StravaEventStatus.PROCESSED
+
+        elif user and event.object_type == "activity" and event.aspect_type == "create":
+            # Release the connection while waiting on Strava (see run_user_sync)
+            session.close()
+            activity = await async_fetch_activity(user, event.object_id)
+            if activity:
+                await run_in_threadpool(apply_activity_sync, user, [activity], session, False)
+                status = StravaEventStatus.PROCESSED
+
+        elif user and event.object_type == "activity" and event.aspect_type in ("update", "delete"):
+            activity = None
+            if event.aspect_type == "update":
+                session.close()
+                # The event only lists changed fields (title, type, private); distance needs the activity
+                activity = await async_fetch_activity(user, event.object_id)
+            if event.aspect_type == "delete" or activity:
+                revised = await run_in_threadpool(revise_activity, user.id, event.object_id, activity, session)
+                if revised is not None:
+                    status = StravaEventStatus.PROCESSED
+
+        await run_in_threadpool(finish_event, event_id, status)
+    except Exception as exc:
+        await run_in_threadpool(session.rollback)
+        await run_in_threadpool(finish_event, event_id, StravaEventStatus.FAILED, str(exc))
+    finally:
+        await run_in_threadpool(session.close)
+
+
+sync_worker_pool.add_queue(claim_next_event, process_event, recover=requeue_stale_events)
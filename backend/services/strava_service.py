@@ -1,69 +1,173 @@
-from typing import List
+from typing import Iterator, List, Sequence
 import os
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 from ..models.user import User
 from ..db import engine
-from sqlmodel import Session
+from sqlmodel import Session, update
 
-STRAVA_API_URL = "https://www.strava.com/api/v3"
+STRAVA_API_URL = os.getenv("STRAVA_API_URL", "https://www.strava.com/api/v3")
+STRAVA_TOKEN_URL = os.getenv("STRAVA_TOKEN_URL", "https://www.strava.com/oauth/token")
 STRAVA_CLIENT_ID = os.getenv("STRAVA_CLIENT_ID")
 STRAVA_CLIENT_SECRET = os.getenv("STRAVA_CLIENT_SECRET")
 
+# Strava caps per_page at 200
+STRAVA_PAGE_SIZE = 200
 
-def refresh_access_token(user: User, session: Session) -> str:
+# (connect, read) timeouts in seconds for every Strava call
+STRAVA_TIMEOUT = (
+    float(os.getenv("STRAVA_CONNECT_TIMEOUT", "3.05")),
+    float(os.getenv("STRAVA_READ_TIMEOUT", "20")),
+)
+STRAVA_POOL_SIZE = int(os.getenv("STRAVA_POOL_SIZE", "20"))
+
+
+def _build_http_session() -> requests.Session:
     """
-    Refresh Strava access token using the refresh_token.
-    Updates the user record in the DB.
+    Shared HTTP session so keep-alive connections to Strava are pooled and reused.
+    """
+    http = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=STRAVA_POOL_SIZE)
+    http.mount("https://", adapter)
+    http.mount("http://", adapter)
+    return http
+
+
+http_session = _build_http_session()
+
+
+def refresh_token_payload(user: User) -> dict:
+    """
+    Form body for a refresh_token grant.
     """
-    data = {
+    return {
         "client_id": STRAVA_CLIENT_ID,
         "client_secret": STRAVA_CLIENT_SECRET,
         "grant_type": "refresh_token",
         "refresh_token": user.refresh_token
     }
-    resp = requests.post(f"{STRAVA_API_URL}/oauth/token", data=data)
-    if resp.status_code != 200:
-        raise Exception(f"Failed to refresh Strava token: {resp.json()}")
 
-    token_data = resp.json()
+
+def apply_token_data(user: User, token_data: dict) -> None:
+    """
+    Copy tokens from a Strava OAuth token response onto the user.
+    """
     user.access_token = token_data["access_token"]
     user.refresh_token = token_data.get("refresh_token", user.refresh_token)
     expires_at = token_data.get("expires_at")
     user.token_expires_at = datetime.utcfromtimestamp(expires_at) if expires_at else None
 
+
+def save_user_tokens(user: User) -> None:
+    """
+    Persist the user's current tokens in a short transaction of their own,
+    independent of whichever session the user instance belongs to.
+    """
+    with Session(engine) as session:
+        session.exec(
+            update(User)
+            .where(User.id == user.id)
+            .values(
+                access_token=user.access_token,
+                refresh_token=user.refresh_token,
+                token_expires_at=user.token_expires_at,
+            )
+        )
+        session.commit()
+
+
+def save_users_tokens(users: Sequence[User]) -> None:
+    """
+    save_user_tokens for many users: one executemany UPDATE and one commit.
+    """
+    if not users:
+        return
+    with Session(engine) as session:
+        session.execute(update(User), [
+            {
+                "id": user.id,
+                "access_token": user.access_token,
+                "refresh_token": user.refresh_token,
+                "token_expires_at": user.token_expires_at,
+            }
+            for user in users
+        ])
+        session.commit()
+
+
+def refresh_access_token(user: User) -> str:
+    """
+    Refresh Strava access token using the refresh_token.
+    Updates the user instance and persists the tokens in their own transaction,
+    so a caller's session is never committed as a side effect.
+    Async callers go through strava_tokens.token_manager instead.
+    """
+    resp = http_session.post(STRAVA_TOKEN_URL, data=refresh_token_payload(user), timeout=STRAVA_TIMEOUT)
+    if resp.status_code != 200:
+        raise Exception(f"Failed to refresh Strava token: {resp.json()}")
+
+    apply_token_data(user, resp.json())
+
     # Save updated tokens
-    session.add(user)
-    session.commit()
-    session.refresh(user)
+    save_user_tokens(user)
 
     return user.access_token
 
 
-def fetch_user_activities(user: User, after_timestamp: int = None) -> List[dict]:
+def iter_activity_pages(user: User, after_timestamp: int = None, per_page: int = STRAVA_PAGE_SIZE) -> Iterator[List[dict]]:
     """
-    Fetch Strava activities for a user.
+    Walk every page of a user's Strava activities, yielding each page as it arrives.
     Auto-refreshes access token if expired or unauthorized.
     """
-    with Session(engine) as session:
-        # Refresh token if expired
-        if user.token_expires_at and datetime.utcnow() >= user.token_expires_at:
-            user.access_token = refresh_access_token(user, session)
+    # Refresh token if expired
+    if user.token_expires_at and datetime.utcnow() >= user.token_expires_at:
+        user.access_token = refresh_access_token(user)
 
-        headers = {"Authorization": f"Bearer {user.access_token}"}
-        params = {}
-        if after_timestamp:
-            params["after"] = after_timestamp
+    params = {"per_page": per_page, "page": 1}
+    if after_timestamp:
+        params["after"] = after_timestamp
 
-        response = requests.get(f"{STRAVA_API_URL}/athlete/activities", headers=headers, params=params)
+    refreshed = False
+    while True:
+        headers = {"Authorization": f"Bearer {user.access_token}"}
+        response = http_session.get(
+            f"{STRAVA_API_URL}/athlete/activities",
+            headers=headers,
+            params=params,
+            timeout=STRAVA_TIMEOUT,
+        )
 
         # If unauthorized, try refreshing token once
-        if response.status_code == 401:
-            user.access_token = refresh_access_token(user, session)
-            headers = {"Authorization": f"Bearer {user.access_token}"}
-            response = requests.get(f"{STRAVA_API_URL}/athlete/activities", headers=headers, params=params)
+        if response.status_code == 401 and not refreshed:
+            user.access_token = refresh_access_token(user)
+            refreshed = True
+            continue
 
         if response.status_code != 200:
             raise Exception(f"Strava API error: {response.json()}")
 
-        return response.json()
\ No newline at end of file
+        page = response.json()
+        if page:
+            yield page
+
+        # A short page is the last one
+        if len(page) < per_page:
+            return
+        params["page"] += 1
+
+
+def iter_user_activities(user: User, after_timestamp: int = None, per_page: int = STRAVA_PAGE_SIZE) -> Iterator[dict]:
+    """
+    Stream a user's Strava activities one at a time across all pages.
+    """
+    for page in iter_activity_pages(user, after_timestamp=after_timestamp, per_page=per_page):
+        yield from page
+
+
+def fetch_user_activities(user: User, after_timestamp: int = None) -> List[dict]:
+    """
+    Fetch all Strava activities for a user.
+    Auto-refreshes access token if expired or unauthorized.
+    """
+    return list(iter_user_activities(user, after_timestamp=after_timestamp))
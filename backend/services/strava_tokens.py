@@ -0,0 +1,248 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+import asyncio
+import os
+import httpx
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import lazyload
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from ..db import engine
+from ..models.user import User
+from . import strava_async, strava_service
+from .strava_service import apply_token_data, refresh_token_payload, save_user_tokens, save_users_tokens
+
+# Treat tokens as expired this long before token_expires_at, so a token never dies mid-sync
+STRAVA_TOKEN_EXPIRY_MARGIN_SECONDS = int(os.getenv("STRAVA_TOKEN_EXPIRY_MARGIN_SECONDS", "300"))
+# The background pass renews every token expiring within this window
+STRAVA_TOKEN_REFRESH_AHEAD_SECONDS = int(os.getenv("STRAVA_TOKEN_REFRESH_AHEAD_SECONDS", "1800"))
+STRAVA_TOKEN_REFRESH_INTERVAL_SECONDS = float(os.getenv("STRAVA_TOKEN_REFRESH_INTERVAL_SECONDS", "600"))
+STRAVA_TOKEN_REFRESH_CONCURRENCY = int(os.getenv("STRAVA_TOKEN_REFRESH_CONCURRENCY", "10"))
+STRAVA_TOKEN_REFRESH_BATCH_SIZE = int(os.getenv("STRAVA_TOKEN_REFRESH_BATCH_SIZE", "500"))
+# Only users who synced (or signed up) within this many days are refreshed ahead;
+# anyone else gets a token on demand at their next sync
+STRAVA_TOKEN_REFRESH_ACTIVE_DAYS = int(os.getenv("STRAVA_TOKEN_REFRESH_ACTIVE_DAYS", "30"))
+# After a failed proactive refresh the user is skipped for this long, doubling per
+# consecutive failure up to the maximum
+STRAVA_TOKEN_REFRESH_BACKOFF_SECONDS = int(os.getenv("STRAVA_TOKEN_REFRESH_BACKOFF_SECONDS", "600"))
+STRAVA_TOKEN_REFRESH_MAX_BACKOFF_SECONDS = int(os.getenv("STRAVA_TOKEN_REFRESH_MAX_BACKOFF_SECONDS", "86400"))
+
+
+class StravaTokenRefreshError(Exception):
+    """
+    Strava refused a refresh_token grant (revoked or invalid refresh token).
+    """
+
+
+class CachedToken(NamedTuple):
+    access_token: str
+    refresh_token: Optional[str]
+    expires_at: Optional[datetime]
+
+
+def _usable(expires_at: Optional[datetime]) -> bool:
+    if expires_at is None:
+        return True
+    return datetime.utcnow() < expires_at - timedelta(seconds=STRAVA_TOKEN_EXPIRY_MARGIN_SECONDS)
+
+
+class StravaTokenManager:
+    """
+    Hands out Strava access tokens for users.
+
+    Valid tokens are cached in memory until shortly before they expire. Refreshes
+    are single-flight per user: concurrent callers for the same user await one
+    refresh instead of racing (each refresh can invalidate the previous token).
+    State is per process.
+    """
+
+    def __init__(self):
+        self._tokens: Dict[int, CachedToken] = {}
+        self._inflight: Dict[int, asyncio.Future] = {}
+        # user id -> (consecutive proactive failures, skip until)
+        self._failures: Dict[int, Tuple[int, datetime]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _remember(self, user: User) -> CachedToken:
+        token = CachedToken(user.access_token, user.refresh_token, user.token_expires_at)
+        self._tokens[user.id] = token
+        return token
+
+    def forget(self, user_id: int) -> None:
+        """
+        Drop the cached token, e.g. after the user re-authorizes or revokes access.
+        """
+        self._tokens.pop(user_id, None)
+        self._failures.pop(user_id, None)
+
+    async def get_access_token(self, user: User, rejected_token: Optional[str] = None) -> str:
+        """
+        A usable access token for the user, refreshing only when needed.
+        Pass the token Strava just rejected (401) as `rejected_token` to force
+        a refresh unless another caller has already replaced it.
+        The user instance is updated with the tokens handed out.
+        """
+        cached = self._tokens.get(user.id)
+        if cached and cached.access_token != rejected_token and _usable(cached.expires_at):
+            self._apply(user, cached)
+            return cached.access_token
+
+        if user.access_token and user.access_token != rejected_token and _usable(user.token_expires_at):
+            return self._remember(user).access_token
+
+        token = await self._refresh(user)
+        return token.access_token
+
+    @staticmethod
+    def _apply(user: User, token: CachedToken) -> None:
+        user.access_token = token.access_token
+        user.refresh_token = token.refresh_token
+        user.token_expires_at = token.expires_at
+
+    async def _refresh(self, user: User, persist: bool = True) -> CachedToken:
+        """
+        Single-flight refresh of the user's token. With persist=False the new
+        token is cached and applied to `user` but not saved; the caller saves it.
+        """
+        inflight = self._inflight.get(user.id)
+        if inflight is not None:
+            token = await asyncio.shield(inflight)
+            self._apply(user, token)
+            return token
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[user.id] = future
+        try:
+            cached = self._tokens.get(user.id)
+            if cached and cached.refresh_token:
+                # The cache may hold a newer refresh token than this user instance
+                user.refresh_token = cached.refresh_token
+
+            resp = await strava_async.get_async_client().post(
+                strava_service.STRAVA_TOKEN_URL,
+                data=refresh_token_payload(user),
+            )
+            if resp.status_code != 200:
+                raise StravaTokenRefreshError(f"Failed to refresh Strava token: {resp.json()}")
+
+            apply_token_data(user, resp.json())
+            if persist:
+                await run_in_threadpool(save_user_tokens, user)
+
+            token = self._remember(user)
+            future.set_result(token)
+            return token
+        except BaseException as exc:
+            self._tokens.pop(user.id, None)
+            if isinstance(exc, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(exc)
+                future.exception()  # mark retrieved; waiters (if any) still get the error
+            raise
+        finally:
+            del self._inflight[user.id]
+
+    # --- Proactive refresh ---
+    def _backing_off(self) -> Set[int]:
+        """
+        Ids of users to skip this pass. Entries whose backoff ran out more
+        than the maximum backoff ago are pruned: the user has stopped failing
+        (or stopped being selected), so their failure count starts over.
+        """
+        now = datetime.utcnow()
+        forget_before = now - timedelta(seconds=STRAVA_TOKEN_REFRESH_MAX_BACKOFF_SECONDS)
+        self._failures = {
+            user_id: entry for user_id, entry in self._failures.items() if entry[1] > forget_before
+        }
+        return {user_id for user_id, (_, skip_until) in self._failures.items() if skip_until > now}
+
+    def _record_failure(self, user_id: int) -> None:
+        failures = self._failures.get(user_id, (0, None))[0] + 1
+        delay = min(STRAVA_TOKEN_REFRESH_BACKOFF_SECONDS * 2 ** (failures - 1), STRAVA_TOKEN_REFRESH_MAX_BACKOFF_SECONDS)
+        self._failures[user_id] = (failures, datetime.utcnow() + timedelta(seconds=delay))
+
+    def _load_expiring_users(self) -> List[User]:
+        # Deauthorized users have no refresh token; users whose refresh keeps
+        # failing are backed off, so neither holds the head of every batch.
+        # Backed-off users are dropped here rather than in SQL (one bind
+        # parameter each), paging on (token_expires_at, id) until the batch is full
+        now = datetime.utcnow()
+        horizon = now + timedelta(seconds=STRAVA_TOKEN_REFRESH_AHEAD_SECONDS)
+        active_since = now - timedelta(days=STRAVA_TOKEN_REFRESH_ACTIVE_DAYS)
+        backing_off = self._backing_off()
+        query = (
+            select(User)
+            .where(
+                User.refresh_token.is_not(None),
+                User.token_expires_at < horizon,
+                func.coalesce(User.last_sync_at, User.created_at) >= active_since,
+            )
+            .order_by(User.token_expires_at, User.id)
+            .limit(STRAVA_TOKEN_REFRESH_BATCH_SIZE)
+            .options(lazyload("*"))
+        )
+
+        users: List[User] = []
+        with Session(engine) as session:
+            page = session.exec(query).all()
+            while True:
+                users.extend(user for user in page if user.id not in backing_off)
+                if len(users) >= STRAVA_TOKEN_REFRESH_BATCH_SIZE or len(page) < STRAVA_TOKEN_REFRESH_BATCH_SIZE:
+                    return users[:STRAVA_TOKEN_REFRESH_BATCH_SIZE]
+                last = page[-1]
+                page = session.exec(
+                    query.where(tuple_(User.token_expires_at, User.id) > tuple_(last.token_expires_at, last.id))
+                ).all()
+
+    async def refresh_expiring_tokens(self) -> Dict[str, int]:
+        """
+        Refresh every token expiring within STRAVA_TOKEN_REFRESH_AHEAD_SECONDS,
+        soonest first and a bounded number at a time, so syncs find a valid token.
+        Only recently active users are included; a refresh Strava refuses (or
+        that fails over HTTP) backs the user off for an exponentially growing
+        delay. The new tokens are saved together in one UPDATE and commit.
+        """
+        users = await run_in_threadpool(self._load_expiring_users)
+        semaphore = asyncio.Semaphore(STRAVA_TOKEN_REFRESH_CONCURRENCY)
+
+        async def refresh(user: User) -> bool:
+            async with semaphore:
+                try:
+                    await self._refresh(user, persist=False)
+                except (StravaTokenRefreshError, httpx.HTTPError):
+                    self._record_failure(user.id)
+                    return False
+                except Exception:
+                    return False
+                self._failures.pop(user.id, None)
+                return True
+
+        results = await asyncio.gather(*(refresh(user) for user in users))
+        refreshed = [user for user, ok in zip(users, results) if ok]
+        # If this fails the new tokens stay cached (and in use) in this
+        # process, and the next pass refreshes the users again
+        await run_in_threadpool(save_users_tokens, refreshed)
+        return {"refreshed": len(refreshed), "failed": len(users) - len(refreshed)}
+
+    async def _run_periodically(self) -> None:
+        while True:
+            try:
+                await self.refresh_expiring_tokens()
+            except Exception:
+                # Keep the refresher alive through transient DB/network errors
+                pass
+            await asyncio.sleep(STRAVA_TOKEN_REFRESH_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run_periodically())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+token_manager = StravaTokenManager()
@@ -0,0 +1,210 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from ..models.activity import Activity
+from ..models.user import User
+from ..models.user_challenge import UserChallenge
+from .activities import ACTIVITY_RUN, ACTIVITY_TYPE_CODES, normalize_activity
+from .activity_store import insert_new_activities, sync_cursor
+from .progress import TIER_XP_MULTIPLIERS, apply_activities_to_challenge, calculate_base_xp, check_level_up
+from .awards import award_badges_and_titles
+from .strava_async import async_fetch_user_activities
+
+
+def apply_activity_sync(
+    user: User,
+    activities: Iterable[dict],
+    session: Session,
+    advance_cursor: bool = True
+) -> Dict[str, Any]:
+    """
+    Store a batch of raw Strava activities and apply the new ones to a user, then commit:
+    - Challenge progress
+    - User XP and momentum
+    - Badges and titles
+
+    Activities already stored (same Strava id) are skipped, so retries and
+    overlapping fetch windows never double count. The new activities are
+    normalized once (km, timestamp, type code, sorted by date) and every joined
+    challenge is advanced over that array in a single pass.
+    Pass advance_cursor=False for out-of-band activities (e.g. webhook events)
+    so `last_sync_at` only records full syncs.
+
+    `user` only identifies the user: the caller's copy may predate a Strava
+    fetch, so the row is read again here and the progress is added to that.
+    """
+    activities = list(activities)
+    normalized = insert_new_activities(user.id, activities, session)
+    runs = [activity for activity in normalized if activity.type_code == ACTIVITY_RUN]
+
+    # Re-read after the insert: on SQLite the insert already holds the write
+    # lock, elsewhere FOR UPDATE locks the row, so no commit made while the
+    # caller waited on Strava (another sync, a webhook event) is overwritten
+    user = session.get(User, user.id, with_for_update=True, populate_existing=True)
+
+    # Base XP and distance from all running activities
+    total_distance_added = 0.0
+    base_xp_added = 0
+    for run in runs:
+        total_distance_added += run.distance_km
+        base_xp_added += calculate_base_xp(run.distance_km, in_challenge=False)
+
+    # All UserChallenge records plus their challenges, in two queries
+    user_challenges = session.exec(
+        select(UserChallenge)
+        .where(UserChallenge.user_id == user.id)
+        .options(selectinload(UserChallenge.challenge))
+    ).all()
+
+    total_xp_added = 0
+    updated_challenges = []
+
+    for uc in user_challenges:
+        challenge = uc.challenge
+        if not challenge:
+            continue
+
+        challenge_xp = apply_activities_to_challenge(uc, challenge.tier, runs)
+
+        if challenge_xp > 0:
+            updated_challenges.append({
+                "user_challenge_id": uc.id,
+                "distance_completed_km": uc.distance_completed_km,
+                "xp_earned": uc.xp_earned,
+                "completed": uc.completed,
+                "streak": uc.streak
+            })
+            session.add(uc)
+
+        total_xp_added += challenge_xp
+
+    # Update user stats; untouched when nothing was added, so a sync with no
+    # new activities (which takes no write lock on SQLite) writes no counters
+    total_xp_added += base_xp_added
+    if runs:
+        user.xp += total_xp_added
+        user.momentum += total_xp_added // 10
+        user.total_distance_km += total_distance_added
+    if advance_cursor:
+        user.last_sync_at = datetime.utcnow()
+
+    # Check for level up
+    leveled_up = check_level_up(user)
+
+    # Award badges & titles
+    new_badges, new_titles = award_badges_and_titles(user, user_challenges, session)
+
+    session.add(user)
+    session.commit()
+
+    return {
+        "activities_count": len(normalized),
+        "duplicates_skipped": len(activities) - len(normalized),
+        "xp_added": total_xp_added,
+        "base_xp_added": base_xp_added,
+        "challenge_xp_added": total_xp_added - base_xp_added,
+        "leveled_up": leveled_up,
+        "current_level": user.level,
+        "challenges_updated": updated_challenges,
+        "new_badges": new_badges,
+        "new_titles": new_titles
+    }
+
+
+def _counted_km(activity_type: Optional[str], distance_km: float) -> float:
+    # Distance an activity adds to progress; only runs count
+    return distance_km if ACTIVITY_TYPE_CODES.get(activity_type) == ACTIVITY_RUN else 0.0
+
+
+def revise_activity(
+    user_id: int,
+    strava_activity_id: int,
+    activity: Optional[dict],
+    session: Session
+) -> Optional[Dict[str, Any]]:
+    """
+    Apply a Strava update (the activity as it is now) or delete (None) to a
+    stored activity, then commit.
+
+    The stored row is updated or removed and the difference in counted
+    distance is applied to the user's distance, XP and momentum and to the
+    distance and XP of every challenge joined before the activity was
+    stored (the ones it was applied to). Streak bonuses, streaks,
+    completion, levels and awards already earned are left as they are.
+
+    Returns None if the activity was never stored, i.e. never counted.
+    """
+    stored = session.exec(
+        select(Activity).where(Activity.strava_activity_id == strava_activity_id, Activity.user_id == user_id)
+    ).first()
+    if stored is None:
+        return None
+
+    old_km = _counted_km(stored.type, stored.distance_km)
+    stored_at = stored.created_at
+    if activity is None:
+        new_km = 0.0
+        session.delete(stored)
+    else:
+        normalized = normalize_activity(activity)
+        new_km = _counted_km(activity.get("type"), normalized.distance_km)
+        stored.name = activity.get("name")
+        stored.type = activity.get("type")
+        stored.distance_km = normalized.distance_km
+        stored.moving_time = activity.get("moving_time")
+        stored.start_date = normalized.start_date
+        session.add(stored)
+    # Takes SQLite's write lock before the user is read (see apply_activity_sync)
+    session.flush()
+
+    distance_delta = new_km - old_km
+    xp_delta = 0.0
+    if distance_delta:
+        user = session.get(User, user_id, with_for_update=True, populate_existing=True)
+        user_challenges = session.exec(
+            select(UserChallenge)
+            .where(UserChallenge.user_id == user_id, UserChallenge.joined_at <= stored_at)
+            .options(selectinload(UserChallenge.challenge))
+        ).all()
+
+        xp_delta = calculate_base_xp(distance_delta, in_challenge=False)
+        for uc in user_challenges:
+            if not uc.challenge:
+                continue
+            challenge_xp = calculate_base_xp(distance_delta, in_challenge=True) * TIER_XP_MULTIPLIERS.get(uc.challenge.tier, 1.0)
+            uc.distance_completed_km = max(uc.distance_completed_km + distance_delta, 0.0)
+            uc.xp_earned = max(uc.xp_earned + challenge_xp, 0.0)
+            xp_delta += challenge_xp
+            session.add(uc)
+
+        user.xp = max(user.xp + xp_delta, 0)
+        user.momentum = max(user.momentum + int(xp_delta / 10), 0)
+        user.total_distance_km = max(user.total_distance_km + distance_delta, 0.0)
+        check_level_up(user)
+        session.add(user)
+
+    session.commit()
+    return {"deleted": activity is None, "distance_km_delta": distance_delta, "xp_delta": xp_delta}
+
+
+async def run_user_sync(user: User, session: Session) -> Dict[str, Any]:
+    """
+    Fetch a user's new Strava activities and apply them.
+    Strava I/O runs on the event loop; the DB work runs in the threadpool.
+    """
+    # Fetch from the stored-activity high-water mark (minus the late-upload lookback)
+    cursor = await run_in_threadpool(sync_cursor, user, session)
+    after_timestamp = int(cursor.replace(tzinfo=timezone.utc).timestamp())
+
+    # Give the DB connection back while waiting on Strava; apply_activity_sync reads
+    # the user again afterwards. Called inline: it only returns the connection to
+    # the pool, and must not wait behind threads blocked on that pool.
+    session.close()
+
+    # Fetch Strava activities (auto refresh token inside)
+    activities = await async_fetch_user_activities(user, after_timestamp=after_timestamp)
+
+    return await run_in_threadpool(apply_activity_sync, user, activities, session)
@@ -0,0 +1,235 @@
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional, Tuple
+import asyncio
+import json
+import os
+from sqlalchemy import exists
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from ..db import engine
+from ..models.strava_event import StravaEvent, StravaEventStatus
+from ..models.sync_job import SyncJob, SyncJobStatus, PENDING_STATUSES
+from ..models.user import User
+from ..utils.profiling import job_profile
+from .sync import run_user_sync
+
+SYNC_WORKER_CONCURRENCY = int(os.getenv("SYNC_WORKER_CONCURRENCY", "4"))
+SYNC_JOB_POLL_SECONDS = float(os.getenv("SYNC_JOB_POLL_SECONDS", "2"))
+# Running jobs older than this are assumed orphaned by a crashed worker and requeued
+SYNC_JOB_STALE_SECONDS = int(os.getenv("SYNC_JOB_STALE_SECONDS", "900"))
+
+
+async def async_enqueue_sync_job(user_id: int, session: AsyncSession) -> Tuple[SyncJob, bool]:
+    """
+    Queue a sync for the user, or return the job already queued/running for them.
+    Returns the job and whether it was newly queued.
+    """
+    pending = select(SyncJob).where(
+        SyncJob.user_id == user_id,
+        SyncJob.status.in_(PENDING_STATUSES)
+    )
+
+    existing = (await session.exec(pending)).first()
+    if existing:
+        return existing, False
+
+    job = SyncJob(user_id=user_id)
+    session.add(job)
+    try:
+        await session.commit()
+    except IntegrityError:
+        # Lost the race against a concurrent enqueue for the same user
+        await session.rollback()
+        return (await session.exec(pending)).one(), False
+
+    await session.refresh(job)
+    return job, True
+
+
+def _event_in_progress():
+    # The job's user has a webhook event being processed (and not orphaned)
+    cutoff = datetime.utcnow() - timedelta(seconds=SYNC_JOB_STALE_SECONDS)
+    return exists(
+        select(StravaEvent.id)
+        .join(User, User.strava_athlete_id == StravaEvent.owner_id)
+        .where(
+            User.id == SyncJob.user_id,
+            StravaEvent.status == StravaEventStatus.PROCESSING,
+            StravaEvent.processed_at >= cutoff
+        )
+    )
+
+
+def claim_next_job() -> Optional[int]:
+    """
+    Atomically move the oldest queued job to running and return its id.
+    Jobs of users with a webhook event in progress wait, so a user's
+    progress is only ever changed by one worker at a time.
+
+    The claim locks the user's row first, as claim_next_event does, so two
+    claims for one user are serialized and the second sees the first's
+    claim (under READ COMMITTED, not just with SQLite's single writer).
+    """
+    with Session(engine) as session:
+        while True:
+            candidate = session.exec(
+                select(SyncJob.id, SyncJob.user_id)
+                .where(SyncJob.status == SyncJobStatus.QUEUED, ~_event_in_progress())
+                .order_by(SyncJob.id)
+                .limit(1)
+            ).first()
+            if candidate is None:
+                return None
+
+            job_id, user_id = candidate
+            session.exec(select(User.id).where(User.id == user_id).with_for_update())
+            claimed = session.exec(
+                update(SyncJob)
+                .where(SyncJob.id == job_id, SyncJob.status == SyncJobStatus.QUEUED, ~_event_in_progress())
+                .values(status=SyncJobStatus.RUNNING, started_at=datetime.utcnow(), attempts=SyncJob.attempts + 1)
+            ).rowcount
+            session.commit()
+            if claimed:
+                return job_id
+
+
+def finish_job(job_id: int, status: SyncJobStatus, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+    with Session(engine) as session:
+        session.exec(
+            update(SyncJob)
+            .where(SyncJob.id == job_id)
+            .values(
+                status=status,
+                result=json.dumps(result, default=str) if result is not None else None,
+                error=error,
+                finished_at=datetime.utcnow(),
+            )
+        )
+        session.commit()
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Return orphaned running jobs to the queue. Returns how many were requeued.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=SYNC_JOB_STALE_SECONDS)
+    with Session(engine) as session:
+        requeued = session.exec(
+            update(SyncJob)
+            .where(SyncJob.status == SyncJobStatus.RUNNING, SyncJob.started_at < cutoff)
+            .values(status=SyncJobStatus.QUEUED)
+        ).rowcount
+        session.commit()
+        return requeued
+
+
+async def run_job(job_id: int) -> None:
+    """
+    Execute one claimed sync job and record its outcome.
+    """
+    with job_profile(job_id):
+        await _run_job(job_id)
+
+
+async def _run_job(job_id: int) -> None:
+    session = Session(engine)
+    try:
+        job = await run_in_threadpool(session.get, SyncJob, job_id)
+        user = await run_in_threadpool(session.get, User, job.user_id)
+        if not user:
+            raise Exception(f"User {job.user_id} not found")
+
+        result = await run_user_sync(user, session)
+        await run_in_threadpool(finish_job, job_id, SyncJobStatus.SUCCEEDED, result)
+    except Exception as exc:
+        await run_in_threadpool(session.rollback)
+        await run_in_threadpool(finish_job, job_id, SyncJobStatus.FAILED, None, str(exc))
+    finally:
+        await run_in_threadpool(session.close)
+
+
+class SyncWorkerPool:
+    """
+    In-process workers draining the sync_job table, plus any other queue
+    registered with add_queue().
+    Workers wake immediately on notify() and otherwise poll every SYNC_JOB_POLL_SECONDS,
+    which also picks up jobs queued by other processes.
+    """
+
+    def __init__(self, concurrency: int = SYNC_WORKER_CONCURRENCY, poll_seconds: float = SYNC_JOB_POLL_SECONDS):
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self._queues: List[Tuple[Callable[[], Optional[int]], Callable[[int], Awaitable[None]], Optional[Callable[[], int]]]] = []
+        self._next_queue = 0
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def add_queue(
+        self,
+        claim: Callable[[], Optional[int]],
+        run: Callable[[int], Awaitable[None]],
+        recover: Optional[Callable[[], int]] = None
+    ) -> None:
+        """
+        Register a queue: `claim` atomically takes the next item id (blocking, runs in
+        the threadpool), `run` processes it, `recover` requeues orphans at startup.
+        """
+        self._queues.append((claim, run, recover))
+
+    async def start(self) -> None:
+        for _claim, _run, recover in self._queues:
+            if recover:
+                await run_in_threadpool(recover)
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """
+        Wake idle workers; must be called from the event loop thread.
+        """
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _claim(self) -> Optional[Tuple[Callable[[int], Awaitable[None]], int]]:
+        # Start from a rotating queue so no queue starves the others
+        start = self._next_queue
+        self._next_queue = (start + 1) % len(self._queues)
+
+        for offset in range(len(self._queues)):
+            claim, run, _recover = self._queues[(start + offset) % len(self._queues)]
+            try:
+                item_id = await run_in_threadpool(claim)
+            except Exception:
+                # Keep the worker alive through transient DB errors
+                continue
+            if item_id is not None:
+                return run, item_id
+        return None
+
+    async def _worker(self) -> None:
+        while True:
+            # Clear before claiming so a notify() during the claim isn't lost
+            self._wakeup.clear()
+            claimed = await self._claim()
+            if claimed is not None:
+                run, item_id = claimed
+                await run(item_id)
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+
+sync_worker_pool = SyncWorkerPool()
+sync_worker_pool.add_queue(claim_next_job, run_job, recover=requeue_stale_jobs)
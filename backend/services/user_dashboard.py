@@ -0,0 +1,153 @@
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+import hashlib
+import json
+import os
+import threading
+import time
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..db import async_engine, engine
+from ..models.user import User
+from ..models.badge import Badge
+from ..models.title import Title
+from ..models.user_badge import UserBadge
+from ..models.user_title import UserTitle
+from ..utils.cache import LRUCache
+from ..utils.invalidation import on_commit
+from ..utils.serialization import serialize_user_basic, serialize_badge, serialize_title
+
+USER_DASHBOARD_CACHE_SIZE = int(os.getenv("USER_DASHBOARD_CACHE_SIZE", "10000"))
+# Entries are invalidated on commit in this process; the TTL bounds how long
+# changes committed by other processes can go unseen
+USER_DASHBOARD_CACHE_TTL_SECONDS = float(os.getenv("USER_DASHBOARD_CACHE_TTL_SECONDS", "300"))
+
+
+class CachedDashboard(NamedTuple):
+    etag: str
+    body: bytes  # rendered JSON
+
+
+def build_dashboard(user: User) -> Dict[str, Any]:
+    """
+    The /users/me payload: safe user fields plus badges and titles.
+    Expects user_badges and user_titles to be loaded.
+    """
+    user_data = serialize_user_basic(user)
+
+    # Serialize badges
+    badges = [serialize_badge(ub.badge) for ub in user.user_badges]
+
+    # Serialize titles with active status
+    titles = []
+    active_title = None
+    for ut in user.user_titles:
+        titles.append(serialize_title(ut.title, ut.is_active))
+        if ut.is_active and active_title is None:
+            active_title = ut.title
+
+    user_data.update({
+        "badges": badges,
+        "titles": titles,
+        "active_title": serialize_title(active_title) if active_title else None
+    })
+    return user_data
+
+
+def render_dashboard(payload: Dict[str, Any]) -> CachedDashboard:
+    """
+    Render the payload once; the ETag is a hash of the bytes, so it only
+    changes when the dashboard does (and agrees across processes).
+    """
+    body = json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+    return CachedDashboard(etag=f'"{hashlib.sha1(body).hexdigest()}"', body=body)
+
+
+# --- Per-user cache, invalidated when a user's row, badges or titles change ---
+_lock = threading.Lock()
+_cache = LRUCache(USER_DASHBOARD_CACHE_SIZE)
+_generation = 0
+
+
+def _dashboard_query(user_id: int):
+    return (
+        select(User)
+        .where(User.id == user_id)
+        .options(
+            selectinload(User.user_badges).selectinload(UserBadge.badge),
+            selectinload(User.user_titles).selectinload(UserTitle.title)
+        )
+    )
+
+
+def _render_and_cache(user_id: int, user: Optional[User], generation: int) -> Optional[CachedDashboard]:
+    if not user:
+        return None
+
+    dashboard = render_dashboard(build_dashboard(user))
+    with _lock:
+        # Don't cache a payload that was invalidated while it was being built
+        if generation == _generation:
+            _cache.set(user_id, dashboard, expires_at=time.time() + USER_DASHBOARD_CACHE_TTL_SECONDS)
+    return dashboard
+
+
+def get_dashboard(user_id: int) -> Optional[CachedDashboard]:
+    """
+    Return the user's rendered dashboard, loading it from the primary on a
+    cache miss. None if the user doesn't exist.
+
+    Misses never read a replica: an invalidation fires right after the
+    commit, and a lagging replica would refill the cache with the
+    pre-commit dashboard until the TTL runs out.
+    """
+    cached = _cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    generation = _generation
+    with Session(engine, expire_on_commit=False) as session:
+        user = session.exec(_dashboard_query(user_id)).first()
+        return _render_and_cache(user_id, user, generation)
+
+
+async def async_get_dashboard(user_id: int) -> Optional[CachedDashboard]:
+    """
+    get_dashboard for async routes.
+    """
+    cached = _cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    generation = _generation
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        user = (await session.exec(_dashboard_query(user_id))).first()
+        return _render_and_cache(user_id, user, generation)
+
+
+def invalidate_dashboards(user_ids: Iterable[int]) -> None:
+    global _generation
+    with _lock:
+        _generation += 1
+        for user_id in user_ids:
+            _cache.discard(user_id)
+
+
+def invalidate_all_dashboards(*_args) -> None:
+    """
+    Drop every cached dashboard, e.g. after a catalog edit or a bulk backfill.
+    """
+    global _generation
+    with _lock:
+        _generation += 1
+        _cache.clear()
+
+
+def _owner_id(instance) -> int:
+    return instance.id if isinstance(instance, User) else instance.user_id
+
+
+on_commit([User, UserBadge, UserTitle], invalidate_dashboards, snapshot=_owner_id)
+on_commit([Badge, Title], invalidate_all_dashboards, snapshot=lambda instance: None)
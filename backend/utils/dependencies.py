@@ -1,27 +1,35 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-from sqlmodel import Session
+from jose import JWTError
+from sqlalchemy import inspect
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Callable, List, Optional
+import hmac
+import os
+import time
 
-from ..db import get_session
+from ..db import get_async_session, get_session
 from ..models.user import User
-from ..utils.security import SECRET_KEY, ALGORITHM
+from .cache import LRUCache
+from .invalidation import on_commit
+from .security import decode_access_token
 
 # HTTPBearer security scheme
 security = HTTPBearer()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: Session = Depends(get_session)
-) -> User:
-    """
-    Dependency to get the current user from a JWT token.
-    Uses the same session dependency so user instance is bound
-    to the request's DB session.
-    """
-    token = credentials.credentials
+# Shared secret for operator endpoints; admin routes are disabled when unset
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
+
+# Users confirmed to exist are trusted for this long without a query
+AUTH_IDENTITY_TTL_SECONDS = float(os.getenv("AUTH_IDENTITY_TTL_SECONDS", "300"))
+AUTH_IDENTITY_CACHE_SIZE = int(os.getenv("AUTH_IDENTITY_CACHE_SIZE", "10000"))
+
+_known_users = LRUCache(AUTH_IDENTITY_CACHE_SIZE)
+
+def _user_id_from_token(token: str) -> int:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         user_id: int = payload.get("user_id")
         if user_id is None:
             raise HTTPException(
@@ -33,11 +41,83 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token"
         )
+    return user_id
+
+def _user_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="User not found"
+    )
+
+def _remember_user(user_id: int) -> None:
+    _known_users.set(user_id, True, expires_at=time.time() + AUTH_IDENTITY_TTL_SECONDS)
+
+def _forget_deleted_users(user_ids: List[Optional[int]]) -> None:
+    for user_id in user_ids:
+        if user_id is not None:
+            _known_users.discard(user_id)
+
+on_commit([User], _forget_deleted_users, snapshot=lambda user: user.id if inspect(user).deleted else None)
+
+async def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    session: AsyncSession = Depends(get_async_session)
+) -> int:
+    """
+    Dependency for routes that only need to know who is calling.
+    Runs no query at all when the token and user were seen recently,
+    and never needs a threadpool worker.
+    """
+    user_id = _user_id_from_token(credentials.credentials)
+    if _known_users.get(user_id) is None:
+        if (await session.exec(select(User.id).where(User.id == user_id))).first() is None:
+            raise _user_not_found()
+        _remember_user(user_id)
+    return user_id
 
-    user = session.get(User, user_id)
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    session: Session = Depends(get_session)
+) -> User:
+    """
+    Dependency to get the current user from a JWT token.
+    Uses the same session dependency so user instance is bound
+    to the request's DB session. Loads the user row only; use
+    current_user_loader() for routes that need relationships.
+    """
+    user = session.get(User, _user_id_from_token(credentials.credentials))
     if not user:
+        raise _user_not_found()
+    _remember_user(user.id)
+    return user
+
+def current_user_loader(*options) -> Callable[..., User]:
+    """
+    Build a get_current_user variant that eager-loads relationships in the same
+    round trip, e.g. Depends(current_user_loader(selectinload(User.user_badges))).
+    """
+    def get_current_user_with_options(
+        credentials: HTTPAuthorizationCredentials = Depends(security),
+        session: Session = Depends(get_session)
+    ) -> User:
+        user_id = _user_id_from_token(credentials.credentials)
+        user = session.exec(select(User).where(User.id == user_id).options(*options)).first()
+        if not user:
+            raise _user_not_found()
+        _remember_user(user.id)
+        return user
+
+    return get_current_user_with_options
+
+def is_admin_key(key: Optional[str]) -> bool:
+    return bool(ADMIN_API_KEY and key and hmac.compare_digest(key, ADMIN_API_KEY))
+
+def require_admin(x_admin_key: Optional[str] = Header(default=None)) -> None:
+    """
+    Dependency guarding operator endpoints with the X-Admin-Key header.
+    """
+    if not is_admin_key(x_admin_key):
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
         )
-    return user
\ No newline at end of file
@@ -0,0 +1,53 @@
+from itertools import chain
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Type
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# (models, snapshot, callback) triples registered through on_commit()
+_hooks: List[Tuple[Tuple[Type, ...], Callable[[Any], Any], Callable[[List[Any]], None]]] = []
+
+_PENDING_KEY = "commit_hooks_pending"
+
+
+def on_commit(
+    models: Iterable[Type],
+    callback: Callable[[List[Any]], None],
+    snapshot: Optional[Callable[[Any], Any]] = None,
+) -> None:
+    """
+    Call `callback` after every commit that inserted, updated or deleted
+    instances of `models`.
+
+    `snapshot(instance)` runs at flush time, while the instance still holds
+    the values that were written, and its results are passed to `callback`
+    once the transaction commits. Rolled back changes are discarded.
+    """
+    _hooks.append((tuple(models), snapshot or (lambda instance: instance), callback))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context) -> None:
+    if not _hooks:
+        return
+
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    for instance in chain(session.new, session.dirty, session.deleted):
+        for position, (models, snapshot, _callback) in enumerate(_hooks):
+            if isinstance(instance, models):
+                pending.setdefault(position, []).append(snapshot(instance))
+
+
+@event.listens_for(Session, "after_commit")
+def _run_callbacks(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    for position, snapshots in pending.items():
+        _models, _snapshot, callback = _hooks[position]
+        callback(snapshots)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
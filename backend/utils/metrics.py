@@ -0,0 +1,220 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+import os
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Request timing and query counting are on unless disabled here
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# Bearer token for scraping /metrics (Prometheus' `authorization` setting); the
+# admin key is accepted too, and with neither set the endpoint refuses everyone
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+# Adds X-DB-Query-Count / X-DB-Time-Ms / X-Response-Time-Ms to every response
+METRICS_DEBUG_HEADERS = os.getenv("METRICS_DEBUG_HEADERS", "0") == "1"
+
+# Histogram upper bounds in seconds (Prometheus client defaults) and in queries
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+# Label for requests that matched no route, so unknown paths can't grow the label set
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus layout; not thread-safe on
+    its own, callers hold the registry lock.
+    """
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class RequestStats:
+    """
+    Queries and DB time of one request, filled in by the engine hooks.
+    """
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# Set by the middleware for the duration of a request; copied into
+# threadpool workers and AsyncSession's greenlets with the context
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("metrics_request", default=None)
+
+
+class MetricsRegistry:
+    """
+    Per-route request, status, latency and query metrics, plus process-wide
+    query totals (including background workers), rendered in the Prometheus
+    text exposition format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._queries: Dict[Tuple[str, str], Histogram] = {}
+        self._db_seconds: Dict[Tuple[str, str], float] = {}
+        self._statuses: Dict[Tuple[str, str, int], int] = {}
+        self._in_flight = 0
+        self.db_queries_total = 0
+        self.db_seconds_total = 0.0
+
+    def request_started(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+
+    def request_finished(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            self._in_flight -= 1
+            latency = self._latency.get(key)
+            if latency is None:
+                latency = self._latency[key] = Histogram(LATENCY_BUCKETS)
+                self._queries[key] = Histogram(QUERY_COUNT_BUCKETS)
+                self._db_seconds[key] = 0.0
+            latency.observe(seconds)
+            self._queries[key].observe(stats.queries)
+            self._db_seconds[key] += stats.db_seconds
+            status_key = (method, route, status)
+            self._statuses[status_key] = self._statuses.get(status_key, 0) + 1
+
+    def query_finished(self, seconds: float) -> None:
+        with self._lock:
+            self.db_queries_total += 1
+            self.db_seconds_total += seconds
+
+    def reset(self) -> None:
+        self.__init__()
+
+    def render(self) -> str:
+        with self._lock:
+            lines: List[str] = []
+
+            def header(name: str, kind: str, help_text: str) -> None:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+            def histogram(name: str, histograms: Dict[Tuple[str, str], Histogram]) -> None:
+                for (method, route), data in sorted(histograms.items()):
+                    labels = f'method="{method}",route="{route}"'
+                    cumulative = 0
+                    for bound, bucket in zip((*data.bounds, "+Inf"), data.counts):
+                        cumulative += bucket
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f"{name}_sum{{{labels}}} {data.total}")
+                    lines.append(f"{name}_count{{{labels}}} {data.count}")
+
+            header("http_requests_total", "counter", "HTTP requests by route and status code.")
+            for (method, route, status), count in sorted(self._statuses.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+
+            header("http_request_duration_seconds", "histogram", "HTTP request latency by route.")
+            histogram("http_request_duration_seconds", self._latency)
+
+            header("http_requests_in_flight", "gauge", "HTTP requests currently being served.")
+            lines.append(f"http_requests_in_flight {self._in_flight}")
+
+            header("http_request_db_queries", "histogram", "Database queries per HTTP request by route.")
+            histogram("http_request_db_queries", self._queries)
+
+            header("http_request_db_seconds_total", "counter", "Time spent in database queries by route.")
+            for (method, route), seconds in sorted(self._db_seconds.items()):
+                lines.append(f'http_request_db_seconds_total{{method="{method}",route="{route}"}} {seconds}')
+
+            header("db_queries_total", "counter", "Database queries from any source, including background workers.")
+            lines.append(f"db_queries_total {self.db_queries_total}")
+            header("db_query_seconds_total", "counter", "Time spent in database queries from any source.")
+            lines.append(f"db_query_seconds_total {self.db_seconds_total}")
+            return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+# --- Query instrumentation (every engine, sync and async) ---
+_QUERY_START_KEY = "metrics_query_start"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_QUERY_START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info[_QUERY_START_KEY].pop()
+    seconds = time.perf_counter() - started
+    registry.query_finished(seconds)
+    stats = _current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += seconds
+
+
+if METRICS_ENABLED:
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- Request timing ---
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request and attributing its queries
+    to the matched route template (e.g. /challenges/{challenge_id}/leaderboard).
+    """
+
+    def __init__(self, app, debug_headers: bool = METRICS_DEBUG_HEADERS):
+        self.app = app
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        status = 500
+        start = time.perf_counter()
+        registry.request_started()
+
+        async def send_with_metrics(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.debug_headers:
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"x-db-query-count", str(stats.queries).encode()),
+                        (b"x-db-time-ms", f"{stats.db_seconds * 1000:.2f}".encode()),
+                        (b"x-response-time-ms", f"{elapsed_ms:.2f}".encode()),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            route = scope.get("route")
+            registry.request_finished(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status,
+                time.perf_counter() - start,
+                stats,
+            )
+            _current_request.reset(token)
@@ -0,0 +1,283 @@
+"""
+On-demand sampling profiler for single requests, sync jobs and CLI scripts.
+
+A profiled request is one carrying `X-Profile: 1` (or `?profile=1`) together
+with a valid X-Admin-Key. ProfilingMiddleware samples it and writes two
+files to PROFILES_DIR, named after the request id (X-Request-ID, or a new
+one returned in X-Profile-Id):
+
+  <id>.collapsed   one "frame;frame;frame count" line per stack, for
+                   flamegraph.pl, speedscope or inferno
+  <id>.txt         top functions by self and total time
+
+Requests without the trigger pay one header scan; nothing is sampled.
+
+The sampler follows the request's asyncio task: while the task runs, the
+event loop thread's stack is recorded; while it is suspended, its await
+chain is recorded under an "[await]" leaf (time spent waiting on Strava or
+on a threadpool call). Threadpool workers running backend code are sampled
+too, under "[threadpool]"; on a busy server that includes other requests.
+
+POST /activities/sync also profiles the sync job it queues (<id>-job.*),
+since that is where the Strava fetch, progress updates, awards and commit
+happen, as long as the job runs in this process. A request that returns the
+job already queued or running for the user profiles no job.
+
+Scripts: python -m backend.utils.profiling backend.scripts.<name> [args...]
+"""
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from types import FrameType
+from typing import Dict, Iterator, List, Optional
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+PROFILES_DIR = os.getenv("PROFILES_DIR", os.path.join(tempfile.gettempdir(), "gamified-running-profiles"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "2"))
+PROFILE_TOP_FUNCTIONS = 30
+
+# Frame labels show paths relative to the project root
+_ROOT_DIR = str(Path(__file__).resolve().parents[2])
+_THREADPOOL_PREFIX = "AnyIO worker thread"
+
+# Profile id of the request being profiled, for code that hands work off (sync jobs)
+_current_profile_id: ContextVar[Optional[str]] = ContextVar("profile_id", default=None)
+# Sync job id -> profile id, for jobs queued by a profiled request
+_pending_jobs: Dict[int, str] = {}
+
+
+def current_profile_id() -> Optional[str]:
+    return _current_profile_id.get()
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_ROOT_DIR):
+        filename = os.path.relpath(filename, _ROOT_DIR)
+    elif "site-packages" in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    else:
+        filename = os.path.basename(filename)
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({filename})"
+
+
+def _stack(frame: Optional[FrameType], stop_at: Optional[FrameType] = None) -> List[str]:
+    # Outermost first; starts at `stop_at` when it is on the stack
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        if frame is stop_at:
+            break
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def _await_chain(coro) -> List[str]:
+    # Outermost first, following what each suspended coroutine awaits
+    labels = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        labels.append(_frame_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return labels
+
+
+def _in_backend(frame: Optional[FrameType]) -> bool:
+    while frame is not None:
+        if frame.f_code.co_filename.startswith(os.path.join(_ROOT_DIR, "backend")):
+            return True
+        frame = frame.f_back
+    return False
+
+
+class SamplingProfiler:
+    """
+    Samples stacks every PROFILE_INTERVAL_MS from a background thread.
+    With a task, follows that asyncio task (see module docstring); without
+    one, samples the thread that started it and every other thread.
+    """
+
+    def __init__(self, task: Optional[asyncio.Task] = None, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.task = task
+        self.interval = interval_ms / 1000
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._loop = task.get_loop() if task else None
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    def start(self) -> "SamplingProfiler":
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        self._sampler.join()
+        self.duration = time.perf_counter() - self._started
+        return self
+
+    def _run(self) -> None:
+        sampler_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            threads = {thread.ident: thread.name for thread in threading.enumerate()}
+            self.samples += 1
+            if self.task is None:
+                for thread_id, frame in frames.items():
+                    if thread_id != sampler_id:
+                        prefix = [] if thread_id == self._thread_id else [f"[thread {threads.get(thread_id, thread_id)}]"]
+                        self.stacks[";".join(prefix + _stack(frame))] += 1
+                continue
+
+            if self.task.done():
+                continue
+            root = self.task.get_coro().cr_frame
+            if asyncio.current_task(self._loop) is self.task:
+                self.stacks[";".join(_stack(frames.get(self._thread_id), stop_at=root))] += 1
+            else:
+                self.stacks[";".join(_await_chain(self.task.get_coro()) + ["[await]"])] += 1
+            for thread_id, frame in frames.items():
+                if threads.get(thread_id, "").startswith(_THREADPOOL_PREFIX) and _in_backend(frame):
+                    self.stacks[";".join(["[threadpool]"] + _stack(frame))] += 1
+
+    # --- Reports ---
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = PROFILE_TOP_FUNCTIONS) -> str:
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            self_counts[frames[-1]] += count
+            for label in set(frames):
+                total_counts[label] += count
+        sample_ms = self.duration * 1000 / self.samples if self.samples else 0.0
+
+        lines = [f"{self.samples} samples over {self.duration * 1000:.1f} ms (~{sample_ms:.2f} ms each)", ""]
+        for title, counts in (("Self time", self_counts), ("Total time", total_counts)):
+            lines.append(f"{title}:")
+            lines.append(f"{'samples':>8} {'ms':>9} {'%':>6}  function")
+            for label, count in counts.most_common(limit):
+                share = 100 * count / self.samples if self.samples else 0.0
+                lines.append(f"{count:>8} {count * sample_ms:>9.1f} {share:>5.1f}%  {label}")
+            lines.append("")
+        return "\n".join(lines)
+
+    def write(self, profile_id: str, directory: str = PROFILES_DIR) -> Path:
+        os.makedirs(directory, exist_ok=True)
+        base = Path(directory) / profile_id
+        Path(f"{base}.collapsed").write_text(self.collapsed())
+        Path(f"{base}.txt").write_text(self.top_functions())
+        return base
+
+
+@contextmanager
+def profiled(profile_id: str, task: Optional[asyncio.Task] = None, directory: str = PROFILES_DIR) -> Iterator[SamplingProfiler]:
+    """
+    Profile the enclosed block (or `task`) and write its report as `profile_id`.
+    """
+    profiler = SamplingProfiler(task).start()
+    token = _current_profile_id.set(profile_id)
+    try:
+        yield profiler
+    finally:
+        _current_profile_id.reset(token)
+        profiler.stop().write(profile_id, directory)
+
+
+# --- Sync jobs ---
+def profile_job(job_id: int, profile_id: str) -> None:
+    """
+    Profile the next run of a sync job queued by a profiled request.
+    """
+    _pending_jobs[job_id] = profile_id
+
+
+def job_profile(job_id: int):
+    """
+    Context manager for a sync job run: profiles it if requested, otherwise a no-op.
+    """
+    profile_id = _pending_jobs.pop(job_id, None)
+    if profile_id is None:
+        return nullcontext()
+    return profiled(f"{profile_id}-job", task=asyncio.current_task())
+
+
+# --- Requests ---
+def _requested(scope) -> bool:
+    query = scope.get("query_string", b"")
+    if query and b"profile=1" in query.split(b"&"):
+        return True
+    return any(name == b"x-profile" and value == b"1" for name, value in scope["headers"])
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests that ask for it with an admin key.
+    """
+
+    def __init__(self, app, is_admin_key):
+        self.app = app
+        self.is_admin_key = is_admin_key
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if not self.is_admin_key(headers.get(b"x-admin-key", b"").decode()):
+            await self.app(scope, receive, send)
+            return
+
+        # The id names files, so only safe characters; one with none left gets a new id
+        profile_id = headers.get(b"x-request-id", b"").decode()
+        profile_id = "".join(ch for ch in profile_id if ch.isalnum() or ch in "-_")[:64] or uuid.uuid4().hex[:12]
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        with profiled(profile_id, task=asyncio.current_task()):
+            await self.app(scope, receive, send_with_id)
+
+
+def main(argv: List[str]) -> int:
+    import runpy
+
+    if not argv:
+        print("Usage: python -m backend.utils.profiling <module> [args...]")
+        return 2
+    module = argv[0]
+    profile_id = f"{module.rsplit('.', 1)[-1]}-{time.strftime('%Y%m%d-%H%M%S')}"
+    sys.argv = argv
+    exit_code = 0
+    with profiled(profile_id):
+        try:
+            runpy.run_module(module, run_name="__main__", alter_sys=True)
+        except SystemExit as exc:
+            exit_code = exc.code if isinstance(exc.code, int) else (0 if exc.code is None else 1)
+    print(f"Profile written to {Path(PROFILES_DIR) / profile_id}.collapsed and .txt", file=sys.stderr)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,183 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+import logging
+import os
+import re
+import time
+import traceback
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("backend.query_audit")
+
+# "off", "log" (warn about repeated and slow queries) or "strict" (also raise)
+QUERY_AUDIT_MODES = ("off", "log", "strict")
+QUERY_AUDIT = os.getenv("QUERY_AUDIT", "off")
+# A statement shape run more than this many times in one request/run is flagged
+QUERY_AUDIT_REPEAT_THRESHOLD = int(os.getenv("QUERY_AUDIT_REPEAT_THRESHOLD", "5"))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+
+if QUERY_AUDIT not in QUERY_AUDIT_MODES:
+    raise ValueError(f"QUERY_AUDIT must be one of {', '.join(QUERY_AUDIT_MODES)}, got {QUERY_AUDIT!r}")
+
+BACKEND_DIR = str(Path(__file__).resolve().parents[1])
+_INTERNAL_FILES = {str(Path(__file__).resolve()), str(Path(BACKEND_DIR) / "utils" / "metrics.py")}
+
+
+class NPlusOneError(Exception):
+    """
+    Raised in strict mode when a statement shape repeats past the threshold.
+    """
+
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),  # string literals
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),  # numbers
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)"), "(?+)"),  # IN lists of any length
+    (re.compile(r"\s+"), " "),
+]
+
+
+def fingerprint(statement: str) -> str:
+    """
+    The statement's shape: literals and parameter lists collapsed, so the
+    same query with different ids fingerprints the same.
+    """
+    for pattern, replacement in _LITERALS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+def call_site() -> str:
+    """
+    Innermost frame in the backend package outside the instrumentation.
+    """
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(BACKEND_DIR) and frame.filename not in _INTERNAL_FILES:
+            return f"{os.path.relpath(frame.filename, Path(BACKEND_DIR).parent)}:{frame.lineno} in {frame.name}"
+    return "<outside backend>"
+
+
+@dataclass
+class RepeatedQuery:
+    fingerprint: str
+    count: int
+    call_site: str
+
+
+@dataclass
+class SlowQuery:
+    statement: str
+    milliseconds: float
+    call_site: str
+
+
+@dataclass
+class QueryAudit:
+    """
+    Statement shapes and slow queries seen during one request or script run.
+    """
+    name: str
+    threshold: int = QUERY_AUDIT_REPEAT_THRESHOLD
+    slow_ms: float = SLOW_QUERY_MS
+    allow: Iterable[str] = ()
+    counts: Dict[str, int] = field(default_factory=dict)
+    call_sites: Dict[str, str] = field(default_factory=dict)
+    slow: List[SlowQuery] = field(default_factory=list)
+
+    def record(self, statement: str, seconds: float) -> None:
+        shape = fingerprint(statement)
+        count = self.counts.get(shape, 0) + 1
+        self.counts[shape] = count
+        # The stack is only walked once per offending shape and for slow queries
+        if count == self.threshold + 1:
+            self.call_sites[shape] = call_site()
+        if seconds * 1000 >= self.slow_ms:
+            self.slow.append(SlowQuery(statement, seconds * 1000, call_site()))
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def repeated(self) -> List[RepeatedQuery]:
+        allowed = set(self.allow)
+        return [
+            RepeatedQuery(shape, count, self.call_sites[shape])
+            for shape, count in self.counts.items()
+            if count > self.threshold and shape not in allowed
+        ]
+
+    def report(self) -> None:
+        for query in self.repeated:
+            logger.warning("N+1 in %s: %d× at %s: %s", self.name, query.count, query.call_site, query.fingerprint[:300])
+        for query in self.slow:
+            logger.warning("Slow query in %s (%.1f ms) at %s: %s", self.name, query.milliseconds, query.call_site, query.statement[:300])
+
+
+_current_audit: ContextVar[Optional[QueryAudit]] = ContextVar("query_audit", default=None)
+_QUERY_START_KEY = "query_audit_start"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_audit.get() is not None:
+        conn.info.setdefault(_QUERY_START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    audit = _current_audit.get()
+    if audit is not None:
+        audit.record(statement, time.perf_counter() - conn.info[_QUERY_START_KEY].pop())
+
+
+def _install_hooks() -> None:
+    # Installed on first use, so the audit costs nothing unless enabled
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def audit_queries(
+    name: str,
+    strict: bool = QUERY_AUDIT == "strict",
+    threshold: int = QUERY_AUDIT_REPEAT_THRESHOLD,
+    slow_ms: float = SLOW_QUERY_MS,
+    allow: Iterable[str] = ()
+) -> Iterator[QueryAudit]:
+    """
+    Audit every query run inside the block (and in threadpool calls and
+    tasks started from it), logging repeated shapes and slow queries at the
+    end. With strict, repeated shapes not in `allow` raise NPlusOneError.
+    """
+    _install_hooks()
+    audit = QueryAudit(name, threshold=threshold, slow_ms=slow_ms, allow=allow)
+    token = _current_audit.set(audit)
+    try:
+        yield audit
+    finally:
+        _current_audit.reset(token)
+    audit.report()
+    if strict and audit.repeated:
+        offenders = "; ".join(f"{query.count}× at {query.call_site}" for query in audit.repeated)
+        raise NPlusOneError(f"N+1 queries in {name}: {offenders}")
+
+
+class QueryAuditMiddleware:
+    """
+    ASGI middleware auditing each HTTP request; added when QUERY_AUDIT is on.
+    """
+
+    def __init__(self, app, strict: bool = QUERY_AUDIT == "strict"):
+        self.app = app
+        self.strict = strict
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with audit_queries(f"{scope['method']} {scope['path']}", strict=self.strict):
+            await self.app(scope, receive, send)
@@ -1,7 +1,9 @@
 import os
 from jose import jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
+
+from .cache import LRUCache
 
 # Load secrets from environment variables
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -10,6 +12,10 @@ if not SECRET_KEY:
 
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "10080"))  # 7 days by default
+# Verified claims kept per token so repeat requests skip signature checks
+TOKEN_CLAIMS_CACHE_SIZE = int(os.getenv("TOKEN_CLAIMS_CACHE_SIZE", "10000"))
+
+_claims_cache = LRUCache(TOKEN_CLAIMS_CACHE_SIZE)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -19,4 +25,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     expire = datetime.utcnow() + (expires_delta if expires_delta else timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Verify a JWT and return its claims, served from a bounded cache for tokens
+    already verified. Cached claims expire with the token's own `exp`.
+    Raises jose.JWTError for invalid or expired tokens.
+    """
+    claims = _claims_cache.get(token)
+    if claims is not None:
+        return claims
+
+    claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    _claims_cache.set(token, claims, expires_at=claims.get("exp"))
+    return claims
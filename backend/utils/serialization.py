@@ -1,7 +1,9 @@
 from typing import Dict, Any, Optional
+import json
 from ..models.user import User
 from ..models.badge import Badge
 from ..models.title import Title
+from ..models.sync_job import SyncJob
 
 def serialize_user_basic(user: User) -> Dict[str, Any]:
     """
@@ -45,3 +47,18 @@ def serialize_title(title: Title, is_active: bool = False) -> Dict[str, Any]:
         "rarity": title.rarity,
         "is_active": is_active
     }
+
+def serialize_sync_job(job: SyncJob) -> Dict[str, Any]:
+    """
+    Serialize sync job status (and its result once finished) for API responses.
+    """
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error
+    }